@@ -25,6 +25,7 @@ setup(
         "pyyaml",
         "python-dotenv",
         "langgraph",
+        "langgraph-checkpoint-sqlite",
         "wikipedia",
         "llm",
         "pandas",
@@ -50,6 +51,7 @@ setup(
             # Link2ABC Integration Commands
             "oenhance = orpheuspypractice.link2abc_cli:main",
             "obatch-enhance = orpheuspypractice.link2abc_cli:main_batch_enhance",
+            "obench-startup = orpheuspypractice.startup_benchmark:main",
         ]
     },
     classifiers=[
@@ -57,5 +59,5 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
 )
@@ -1,27 +1,32 @@
-from jgcmlib.jgabcli import main as jgabcli_main
-
-from jgcmlib.jgabcli import main_mid2score as jgabcli_main_mid2score
-
-import jgcmlib as oabclib
-
-from jghfmanager.jgthfcli import main as jgthfcli_main
-import jghfmanager as ohflib
-
-def wfohfi_then_oabc_foreach_json_files():
-    print("Run Inferences then convert to abc commands foreach json files in the current directory.")
-    jgthfcli_main()
-    import os
-    from jgcmlib.jgcmhelper import pto_post_just_an_abc_file,extract_abc_from_json_to_abc_file
-    #list all json files
-    json_files = [f for f in os.listdir('.') if f.endswith('.json')]
-    for json_file in json_files:
-        print(f"Processing {json_file}")
-        abc_filename = extract_abc_from_json_to_abc_file(json_file)
-        res_musicsheet_svg_filepath, res_audio_filepath, res_midi_filepath =  pto_post_just_an_abc_file(abc_filename,score_ext="jpg")
-        
+
+import importlib
+
+# Console scripts import this package before parsing any argument, so the
+# heavy jgcmlib/jghfmanager stacks (music21, huggingface_hub) are only
+# resolved when one of these names is actually requested.
+_LAZY_ATTRIBUTES = {
+    "jgabcli_main": ("jgcmlib.jgabcli", "main"),
+    "jgabcli_main_mid2score": ("jgcmlib.jgabcli", "main_mid2score"),
+    "oabclib": ("jgcmlib", None),
+    "jgthfcli_main": ("jghfmanager.jgthfcli", "main"),
+    "ohflib": ("jghfmanager", None),
+    "wfohfi_then_oabc_foreach_json_files": ("orpheuspypractice.workflow", "wfohfi_then_oabc_foreach_json_files"),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = _LAZY_ATTRIBUTES[name]
+    module = importlib.import_module(module_name)
+    value = module if attr is None else getattr(module, attr)
+    globals()[name] = value
+    return value
+
+
 def say_hello():
     print("Hello, World!")
-    
+
 
 def __help__():
     print("This is a practice package to experiment with Orpheus's goals.")
@@ -29,4 +34,4 @@ def __help__():
     print("oabc")
     print("omid2score")
     print("say_hello_orpheuspypractice")
-    
+
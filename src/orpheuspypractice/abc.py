@@ -0,0 +1,309 @@
+"""
+🎼 Single-pass ABC parser and indexed tune model
+===============================================
+
+ABC text used to be handled as raw strings: naming scanned lines for ``T:``,
+prompts embedded the text verbatim and every later step re-split it.  Here a
+file or a generated answer is read once into compact records that naming,
+hashing, prompt building and validation share::
+
+    AbcBook                      # one file / text, tunes indexed by X: number
+    └── AbcTune                  # header fields, voices, body, bar lines, chords
+        └── chords: [(position, "Am"), ...]
+
+Header fields keep every value (``fields['T']`` may hold several titles);
+``bar_lines`` are the spans of bar line tokens in ``body`` and ``bars()``
+slices the music between them.  Text before the first ``X:`` (a model's
+preamble) and between tunes is not part of any tune; a text that starts
+straight with header fields is read as one tune without an ``X:`` number,
+unless an ``X:`` line follows before any ``K:``: then those fields are the
+file header, kept in the preamble.
+"""
+
+import hashlib
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_FIELD_LINE = re.compile(r'^([A-Za-z+]):(.*)$')
+# Quoted strings starting with one of these are annotations, not chord symbols
+_ANNOTATION_PREFIXES = frozenset('^_<>@')
+
+
+class AbcTune:
+    """One tune: ``X:`` number, header fields, voices, body, bar lines and chords"""
+
+    __slots__ = ('number', 'fields', 'voices', 'body', 'bar_lines', 'chords', 'start', 'end', 'text')
+
+    def __init__(self, number: Optional[int], start: int = 0):
+        self.number = number
+        # Header fields in order of appearance, up to and including K:
+        self.fields: Dict[str, List[str]] = {}
+        # Voice id → V: properties, in order of appearance
+        self.voices: Dict[str, str] = {}
+        # Music lines only: field and comment lines of the body are left out
+        self.body = ''
+        # (start, end) of every bar line token in ``body``
+        self.bar_lines: List[Tuple[int, int]] = []
+        # (body position, chord symbol) pairs
+        self.chords: List[Tuple[int, str]] = []
+        # Span of the tune in the parsed text
+        self.start = start
+        self.end = start
+        self.text = ''
+
+    def __repr__(self):
+        return f"AbcTune(X:{self.number}, T:{self.title!r}, {len(self.bars())} bars)"
+
+    def field(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """First value of header field ``name``"""
+        values = self.fields.get(name)
+        return values[0] if values else default
+
+    @property
+    def title(self) -> Optional[str]:
+        return self.field('T')
+
+    @property
+    def meter(self) -> Optional[str]:
+        return self.field('M')
+
+    @property
+    def unit_length(self) -> Optional[str]:
+        return self.field('L')
+
+    @property
+    def key(self) -> Optional[str]:
+        return self.field('K')
+
+    @property
+    def tempo(self) -> Optional[str]:
+        return self.field('Q')
+
+    @property
+    def bar_offsets(self) -> List[int]:
+        return [start for start, _ in self.bar_lines]
+
+    def bars(self) -> List[str]:
+        """Non-empty body segments between bar lines, in order"""
+        segments = []
+        previous = 0
+        for start, end in self.bar_lines:
+            if self.body[previous:start].strip():
+                segments.append(self.body[previous:start])
+            previous = end
+        if self.body[previous:].strip():
+            segments.append(self.body[previous:])
+        return segments
+
+    def bar_index(self, offset: int) -> int:
+        """Index in ``bars()`` of the bar holding body position ``offset``"""
+        index = 0
+        previous = 0
+        for start, end in self.bar_lines:
+            if start > offset:
+                break
+            if self.body[previous:start].strip():
+                index += 1
+            previous = end
+        return index
+
+    def normalized(self) -> str:
+        """Tune text without trailing spaces or blank lines"""
+        lines = [line.rstrip() for line in self.text.split('\n')]
+        return '\n'.join(line for line in lines if line)
+
+    def digest(self) -> str:
+        """Hash of ``normalized()``: equal for whitespace-only differences"""
+        return hashlib.sha256(self.normalized().encode('utf-8')).hexdigest()
+
+
+class AbcBook:
+    """Tunes of one text, in order and indexed by ``X:`` number"""
+
+    __slots__ = ('tunes', 'index', 'preamble')
+
+    def __init__(self):
+        self.tunes: List[AbcTune] = []
+        self.index: Dict[int, AbcTune] = {}
+        # Free text before the first X: header
+        self.preamble = ''
+
+    def __len__(self):
+        return len(self.tunes)
+
+    def __iter__(self) -> Iterator[AbcTune]:
+        return iter(self.tunes)
+
+    def __getitem__(self, number: int) -> AbcTune:
+        return self.index[number]
+
+    def get(self, number: int) -> Optional[AbcTune]:
+        return self.index.get(number)
+
+    @property
+    def first(self) -> Optional[AbcTune]:
+        return self.tunes[0] if self.tunes else None
+
+    def _add(self, tune: AbcTune):
+        self.tunes.append(tune)
+        # The first tune wins when a file reuses an X: number
+        if tune.number is not None:
+            self.index.setdefault(tune.number, tune)
+
+
+def _bar_line_end(line: str, index: int) -> int:
+    """
+    End of the bar line token starting at ``index`` (``|``, ``|:``, ``:|]``,
+    ``[|``, ``|1``, ``:|[2``...), or -1; a volta bracket set apart from its
+    bar line (``| [1``) is a token of its own
+    """
+    length = len(line)
+    char = line[index]
+    following = line[index + 1] if index + 1 < length else ''
+    if not (char == '|' or (char == ':' and following in ('|', ':'))
+            or (char == '[' and (following == '|' or following.isdigit()))):
+        return -1
+    end = index
+    while end < length:
+        char = line[end]
+        if char in '|:' or (char == ']' and line[end - 1] == '|'):
+            end += 1
+        elif char == '[' and end + 1 < length and (line[end + 1] == '|' or line[end + 1].isdigit()):
+            end += 1
+        else:
+            break
+    # Volta number: |1, :|2, [1
+    while end < length and (line[end].isdigit() or (line[end] in ',-' and line[end - 1].isdigit())):
+        end += 1
+    return end
+
+
+def _scan_body_line(tune: AbcTune, line: str, line_offset: int):
+    """Record bar lines and chord symbols of one music line"""
+    index = 0
+    length = len(line)
+    while index < length:
+        char = line[index]
+        if char == '"':
+            close = line.find('"', index + 1)
+            if close < 0:
+                break
+            symbol = line[index + 1:close]
+            if symbol and symbol[0] not in _ANNOTATION_PREFIXES:
+                tune.chords.append((line_offset + index, symbol))
+            index = close + 1
+        elif char == '!' or char == '+':
+            # Decorations such as !fermata! or +trill+
+            close = line.find(char, index + 1)
+            index = close + 1 if close > 0 else length
+        elif char == '[' and index + 2 < length and line[index + 2] == ':' and line[index + 1].isalpha():
+            # Inline field such as [K:G] or [V:2]
+            close = line.find(']', index)
+            index = close + 1 if close > 0 else length
+        elif char == '%':
+            break
+        else:
+            end = _bar_line_end(line, index)
+            if end < 0:
+                index += 1
+            else:
+                tune.bar_lines.append((line_offset + index, line_offset + end))
+                index = end
+
+
+def parse(text: str) -> AbcBook:
+    """Parse every tune of ``text`` in a single pass over its lines"""
+    book = AbcBook()
+    tune = None
+    in_body = False
+    body_parts: List[str] = []
+    body_length = 0
+    offset = 0
+    # Anything but blank lines seen outside a tune yet
+    seen_text = False
+
+    def close(end: int):
+        tune.body = ''.join(body_parts)
+        tune.end = end
+        tune.text = text[tune.start:end]
+        book._add(tune)
+
+    for line in text.splitlines(keepends=True):
+        stripped = line.rstrip('\r\n')
+        match = _FIELD_LINE.match(stripped)
+        name = match.group(1) if match else None
+
+        if tune is None and name is not None and name != 'X' and not seen_text and not book.tunes:
+            # A fragment without its X: line (as Link2ABC pages often are) is one tune
+            tune = AbcTune(None, offset)
+            in_body = False
+            body_parts = []
+            body_length = 0
+
+        if name == 'X':
+            if tune is not None:
+                close(offset)
+            if len(book.tunes) == 1 and book.tunes[0].number is None and 'K' not in book.tunes[0].fields:
+                # Fields before the first X: without a K: are the file header, not a tune
+                book.tunes.clear()
+            if not book.tunes:
+                book.preamble = text[:offset]
+            value = match.group(2).strip()
+            tune = AbcTune(int(value) if value.isdigit() else None, offset)
+            in_body = False
+            body_parts = []
+            body_length = 0
+        elif tune is None:
+            seen_text = seen_text or bool(stripped.strip())
+        elif not in_body:
+            if match:
+                value = match.group(2).strip()
+                tune.fields.setdefault(name, []).append(value)
+                if name == 'V':
+                    voice_id, _, properties = value.partition(' ')
+                    tune.voices.setdefault(voice_id, properties.strip())
+                elif name == 'K':
+                    in_body = True
+            elif not stripped.strip() and tune.fields:
+                # A blank line ends a tune that never reached its K: line
+                close(offset)
+                tune = None
+        elif not stripped.strip():
+            # A blank line ends the tune
+            close(offset)
+            tune = None
+        elif not stripped.startswith('%'):
+            if match:
+                if name == 'V':
+                    voice_id, _, properties = match.group(2).strip().partition(' ')
+                    tune.voices.setdefault(voice_id, properties.strip())
+            else:
+                _scan_body_line(tune, stripped, body_length)
+                body_parts.append(stripped + '\n')
+                body_length += len(stripped) + 1
+        offset += len(line)
+
+    if tune is not None:
+        close(offset)
+    elif not book.tunes:
+        book.preamble = text
+    return book
+
+
+def parse_tune(text: str) -> Optional[AbcTune]:
+    """First tune of ``text``, or None when it holds no ABC"""
+    return parse(text).first
+
+
+def parse_file(path: str) -> AbcBook:
+    """Parse an ``.abc`` file such as ``samples/*.abc``"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse(f.read())
+
+
+def normalize(text: str) -> str:
+    """Tunes of ``text`` without surrounding prose or stray whitespace; the stripped text if it holds none"""
+    book = parse(text)
+    if not book.tunes:
+        return text.strip()
+    return '\n\n'.join(tune.normalized() for tune in book)
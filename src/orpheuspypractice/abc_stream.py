@@ -0,0 +1,78 @@
+"""
+🌊 Incremental ABC tune detection for streamed generations
+=========================================================
+
+ChatMusician usually answers with a short preamble, one ABC tune and then
+commentary.  ``extract_abc_from_text`` only runs on the full text, so the
+whole answer, trailing commentary included, has to be generated (and paid
+for) first.  ``AbcTuneDetector`` is fed the text token by token and reports
+as soon as a tune is complete: an ``X:`` header, a ``K:`` key line, at least
+one line of music, then a blank line.  ``flush`` ends the stream: a tune
+still open at that point ends with the text.
+"""
+
+import re
+from typing import Optional
+
+_HEADER_START = re.compile(r'(?:^|\n)(X:\d+\n)')
+_FIELD_LINE = re.compile(r'^[A-Za-z+]:')
+
+
+class AbcTuneDetector:
+    """Feed streamed text; ``feed`` returns the tune once it is complete"""
+
+    def __init__(self):
+        self.text = ''
+        self.tune = None
+        # Text up to the end of the tune, once complete
+        self.generated_text = None
+        self._tune_start = None
+        self._scan_from = 0
+
+    def feed(self, chunk: str) -> Optional[str]:
+        self.text += chunk
+        # Headers and tune ends are only decided at line ends
+        if self.tune is None and '\n' in chunk:
+            self.tune = self._detect()
+            if self.tune is not None:
+                self.generated_text = self.text[:self._tune_start] + self.tune
+        return self.tune
+
+    def flush(self) -> Optional[str]:
+        """End of the stream: the last line is complete and an open tune ends there"""
+        if self.tune is None:
+            text = self.text
+            # As if the generation had ended the line and the tune
+            self.text = text + ('\n' if text.endswith('\n') else '\n\n')
+            self.tune = self._detect()
+            self.text = text
+            if self.tune is not None:
+                self.generated_text = self.text[:self._tune_start] + self.tune
+        return self.tune
+
+    def _detect(self) -> Optional[str]:
+        if self._tune_start is None:
+            # Only look again from a little before the previous end
+            match = _HEADER_START.search(self.text, max(0, self._scan_from - 1))
+            if not match:
+                self._scan_from = max(0, len(self.text) - 16)
+                return None
+            self._tune_start = match.start(1)
+
+        # Only complete lines count: the last one may still be growing
+        lines = self.text[self._tune_start:].split('\n')[:-1]
+        key_seen = False
+        body_lines = 0
+        for index, line in enumerate(lines):
+            stripped = line.strip()
+            if not key_seen:
+                if stripped.startswith('K:'):
+                    key_seen = True
+                continue
+            if not stripped:
+                if body_lines:
+                    return '\n'.join(lines[:index]) + '\n'
+                continue
+            if not _FIELD_LINE.match(stripped):
+                body_lines += 1
+        return None
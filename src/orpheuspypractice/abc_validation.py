@@ -0,0 +1,265 @@
+"""
+✅ Pre-render ABC validation
+===========================
+
+Malformed ABC from the model still went through abc2midi, MuseScore and
+ImageMagick, which fail slowly, and the first extracted tune was taken even
+when a later one was fine.  ``validate_tune`` checks a parsed tune in process:
+
+    header      X:, T:, M:, L: and K: present (K: required)
+    body        some music after the header
+    durations   every bar fills the M: meter in L: units (pickup and final
+                bars may be short; a few odd bars are only warnings)
+    balance     repeats, [chords], {grace notes} and "quoted" strings closed
+
+The report is a plain dict::
+
+    {'valid': False, 'number': 1, 'bars': 16,
+     'errors': [{'code': 'unbalanced_repeats', 'message': ..., 'bar': 7}],   # bar: 1-based
+     'warnings': [...]}
+
+``select_best_tune`` validates every candidate of a generated text and picks
+the best one; a text without any valid tune is rejected before rendering.
+"""
+
+import re
+from fractions import Fraction
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .abc import AbcTune, parse
+
+# Share of checked bars whose length may differ from the meter before the
+# durations count as an error rather than a warning
+BAR_MISMATCH_TOLERANCE = 0.5
+
+_NOTE = re.compile(r"([\^=_]*)([A-Ga-gzxyZX])([,']*)(\d*)(/*)(\d*)")
+_LENGTH = re.compile(r"(\d*)(/*)(\d*)")
+_TUPLET = re.compile(r"\((\d)(?::(\d?))?(?::(\d?))?")
+_SKIPPED = re.compile(r'"[^"]*"|![^!]*!|\+[^+\s]*\+|\[[A-Za-z]:[^\]]*\]|\{[^}]*\}')
+
+
+def _issue(code: str, message: str, bar: int = None) -> Dict[str, Any]:
+    issue = {'code': code, 'message': message}
+    if bar is not None:
+        issue['bar'] = bar
+    return issue
+
+
+def parse_meter(meter: Optional[str]) -> Optional[Fraction]:
+    """Bar length as a fraction of a whole note; None for free meter"""
+    if meter is None:
+        return None
+    meter = meter.strip()
+    if meter in ('C', 'C|'):
+        return Fraction(1)
+    match = re.match(r'^\(?([\d+]+)\)?/(\d+)$', meter)
+    if not match:
+        return None
+    return Fraction(sum(int(part) for part in match.group(1).split('+') if part), int(match.group(2)))
+
+
+def parse_unit_length(unit_length: Optional[str], meter_length: Optional[Fraction]) -> Fraction:
+    """L: value, or the ABC default derived from the meter"""
+    if unit_length:
+        match = re.match(r'^(\d+)/(\d+)$', unit_length.strip())
+        if match and int(match.group(2)):
+            return Fraction(int(match.group(1)), int(match.group(2)))
+    if meter_length is not None and meter_length < Fraction(3, 4):
+        return Fraction(1, 16)
+    return Fraction(1, 8)
+
+
+def _length(digits: str, slashes: str, denominator: str) -> Fraction:
+    numerator = int(digits) if digits else 1
+    if not slashes:
+        return Fraction(numerator)
+    if denominator:
+        return Fraction(numerator, int(denominator))
+    return Fraction(numerator, 2 ** len(slashes))
+
+
+def bar_duration(bar: str, compound: bool = False) -> Tuple[Fraction, bool]:
+    """
+    Duration of one bar in L: units; the flag is True for multi-measure rests
+
+    Chords count once (by their first note), tuplets scale their notes and
+    broken rhythm (``>``/``<``) keeps the pair's total, so it is ignored.
+    """
+    bar = _SKIPPED.sub(' ', bar)
+    total = Fraction(0)
+    tuplet_left = 0
+    tuplet_ratio = Fraction(1)
+    index = 0
+    length = len(bar)
+    while index < length:
+        char = bar[index]
+        if char == '(' and index + 1 < length and bar[index + 1].isdigit():
+            match = _TUPLET.match(bar, index)
+            p = int(match.group(1))
+            q = match.group(2)
+            r = match.group(3)
+            if q:
+                q = int(q)
+            elif p in (2, 4, 8):
+                q = 3
+            elif p in (3, 6):
+                q = 2
+            else:
+                q = 3 if compound else 2
+            tuplet_left = int(r) if r else p
+            tuplet_ratio = Fraction(q, p)
+            index = match.end()
+            continue
+        if char == '[':
+            close = bar.find(']', index)
+            if close < 0:
+                break
+            notes = list(_NOTE.finditer(bar[index + 1:close]))
+            index = close + 1
+            match = _LENGTH.match(bar, index)
+            index = match.end()
+            if not notes:
+                continue
+            first = notes[0]
+            duration = _length(first.group(4), first.group(5), first.group(6)) * _length(*match.groups())
+        else:
+            match = _NOTE.match(bar, index)
+            if not match:
+                index += 1
+                continue
+            index = match.end()
+            symbol = match.group(2)
+            if symbol in 'ZX':
+                return total, True
+            if symbol == 'y':
+                continue
+            duration = _length(match.group(4), match.group(5), match.group(6))
+        if tuplet_left:
+            duration *= tuplet_ratio
+            tuplet_left -= 1
+        total += duration
+    return total, False
+
+
+def _check_balance(tune: AbcTune, errors: List[Dict[str, Any]]):
+    """Repeats, chords, grace notes and quoted strings must be closed"""
+    repeat_open = False
+    for start, end in tune.bar_lines:
+        token = tune.body[start:end].rstrip('0123456789,-')
+        # ':|' ends, '|:' starts, '::' and ':|:' do both; an end without a
+        # start repeats from the beginning (or the previous repeat)
+        if token.startswith(':'):
+            repeat_open = False
+        if token.endswith(':'):
+            if repeat_open:
+                errors.append(_issue('unbalanced_repeats', "'|:' opened again before the previous repeat ended",
+                                     tune.bar_index(start) + 1))
+            repeat_open = True
+    if repeat_open:
+        errors.append(_issue('unbalanced_repeats', "'|:' is never closed by ':|'"))
+
+    for line in tune.body.split('\n'):
+        if line.count('"') % 2:
+            errors.append(_issue('unclosed_quote', f"unclosed quoted string in {line.strip()[:40]!r}"))
+        stripped = _SKIPPED.sub(' ', line)
+        # Bar line brackets ([| and |]) and voltas ([1) are not chords
+        stripped = re.sub(r'\[\||\|\]|\[\d', ' ', stripped)
+        if stripped.count('[') != stripped.count(']'):
+            errors.append(_issue('unbalanced_chord', f"unbalanced [chord] brackets in {line.strip()[:40]!r}"))
+        if line.count('{') != line.count('}'):
+            errors.append(_issue('unbalanced_grace', f"unbalanced {{grace}} braces in {line.strip()[:40]!r}"))
+
+
+def validate_tune(tune: AbcTune) -> Dict[str, Any]:
+    """Check one parsed tune; returns the structured report"""
+    errors: List[Dict[str, Any]] = []
+    warnings: List[Dict[str, Any]] = []
+
+    if tune.number is None:
+        warnings.append(_issue('missing_header', "no X: reference number"))
+    if tune.key is None:
+        errors.append(_issue('missing_header', "no K: key line, the header never ends"))
+    for field, name in (('T', 'title'), ('M', 'meter'), ('L', 'unit note length')):
+        if field not in tune.fields:
+            warnings.append(_issue('missing_header', f"no {field}: {name}"))
+
+    bars = tune.bars()
+    if not bars:
+        errors.append(_issue('empty_body', "no music after the header"))
+
+    _check_balance(tune, errors)
+
+    meter_length = parse_meter(tune.meter)
+    if bars and meter_length is not None:
+        unit = parse_unit_length(tune.unit_length, meter_length)
+        expected = meter_length / unit
+        compound = meter_length.denominator == 8 and meter_length.numerator % 3 == 0
+        mismatched = []
+        checked = 0
+        for index, bar in enumerate(bars):
+            duration, multi_measure = bar_duration(bar, compound)
+            if multi_measure or duration == 0:
+                continue
+            checked += 1
+            # Pickup and final bars are often incomplete
+            if duration < expected and index in (0, len(bars) - 1):
+                continue
+            if duration != expected:
+                mismatched.append((index, duration))
+        if mismatched:
+            message = ', '.join(f"bar {index + 1} has {duration} units" for index, duration in mismatched[:5])
+            issue = _issue('bar_durations', f"{len(mismatched)} of {checked} bars do not fill "
+                                            f"M:{tune.meter} ({expected} units of L:{unit}): {message}",
+                           mismatched[0][0] + 1)
+            if len(mismatched) > max(1, checked * BAR_MISMATCH_TOLERANCE):
+                errors.append(issue)
+            else:
+                warnings.append(issue)
+
+    return {
+        'valid': not errors,
+        'number': tune.number,
+        'title': tune.title,
+        'bars': len(bars),
+        'errors': errors,
+        'warnings': warnings
+    }
+
+
+def validate_abc(abc_content: str) -> Dict[str, Any]:
+    """Validate the first tune of ``abc_content``"""
+    tune = parse(abc_content).first
+    if tune is None:
+        return {'valid': False, 'number': None, 'title': None, 'bars': 0,
+                'errors': [_issue('no_tune', "no ABC tune found")], 'warnings': []}
+    return validate_tune(tune)
+
+
+def select_best_tune(candidates: Iterable[Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    Pick the best candidate: valid first, then fewest warnings, then most bars
+
+    ``candidates`` are ABC texts or parsed tunes (e.g. every tune of a
+    generated answer).  Returns the chosen tune's text, or None when no
+    candidate is valid, with the report of the best candidate found; the
+    report also lists every candidate's summary under ``candidates``.
+    """
+    best = None
+    summaries = []
+    for candidate in candidates:
+        tunes = [candidate] if isinstance(candidate, AbcTune) else parse(candidate).tunes
+        for tune in tunes:
+            report = validate_tune(tune)
+            summaries.append({'number': report['number'], 'title': report['title'], 'valid': report['valid'],
+                              'errors': [issue['code'] for issue in report['errors']]})
+            rank = (report['valid'], -len(report['errors']), -len(report['warnings']), report['bars'])
+            if best is None or rank > best[0]:
+                best = (rank, tune, report)
+
+    if best is None:
+        report = validate_abc('')
+        report['candidates'] = []
+        return None, report
+    _, tune, report = best
+    report = dict(report, candidates=summaries)
+    return (tune.normalized() + '\n' if report['valid'] else None), report
@@ -0,0 +1,248 @@
+"""
+📦 Batch rendering: one abc2midi, MuseScore and ImageMagick run for many tunes
+=============================================================================
+
+``pto_post_just_an_abc_file`` starts abc2midi, then MuseScore twice (audio,
+then score) and ImageMagick for every single tune; MuseScore's start-up under
+Xvfb takes seconds and dominated batch runs.  ``render_abc_files`` renders a
+whole list of ``.abc`` files with:
+
+    abc2midi book.abc            # every tune in one multi-tune file, X:1..N
+    musescore3 -j job.json       # [{"in": "a.mid", "out": ["a.mp3", "a.svg"]}, ...]
+    mogrify -format jpg *.svg    # only when the score is not wanted as SVG
+
+A file's header (fields and ``%%`` directives before its ``X:``) is carried
+into its tune's header in the book; files holding several tunes are not
+batched.  Outputs land next to each ``.abc`` file under the names
+``pto_post_just_an_abc_file`` uses, so they map back to their creation name
+and the render cache can store them.  Any file whose outputs are missing
+after the batch is rendered once more on its own.
+
+``RenderBatcher`` feeds results that trickle in (enhanced pieces, pipeline
+responses) to the same batch call: whatever is queued while a batch renders
+becomes the next batch.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .abc import parse
+from .display_pool import get_display_pool, inherited_display
+
+MUSESCORE_BINARIES = ('musescore3', 'musescore', 'mscore3', 'mscore')
+_HEADER_LINE = re.compile(r'^(?:[A-Za-z+]:|%%)')
+
+
+def find_musescore() -> Optional[str]:
+    """First MuseScore binary on PATH (``MUSESCORE_BIN`` overrides)"""
+    configured = os.getenv('MUSESCORE_BIN')
+    if configured:
+        return configured
+    for binary in MUSESCORE_BINARIES:
+        if shutil.which(binary):
+            return binary
+    return None
+
+
+def _output_paths(abc_file: str, score_ext: str) -> Tuple[str, str, str]:
+    """(score, audio, midi) paths as ``pto_post_just_an_abc_file`` names them"""
+    stem = os.path.splitext(abc_file)[0]
+    return f"{stem}.{score_ext}", f"{stem}.mp3", f"{stem}.mid"
+
+
+def _file_header(preamble: str) -> List[str]:
+    """Field and ``%%`` directive lines before a file's first ``X:``, which apply to its tune"""
+    return [line.rstrip() for line in preamble.split('\n') if _HEADER_LINE.match(line)]
+
+
+def _write_book(abc_files: List[str], book_file: str) -> List[int]:
+    """
+    Write the tune of every single-tune file renumbered X:1..N, its file
+    header moved into the tune header; returns the indexes written
+
+    Files holding several tunes are left out: they are rendered on their
+    own, exactly as a per-file render would.
+    """
+    written = []
+    with open(book_file, 'w') as book:
+        for index, abc_file in enumerate(abc_files):
+            try:
+                with open(abc_file, 'r') as f:
+                    abc_book = parse(f.read())
+            except OSError:
+                continue
+            tune = abc_book.first
+            if len(abc_book) != 1 or tune.key is None:
+                continue
+            lines = tune.normalized().split('\n')
+            if lines[0].startswith('X:'):
+                lines = lines[1:]
+            lines = _file_header(abc_book.preamble) + lines
+            book.write(f"X:{len(written) + 1}\n" + '\n'.join(lines) + '\n\n')
+            written.append(index)
+    return written
+
+
+def render_abc_file(abc_file: str, score_ext: str = "svg") -> Optional[Tuple[str, str, str]]:
+    """``pto_post_just_an_abc_file`` with a usable display for the MuseScore it spawns"""
+    from jgcmlib.jgabcli import pto_post_just_an_abc_file
+    with inherited_display():
+        return pto_post_just_an_abc_file(abc_file, score_ext=score_ext)
+
+
+def _run(command: List[str], cwd: str = None, env: Dict[str, str] = None) -> bool:
+    try:
+        subprocess.run(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+def render_abc_files(abc_files: List[str], score_ext: str = "svg", musescore_bin: str = None,
+                     abc2midi_bin: str = "abc2midi", mogrify_bin: str = "mogrify",
+                     fallback: Callable = None) -> List[Optional[Tuple[str, str, str]]]:
+    """
+    Render many ``.abc`` files, paying each tool's start-up once
+
+    Returns one (score_path, audio_path, midi_path) tuple per file, in input
+    order, or None for a file that could not be rendered even on its own.
+    """
+    if not abc_files:
+        return []
+    fallback = fallback or render_abc_file
+    musescore_bin = musescore_bin or find_musescore()
+    paths = [_output_paths(abc_file, score_ext) for abc_file in abc_files]
+    # Outputs of an earlier run must not pass for this batch's
+    for outputs in paths:
+        stem = os.path.splitext(outputs[0])[0]
+        for path in outputs + (f"{stem}.svg", f"{stem}-1.svg"):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    with tempfile.TemporaryDirectory(prefix='orpheus-batch-') as batch_dir:
+        # abc2midi names each tune's MIDI file after the book and its X: number
+        written = _write_book(abc_files, os.path.join(batch_dir, 'book.abc'))
+        _run([abc2midi_bin, 'book.abc'], cwd=batch_dir)
+        jobs = []
+        for number, index in enumerate(written, 1):
+            book_midi = os.path.join(batch_dir, f"book{number}.mid")
+            if os.path.isfile(book_midi):
+                score_path, audio_path, midi_path = paths[index]
+                shutil.move(book_midi, midi_path)
+                svg_path = os.path.splitext(score_path)[0] + '.svg'
+                jobs.append({'in': os.path.abspath(midi_path),
+                             'out': [os.path.abspath(audio_path), os.path.abspath(svg_path)]})
+
+        if jobs and musescore_bin:
+            job_file = os.path.join(batch_dir, 'job.json')
+            with open(job_file, 'w') as f:
+                json.dump(jobs, f, indent=2)
+            # A display of its own, so batches can render side by side
+            with get_display_pool().lease() as env:
+                _run([musescore_bin, '-j', job_file], env=env)
+
+    svg_files = []
+    for score_path, _, _ in paths:
+        svg_path = os.path.splitext(score_path)[0] + '.svg'
+        page_one = os.path.splitext(score_path)[0] + '-1.svg'
+        # MuseScore numbers SVG pages: page one becomes the score
+        if os.path.isfile(page_one):
+            os.replace(page_one, svg_path)
+        if score_ext != 'svg' and os.path.isfile(svg_path):
+            svg_files.append(svg_path)
+    if svg_files:
+        _run([mogrify_bin, '-format', score_ext] + svg_files)
+
+    results = []
+    for abc_file, outputs in zip(abc_files, paths):
+        if not all(os.path.isfile(path) for path in outputs):
+            try:
+                outputs = fallback(abc_file, score_ext=score_ext)
+            except Exception:
+                outputs = None
+        results.append(tuple(outputs) if outputs else None)
+    return results
+
+
+class RenderBatcher:
+    """
+    Queue ``.abc`` files for rendering; each worker renders everything queued
+    since its previous batch in one ``render_many`` call
+
+    ``render_many`` takes a list of files and returns one result per file,
+    e.g. ``RenderCache(...).render_many``.
+    """
+
+    def __init__(self, render_many: Callable[[List[str]], List], workers: int = 1):
+        self.render_many = render_many
+        self.workers = max(1, workers)
+        self._queue = Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit_many(self, abc_files: List[str]) -> List[Future]:
+        """Queue files that belong to one batch; returns one future per file"""
+        futures = [Future() for _ in abc_files]
+        if abc_files:
+            self._start()
+            self._queue.put(list(zip(abc_files, futures)))
+        return futures
+
+    def submit(self, abc_file: str) -> Future:
+        return self.submit_many([abc_file])[0]
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            stop = False
+            while True:
+                try:
+                    more = self._queue.get_nowait()
+                except Empty:
+                    break
+                if more is None:
+                    stop = True
+                    break
+                batch.extend(more)
+            try:
+                outputs = self.render_many([abc_file for abc_file, _ in batch])
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def close(self):
+        """Finish every queued batch and stop the workers"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
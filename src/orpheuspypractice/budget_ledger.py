@@ -0,0 +1,206 @@
+"""
+💰 Concurrent-safe cost ledger for HuggingFace budgets
+=====================================================
+
+``CostBudgetManager`` used to read-modify-write ``.orpheus_budget.json`` after
+every charge, so parallel ``oenhance`` processes lost each other's costs and
+could overspend the daily budget.  This ledger is a SQLite database in WAL
+mode: every charge is one appended row, totals are ``SUM`` queries, and
+admission is an atomic reserve-then-commit under SQLite's write lock.
+
+Rows (table ``ledger``)::
+
+    kind='reserved'   estimated cost held while an enhancement runs
+    kind='charged'    actual cost (a committed reservation or a direct charge)
+
+Reservations left behind by a crashed process stop counting once they are
+``RESERVATION_TTL`` seconds old.  The legacy JSON state is imported once per
+ledger, in the same transaction as its ``legacy_imported`` settings row.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+DEFAULT_LEDGER_FILE = ".orpheus_budget.db"
+LEGACY_BUDGET_FILE = ".orpheus_budget.json"
+# Longer than endpoint boot (ready_timeout) plus a slow inference run
+RESERVATION_TTL = 2 * 3600
+# Settings row recording that the legacy JSON state was carried over
+LEGACY_IMPORTED = 'legacy_imported'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day TEXT NOT NULL,
+    session TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    amount REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ledger_day ON ledger (day, kind);
+CREATE INDEX IF NOT EXISTS ledger_session ON ledger (session, kind);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+def _today() -> str:
+    return time.strftime('%Y-%m-%d')
+
+
+class BudgetLedger:
+    """Append-only cost ledger shared by every process using the same file"""
+
+    def __init__(self, ledger_file: str = DEFAULT_LEDGER_FILE, session_id: str = None,
+                 read_only: bool = False):
+        self.ledger_file = ledger_file
+        self.session_id = session_id or uuid.uuid4().hex
+        # For status queries: never creates or migrates the file (which must exist)
+        self.read_only = read_only
+        if read_only:
+            return
+        self._init_schema()
+        self._import_legacy_state()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            return sqlite3.connect(f"file:{os.path.abspath(self.ledger_file)}?mode=ro", uri=True, timeout=30)
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.ledger_file, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction holding SQLite's write lock from the first statement"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _import_legacy_state(self):
+        """
+        Carry today's spend and the daily budget over from .orpheus_budget.json,
+        once: processes opening a new ledger together must not both charge it
+        """
+        legacy_file = os.path.join(os.path.dirname(self.ledger_file), LEGACY_BUDGET_FILE)
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM settings WHERE key = ?", (LEGACY_IMPORTED,)).fetchone():
+                return
+            conn.execute("INSERT INTO settings (key, value) VALUES (?, 1)", (LEGACY_IMPORTED,))
+            # Ledgers from before the marker row imported when they were created
+            if conn.execute("SELECT 1 FROM ledger UNION ALL SELECT 1 FROM settings WHERE key != ?",
+                            (LEGACY_IMPORTED,)).fetchone():
+                return
+            try:
+                with open(legacy_file, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            if data.get('daily_budget'):
+                conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('daily_budget', ?)",
+                             (data['daily_budget'],))
+            if data.get('last_date') == _today() and data.get('daily_cost'):
+                conn.execute(
+                    "INSERT INTO ledger (day, session, kind, amount, created_at) VALUES (?, ?, 'charged', ?, ?)",
+                    (_today(), self.session_id, data['daily_cost'], time.time())
+                )
+
+    def get_setting(self, key: str, default: float = 0.0) -> float:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else default
+
+    def set_setting(self, key: str, value: float):
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+    def _totals(self, conn: sqlite3.Connection, include_reserved: bool = True):
+        """(daily, session) totals of charges, plus live reservations if asked"""
+        if include_reserved:
+            condition = "(kind = 'charged' OR (kind = 'reserved' AND created_at > ?))"
+            params = (time.time() - RESERVATION_TTL,)
+        else:
+            condition = "kind = 'charged'"
+            params = ()
+        query = f"SELECT COALESCE(SUM(amount), 0) FROM ledger WHERE {{column}} = ? AND {condition}"
+        daily = conn.execute(query.format(column='day'), (_today(),) + params).fetchone()[0]
+        session = conn.execute(query.format(column='session'), (self.session_id,) + params).fetchone()[0]
+        return daily, session
+
+    def totals(self, include_reserved: bool = False):
+        conn = self._connect()
+        try:
+            return self._totals(conn, include_reserved)
+        finally:
+            conn.close()
+
+    def reserve(self, amount: float, daily_limit: float = 0.0, session_limit: float = 0.0) -> Optional[int]:
+        """
+        Atomically hold ``amount`` if it fits both limits (0 means unlimited)
+
+        Returns the reservation id, or None when the budget would be exceeded.
+        """
+        with self._transaction() as conn:
+            daily, session = self._totals(conn)
+            if daily_limit > 0 and daily + amount > daily_limit:
+                return None
+            if session_limit > 0 and session + amount > session_limit:
+                return None
+            cursor = conn.execute(
+                "INSERT INTO ledger (day, session, kind, amount, created_at) VALUES (?, ?, 'reserved', ?, ?)",
+                (_today(), self.session_id, amount, time.time())
+            )
+            return cursor.lastrowid
+
+    def commit(self, reservation_id: int, actual_cost: float):
+        """Turn a reservation into a charge of ``actual_cost``"""
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE ledger SET kind = 'charged', amount = ? WHERE id = ? AND kind = 'reserved'",
+                (actual_cost, reservation_id)
+            ).rowcount
+        if not updated:
+            # Reservation already released or committed: still record the spend
+            self.charge(actual_cost)
+
+    def release(self, reservation_id: int):
+        """Drop a reservation that was never spent"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM ledger WHERE id = ? AND kind = 'reserved'", (reservation_id,))
+
+    def charge(self, amount: float):
+        """Append a charge that was not reserved beforehand"""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO ledger (day, session, kind, amount, created_at) VALUES (?, ?, 'charged', ?, ?)",
+                (_today(), self.session_id, amount, time.time())
+            )
+
+    def reset_day(self):
+        """Forget today's charges and reservations"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM ledger WHERE day = ?", (_today(),))
@@ -0,0 +1,297 @@
+"""
+🖥️ Headless display pool for MuseScore rendering
+===============================================
+
+MuseScore needs an X display even to convert files.  The Dockerfile and test
+scripts start one ``Xvfb :99`` by hand and everything assumed
+``DISPLAY=:99``: parallel renders contended on that single display and every
+render failed when it was not running.  ``DisplayPool`` owns the displays:
+
+    xvfb        one Xvfb server per render worker, started on demand with
+                ``-displayfd`` (no display-number races), health-checked
+                when leased and restarted when it died
+    offscreen   no X at all: Qt's ``QT_QPA_PLATFORM=offscreen``
+    display     the ``DISPLAY`` that is already there (a desktop session)
+
+``auto`` keeps a working ``DISPLAY``, else uses Xvfb when installed, else
+the offscreen platform.  A lease is the environment to run MuseScore with::
+
+    with get_display_pool().lease() as env:
+        subprocess.run([musescore, ...], env=env)
+
+Code that spawns MuseScore without passing an environment (jgcmlib's
+``pto_post_just_an_abc_file``) runs inside ``inherited_display``: while any
+such block runs, this process's environment points at a display of its own,
+never one leased to a worker, when no usable one is set.
+
+Environment:
+    ORPHEUS_RENDER_PLATFORM   auto (default), xvfb, offscreen or display
+    ORPHEUS_RENDER_DISPLAYS   most Xvfb servers at once (default: CPU cores)
+    ORPHEUS_XVFB_SCREEN       screen geometry (default: 1024x768x16)
+    ORPHEUS_X11_SOCKET_DIR    where X servers put their sockets (default: /tmp/.X11-unix)
+"""
+
+import atexit
+import os
+import select
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from queue import Empty, Queue
+from typing import Any, Dict, Iterator, List, Optional
+
+PLATFORMS = ('auto', 'xvfb', 'offscreen', 'display')
+DEFAULT_SCREEN = '1024x768x16'
+DEFAULT_SOCKET_DIR = '/tmp/.X11-unix'
+START_TIMEOUT = 10.0
+
+
+def _display_alive(display: Optional[str], socket_dir: str = None) -> bool:
+    """True when ``display`` (":N") has a listening local X socket"""
+    if not display or not display.startswith(':'):
+        # Remote displays (host:0) cannot be checked from here: trust them
+        return bool(display)
+    number = display[1:].split('.')[0]
+    socket_dir = socket_dir or os.getenv('ORPHEUS_X11_SOCKET_DIR', DEFAULT_SOCKET_DIR)
+    return os.path.exists(os.path.join(socket_dir, f"X{number}"))
+
+
+class XvfbServer:
+    """One Xvfb process and the display it serves"""
+
+    def __init__(self, xvfb_bin: str = 'Xvfb', screen: str = DEFAULT_SCREEN, socket_dir: str = None):
+        self.xvfb_bin = xvfb_bin
+        self.screen = screen
+        self.socket_dir = socket_dir
+        self.process = None
+        self.display = None
+        self.restarts = 0
+
+    def start(self, timeout: float = START_TIMEOUT):
+        read_fd, write_fd = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [self.xvfb_bin, '-displayfd', str(write_fd), '-screen', '0', self.screen, '-nolisten', 'tcp'],
+                pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+            os.close(write_fd)
+            write_fd = None
+            # Xvfb writes its display number once it accepts connections
+            number = b''
+            deadline = time.time() + timeout
+            while not number.endswith(b'\n'):
+                ready, _, _ = select.select([read_fd], [], [], max(0.0, deadline - time.time()))
+                chunk = os.read(read_fd, 16) if ready else b''
+                if not chunk:
+                    self.stop()
+                    raise RuntimeError(f"{self.xvfb_bin} did not report a display within {timeout:.0f}s")
+                number += chunk
+            self.display = f":{number.decode().strip()}"
+        finally:
+            os.close(read_fd)
+            if write_fd is not None:
+                os.close(write_fd)
+
+    def healthy(self) -> bool:
+        return self.process is not None and self.process.poll() is None and _display_alive(self.display, self.socket_dir)
+
+    def restart(self):
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+
+class DisplayPool:
+    """Hands out one display per render worker; see the module docstring"""
+
+    def __init__(self, size: int = None, platform: str = None, xvfb_bin: str = 'Xvfb', screen: str = None,
+                 socket_dir: str = None):
+        self.size = max(1, size or int(os.getenv('ORPHEUS_RENDER_DISPLAYS', 0)) or os.cpu_count() or 1)
+        self.socket_dir = socket_dir or os.getenv('ORPHEUS_X11_SOCKET_DIR', DEFAULT_SOCKET_DIR)
+        self.platform = self._resolve_platform(platform or os.getenv('ORPHEUS_RENDER_PLATFORM', 'auto'), xvfb_bin,
+                                               self.socket_dir)
+        self.xvfb_bin = xvfb_bin
+        self.screen = screen or os.getenv('ORPHEUS_XVFB_SCREEN', DEFAULT_SCREEN)
+        self._servers: List[XvfbServer] = []
+        # Serves code that cannot be given an environment; never leased
+        self._default_server: Optional[XvfbServer] = None
+        self._idle = Queue()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _resolve_platform(platform: str, xvfb_bin: str, socket_dir: str = None) -> str:
+        if platform not in PLATFORMS:
+            raise ValueError(f"unknown render platform {platform!r}, expected one of {', '.join(PLATFORMS)}")
+        if platform != 'auto':
+            return platform
+        if _display_alive(os.getenv('DISPLAY'), socket_dir):
+            return 'display'
+        if shutil.which(xvfb_bin):
+            return 'xvfb'
+        return 'offscreen'
+
+    def _environment(self, display: str = None) -> Dict[str, str]:
+        env = dict(os.environ)
+        if self.platform == 'offscreen':
+            env['QT_QPA_PLATFORM'] = 'offscreen'
+        elif display:
+            env['DISPLAY'] = display
+        return env
+
+    def _checkout(self) -> XvfbServer:
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            if len(self._servers) < self.size:
+                server = XvfbServer(self.xvfb_bin, self.screen, self.socket_dir)
+                self._servers.append(server)
+                try:
+                    server.start()
+                except Exception:
+                    self._servers.remove(server)
+                    raise
+                return server
+        # Every display is busy: wait for one
+        return self._idle.get()
+
+    @contextmanager
+    def lease(self) -> Iterator[Dict[str, str]]:
+        """Environment for one render worker; its display is exclusive until the block exits"""
+        if self.platform != 'xvfb':
+            yield self._environment()
+            return
+        server = self._checkout()
+        try:
+            if not server.healthy():
+                server.restart()
+            yield self._environment(server.display)
+        finally:
+            self._idle.put(server)
+
+    def default_display(self) -> Optional[str]:
+        """
+        Display for code that cannot be given an environment: a server of its
+        own, outside the leased ones (started, or restarted once dead, here)
+        """
+        if self.platform != 'xvfb':
+            return None
+        with self._lock:
+            if self._default_server is None:
+                server = XvfbServer(self.xvfb_bin, self.screen, self.socket_dir)
+                server.start()
+                self._default_server = server
+            elif not self._default_server.healthy():
+                self._default_server.restart()
+            return self._default_server.display
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'platform': self.platform,
+                'size': self.size,
+                'displays': [
+                    {'display': server.display, 'healthy': server.healthy(), 'restarts': server.restarts}
+                    for server in self._servers
+                ],
+                'default_display': self._default_server.display if self._default_server else None
+            }
+
+    def shutdown(self):
+        with self._lock:
+            servers, self._servers = self._servers, []
+            if self._default_server is not None:
+                servers.append(self._default_server)
+                self._default_server = None
+        for server in servers:
+            server.stop()
+        self._idle = Queue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_DISPLAY_VARIABLES = ('DISPLAY', 'QT_QPA_PLATFORM')
+
+
+def get_display_pool() -> DisplayPool:
+    """Process-wide pool, created on first use and shut down at exit"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DisplayPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+_inherited_lock = threading.Lock()
+_inherited_blocks = 0
+_inherited_saved: Dict[str, Optional[str]] = {}
+
+
+def _inheritable_display() -> Dict[str, str]:
+    """Variables that make MuseScore usable, or nothing when it already is"""
+    if _display_alive(os.getenv('DISPLAY')) or os.getenv('QT_QPA_PLATFORM') == 'offscreen':
+        return {}
+    pool = get_display_pool()
+    if pool.platform == 'offscreen':
+        return {'QT_QPA_PLATFORM': 'offscreen'}
+    if pool.platform == 'xvfb':
+        return {'DISPLAY': pool.default_display()}
+    return {}
+
+
+@contextmanager
+def inherited_display() -> Iterator[None]:
+    """
+    Make MuseScore usable for subprocesses that inherit this process's
+    environment, for as long as any such block runs: keep a live
+    ``DISPLAY``, else point it at the pool's default display or switch Qt
+    to the offscreen platform; the last block out restores the environment
+    """
+    global _inherited_blocks, _inherited_saved
+    with _inherited_lock:
+        if not _inherited_blocks:
+            variables = _inheritable_display()
+            _inherited_saved = {name: os.environ.get(name) for name in variables}
+            os.environ.update(variables)
+        _inherited_blocks += 1
+    try:
+        yield
+    finally:
+        with _inherited_lock:
+            _inherited_blocks -= 1
+            if not _inherited_blocks:
+                for name, value in _inherited_saved.items():
+                    if value is None:
+                        os.environ.pop(name, None)
+                    else:
+                        os.environ[name] = value
+                _inherited_saved = {}
+
+
+@contextmanager
+def worker_displays(count: int) -> Iterator[List[Dict[str, str]]]:
+    """
+    Lease displays for ``count`` worker processes (shared round-robin beyond
+    the pool size); yields the variables each worker should set, e.g. from
+    a ``ProcessPoolExecutor`` initializer
+    """
+    pool = get_display_pool()
+    with ExitStack() as stack:
+        leased = [stack.enter_context(pool.lease()) for _ in range(min(count, pool.size))]
+        variables = [{name: env[name] for name in _DISPLAY_VARIABLES if name in env} for env in leased]
+        yield [variables[index % len(variables)] for index in range(count)]
@@ -0,0 +1,282 @@
+"""
+🔥 Warm-endpoint lease shared across CLI invocations
+====================================================
+
+Booting the ChatMusician Inference Endpoint dominates pipeline latency, and
+``HFEndpointManager.keep_alive_until`` only lives as long as one process.
+This module records the endpoint state and keep-alive deadline in a small
+lockfile-protected lease, so that back-to-back ``oenhance`` runs reuse a
+running endpoint instead of paying resume + poll again.
+
+A single detached reaper process (``python -m orpheuspypractice.endpoint_session
+reap``) sleeps until the deadline and pauses the endpoint once the lease has
+expired and no live process is still holding it.  Whoever pauses first marks
+the lease ``pausing`` under the lock; ``acquire`` waits for such a pause to
+finish instead of joining an endpoint that is about to go down.
+
+Lease file (``~/.orpheus_endpoint_lease.json`` or ``$ORPHEUS_ENDPOINT_LEASE``)::
+
+    {
+      "my-namespace/my-endpoint": {
+        "status": "running",
+        "url": "https://....endpoints.huggingface.cloud",
+        "keep_alive_until": 1729260000.0,
+        "holders": [12345],
+        "reaper_pid": 12360,
+        "pausing_pid": null,
+        "updated_at": 1729259700.0
+      }
+    }
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: leases still work, without cross-process locking
+    fcntl = None
+
+
+def default_lease_file() -> str:
+    return os.getenv(
+        "ORPHEUS_ENDPOINT_LEASE",
+        os.path.join(os.getenv("HOME", "."), ".orpheus_endpoint_lease.json")
+    )
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class EndpointLease:
+    """Cross-process record of a warm endpoint and its keep-alive deadline"""
+
+    def __init__(self, name: str, namespace: str, lease_file: str = None):
+        self.name = name
+        self.namespace = namespace
+        self.key = f"{namespace}/{name}"
+        self.lease_file = lease_file or default_lease_file()
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock and yield the whole lease table for update"""
+        lock_file = open(self.lease_file + ".lock", 'a')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            table = self._read_table()
+            yield table
+            tmp_file = f"{self.lease_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(table, f, indent=2)
+            os.replace(tmp_file, self.lease_file)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def _read_table(self) -> Dict[str, Any]:
+        try:
+            with open(self.lease_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def read(self) -> Dict[str, Any]:
+        """Current lease entry for this endpoint (empty dict if none)"""
+        return self._read_table().get(self.key, {})
+
+    def is_valid(self) -> bool:
+        """True while the endpoint is recorded running and the deadline is ahead"""
+        entry = self.read()
+        return entry.get('status') == 'running' and entry.get('keep_alive_until', 0) > time.time()
+
+    def deadline(self) -> float:
+        return self.read().get('keep_alive_until', 0)
+
+    def acquire(self, url: str = None, keep_alive_until: float = 0, poll_interval: float = 0.5) -> bool:
+        """
+        Record the endpoint as running and register this process as a holder
+
+        Returns False when another process was pausing the endpoint: this
+        waits for that pause to finish, and the caller must resume it.
+        """
+        waited = False
+        while True:
+            with self._locked() as table:
+                entry = table.setdefault(self.key, {})
+                pausing = entry.get('status') == 'pausing' and _pid_alive(entry.get('pausing_pid'))
+                if not pausing:
+                    if entry.get('status') == 'pausing':
+                        # The pausing process died midway: the endpoint state is unknown
+                        waited = True
+                    entry['status'] = 'running'
+                    entry.pop('pausing_pid', None)
+                    if url:
+                        entry['url'] = url
+                    entry['keep_alive_until'] = max(entry.get('keep_alive_until', 0), keep_alive_until)
+                    holders = [pid for pid in entry.get('holders', []) if _pid_alive(pid) and pid != os.getpid()]
+                    entry['holders'] = holders + [os.getpid()]
+                    entry['updated_at'] = time.time()
+                    return not waited
+            waited = True
+            time.sleep(poll_interval)
+
+    def extend(self, keep_alive_until: float):
+        """Push the shared deadline out to at least ``keep_alive_until``"""
+        with self._locked() as table:
+            entry = table.setdefault(self.key, {})
+            entry['keep_alive_until'] = max(entry.get('keep_alive_until', 0), keep_alive_until)
+            entry['updated_at'] = time.time()
+
+    def release(self) -> bool:
+        """
+        Drop this process from the holders
+
+        Returns True when the endpoint may be paused now: the deadline has
+        passed and no other live process is holding the lease.  The lease is
+        then marked pausing; the caller pauses and calls ``mark_paused``.
+        """
+        with self._locked() as table:
+            entry = table.setdefault(self.key, {})
+            entry['holders'] = [pid for pid in entry.get('holders', [])
+                                if _pid_alive(pid) and pid != os.getpid()]
+            entry['updated_at'] = time.time()
+            return self._begin_pause(entry)
+
+    def claim_pause(self) -> bool:
+        """
+        Mark the lease pausing if it is running, expired and unheld
+
+        Returns False when a run acquired it since it was last read.
+        """
+        with self._locked() as table:
+            entry = table.get(self.key, {})
+            if entry.get('status') != 'running':
+                return False
+            entry['holders'] = [pid for pid in entry.get('holders', []) if _pid_alive(pid)]
+            return self._begin_pause(entry)
+
+    @staticmethod
+    def _begin_pause(entry: Dict[str, Any]) -> bool:
+        if entry.get('holders') or entry.get('keep_alive_until', 0) > time.time():
+            return False
+        if entry.get('status') == 'pausing' and _pid_alive(entry.get('pausing_pid')):
+            return False
+        entry['status'] = 'pausing'
+        entry['pausing_pid'] = os.getpid()
+        entry['updated_at'] = time.time()
+        return True
+
+    def mark_paused(self):
+        with self._locked() as table:
+            entry = table.setdefault(self.key, {})
+            entry['status'] = 'paused'
+            entry.pop('pausing_pid', None)
+            entry['holders'] = []
+            entry['keep_alive_until'] = 0
+            entry['updated_at'] = time.time()
+
+    def cancel_pause(self):
+        """The claimed pause did not happen: the endpoint is still running"""
+        with self._locked() as table:
+            entry = table.get(self.key, {})
+            if entry.get('status') == 'pausing' and entry.get('pausing_pid') == os.getpid():
+                entry['status'] = 'running'
+                entry.pop('pausing_pid')
+                entry['updated_at'] = time.time()
+
+    def ensure_reaper(self, token_env_var: str = 'HUGGINGFACE_API_KEY'):
+        """Spawn the detached reaper unless a live one already watches this endpoint"""
+        with self._locked() as table:
+            entry = table.setdefault(self.key, {})
+            if _pid_alive(entry.get('reaper_pid')):
+                return
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "orpheuspypractice.endpoint_session", "reap",
+                 "--name", self.name, "--namespace", self.namespace,
+                 "--token-env-var", token_env_var, "--lease-file", self.lease_file],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+            entry['reaper_pid'] = proc.pid
+
+
+def _pause_endpoint(lease: EndpointLease, token_env_var: str):
+    from huggingface_hub import HfApi
+    endpoint = HfApi().get_inference_endpoint(
+        name=lease.name, namespace=lease.namespace, token=os.getenv(token_env_var)
+    )
+    endpoint.pause()
+
+
+def reap(lease: EndpointLease, token_env_var: str = 'HUGGINGFACE_API_KEY', poll_interval: float = 30.0,
+         pause: Callable[[EndpointLease, str], None] = _pause_endpoint):
+    """Sleep until the lease expires, then pause the endpoint once unheld"""
+    try:
+        while True:
+            entry = lease.read()
+            if entry.get('status') != 'running':
+                return
+            remaining = entry.get('keep_alive_until', 0) - time.time()
+            live_holders = [pid for pid in entry.get('holders', []) if _pid_alive(pid)]
+            if remaining > 0 or live_holders or not lease.claim_pause():
+                time.sleep(min(max(remaining, 1.0), poll_interval))
+                continue
+
+            try:
+                pause(lease, token_env_var)
+            except Exception:
+                lease.cancel_pause()
+                raise
+            lease.mark_paused()
+            return
+    finally:
+        with lease._locked() as table:
+            entry = table.get(lease.key, {})
+            if entry.get('reaper_pid') == os.getpid():
+                entry.pop('reaper_pid')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Warm-endpoint lease maintenance')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    reap_parser = subparsers.add_parser('reap', help='Pause the endpoint when its lease expires')
+    reap_parser.add_argument('--name', required=True)
+    reap_parser.add_argument('--namespace', required=True)
+    reap_parser.add_argument('--token-env-var', default='HUGGINGFACE_API_KEY')
+    reap_parser.add_argument('--lease-file', default=None)
+
+    status_parser = subparsers.add_parser('status', help='Print the lease table')
+    status_parser.add_argument('--lease-file', default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == 'reap':
+        reap(EndpointLease(args.name, args.namespace, args.lease_file), args.token_env_var)
+    elif args.command == 'status':
+        lease_file = args.lease_file or default_lease_file()
+        try:
+            with open(lease_file, 'r') as f:
+                print(json.dumps(json.load(f), indent=2))
+        except (OSError, ValueError):
+            print(f"No lease recorded in {lease_file}")
+
+
+if __name__ == '__main__':
+    main()
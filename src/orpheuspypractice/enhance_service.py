@@ -0,0 +1,334 @@
+"""
+🛰️ Long-lived enhancement service (``oenhance serve``)
+=====================================================
+
+Every ``oenhance`` call is a fresh process that re-imports music21 and
+huggingface_hub, reloads ``orpheus-config.yml`` and rebuilds
+``OrpheusIntegrationBlock``.  This service keeps one warm
+``HFEndpointManager``, ``CostBudgetManager`` and ``RenderCache`` and runs
+enhancement jobs from a bounded queue on a fixed number of worker threads.
+
+HTTP API (JSON, localhost by default)::
+
+    POST /jobs                 submit {"abc_content", "output_dir", "creation_name"?,
+                               "enhance_hf"?, "custom_prompt"?} -> 202 {"id", "status"}
+                               503 when the queue is full
+    GET  /jobs/<id>            job status and, once done, its results
+    GET  /jobs/<id>/stream     newline-delimited JSON, one line per status change
+    GET  /health               queue depth, workers and job counts
+
+🧠 Mia: One warm process, many pages - Link2ABC submits instead of spawning
+🌸 Miette: The endpoint stays cozy while the jobs keep flowing!
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib import request as urllib_request
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8707
+# Finished jobs kept for polling before the oldest are forgotten
+MAX_FINISHED_JOBS = 1000
+FINAL_STATES = ('done', 'failed')
+
+
+class QueueFullError(Exception):
+    """Raised by ``submit`` when the bounded job queue is full"""
+
+
+class EnhancementService:
+    """Bounded job queue drained by worker threads sharing warm managers"""
+
+    def __init__(self, process_func: Callable[..., Dict[str, Any]] = None, workers: int = 2,
+                 queue_size: int = 16, inference_concurrency: int = 4, keep_alive: int = 600,
+                 use_render_cache: bool = True, use_response_cache: bool = True):
+        self.workers = max(1, workers)
+        self.keep_alive = keep_alive
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = OrderedDict()
+        self._changed = threading.Condition()
+        self._threads = []
+        self._integration_block = None
+        if process_func is None:
+            process_func = self._build_default_processor(inference_concurrency, use_render_cache,
+                                                         use_response_cache)
+        self._process_func = process_func
+
+    def _build_default_processor(self, inference_concurrency: int, use_render_cache: bool,
+                                 use_response_cache: bool):
+        """Load config and heavy modules once, up front, instead of per job"""
+        from .link2abc_integration import (
+            CostBudgetManager, OrpheusIntegrationBlock, process_with_orpheus_enhancement
+        )
+        from .render_cache import RenderCache
+        from .response_cache import ResponseCache
+
+        self._integration_block = OrpheusIntegrationBlock(
+            CostBudgetManager(), RenderCache(enabled=use_render_cache), inference_concurrency,
+            response_cache=ResponseCache(enabled=use_response_cache)
+        )
+        try:
+            import jgcmlib.jgabcli  # noqa: F401  (music21 & friends, warm for the first job)
+        except ImportError:
+            pass
+
+        def process(abc_content: str, output_dir: str, creation_name: str,
+                    enhance_hf: bool = True, custom_prompt: str = None) -> Dict[str, Any]:
+            return process_with_orpheus_enhancement(
+                abc_content, output_dir, creation_name,
+                enhance_hf=enhance_hf, keep_alive=self.keep_alive,
+                custom_prompt=custom_prompt, integration_block=self._integration_block
+            )
+        return process
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"oenhance-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Let queued jobs finish, stop the workers and pause the endpoint if due"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._integration_block is not None:
+            hf_manager = self._integration_block.hf_manager
+            if hf_manager.should_shutdown():
+                hf_manager.shutdown_endpoint()
+
+    def submit(self, abc_content: str, output_dir: str, creation_name: str = None,
+               enhance_hf: bool = True, custom_prompt: str = None) -> Dict[str, Any]:
+        """Queue a job; raises QueueFullError instead of blocking the caller"""
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'creation_name': creation_name or f"music_{job_id}",
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'results': None,
+            'error': None
+        }
+        kwargs = {
+            'abc_content': abc_content,
+            'output_dir': output_dir,
+            'creation_name': job['creation_name'],
+            'enhance_hf': enhance_hf,
+            'custom_prompt': custom_prompt
+        }
+        with self._changed:
+            try:
+                self._queue.put_nowait((job_id, kwargs))
+            except queue.Full:
+                raise QueueFullError(f"job queue is full ({self._queue.maxsize} pending)")
+            self._jobs[job_id] = job
+            return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id: str, last_status: str = None, timeout: float = None) -> Optional[Dict[str, Any]]:
+        """Block until the job leaves ``last_status`` (or ``timeout`` expires)"""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: job_id not in self._jobs or self._jobs[job_id]['status'] != last_status,
+                timeout
+            )
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def health(self) -> Dict[str, Any]:
+        with self._changed:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return {
+                'status': 'ok',
+                'workers': len(self._threads),
+                'queue_depth': self._queue.qsize(),
+                'queue_size': self._queue.maxsize,
+                'jobs': counts
+            }
+
+    def _update(self, job_id: str, **fields):
+        with self._changed:
+            self._jobs[job_id].update(fields)
+            if fields.get('status') in FINAL_STATES:
+                self._forget_old_jobs()
+            self._changed.notify_all()
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in FINAL_STATES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            job_id, kwargs = entry
+            self._update(job_id, status='running', started_at=time.time())
+            try:
+                results = self._process_func(**kwargs)
+                self._update(job_id, status='done', results=results, finished_at=time.time())
+            except Exception as e:
+                print(f"🌸 Miette: Job {job_id} failed: {str(e)}")
+                self._update(job_id, status='failed', error=str(e), finished_at=time.time())
+
+
+class EnhancementRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints over an ``EnhancementService`` (``self.server.service``)"""
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            return self._send_json(404, {'error': 'not found'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if not payload.get('abc_content', '').strip():
+                raise ValueError("'abc_content' is required")
+            job = self.server.service.submit(
+                abc_content=payload['abc_content'],
+                output_dir=payload.get('output_dir', './output'),
+                creation_name=payload.get('creation_name'),
+                enhance_hf=payload.get('enhance_hf', True),
+                custom_prompt=payload.get('custom_prompt')
+            )
+        except QueueFullError as e:
+            return self._send_json(503, {'error': str(e)})
+        except (ValueError, AttributeError) as e:
+            return self._send_json(400, {'error': str(e)})
+        self._send_json(202, job)
+
+    def do_GET(self):
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        service = self.server.service
+        if parts == ['health']:
+            return self._send_json(200, service.health())
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            job = service.get(parts[1])
+            if job is None:
+                return self._send_json(404, {'error': f"unknown job {parts[1]}"})
+            if len(parts) == 2:
+                return self._send_json(200, job)
+            if parts[2] == 'stream':
+                return self._stream(job)
+        self._send_json(404, {'error': 'not found'})
+
+    def _stream(self, job: Dict[str, Any]):
+        # No Content-Length: the body ends when the connection closes
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        while True:
+            self.wfile.write((json.dumps(job, default=str) + '\n').encode('utf-8'))
+            self.wfile.flush()
+            if job['status'] in FINAL_STATES:
+                return
+            job = self.server.service.wait(job['id'], job['status']) or job
+
+
+def create_server(service: EnhancementService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                  quiet: bool = False) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), EnhancementRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+# Client helpers for callers such as Link2ABC
+
+def submit_job(base_url: str, abc_content: str, output_dir: str, creation_name: str = None,
+               enhance_hf: bool = True, custom_prompt: str = None, timeout: float = 30) -> Dict[str, Any]:
+    """Submit a job to a running service; returns the queued job record"""
+    payload = json.dumps({
+        'abc_content': abc_content,
+        'output_dir': output_dir,
+        'creation_name': creation_name,
+        'enhance_hf': enhance_hf,
+        'custom_prompt': custom_prompt
+    }).encode('utf-8')
+    req = urllib_request.Request(
+        f"{base_url.rstrip('/')}/jobs", data=payload, headers={'Content-Type': 'application/json'}
+    )
+    with urllib_request.urlopen(req, timeout=timeout) as response:
+        return json.load(response)
+
+
+def wait_for_job(base_url: str, job_id: str, timeout: float = None) -> Dict[str, Any]:
+    """Follow a job's status stream until it is done or failed"""
+    url = f"{base_url.rstrip('/')}/jobs/{job_id}/stream"
+    job = None
+    with urllib_request.urlopen(url, timeout=timeout) as response:
+        for line in response:
+            if line.strip():
+                job = json.loads(line)
+    return job
+
+
+def serve_main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='oenhance serve',
+        description='🛰️ Run a long-lived enhancement service with a bounded job queue'
+    )
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Bind address (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--workers', type=int, default=2, help='Jobs processed concurrently (default: 2)')
+    parser.add_argument('--queue-size', type=int, default=16,
+                        help='Pending jobs accepted before submissions get 503 (default: 16)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Inference requests kept in flight per job (0: use cminferencer, default: 4)')
+    parser.add_argument('--keep-alive', type=int, default=600,
+                        help='Keep the endpoint warm N seconds after each job (default: 600)')
+    parser.add_argument('--no-render-cache', action='store_true',
+                        help='Always re-render instead of reusing cached MIDI/audio/score files')
+    parser.add_argument('--no-response-cache', action='store_true',
+                        help='Always query the endpoint instead of reusing cached responses')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Do not log every request')
+    args = parser.parse_args(argv)
+
+    service = EnhancementService(
+        workers=args.workers, queue_size=args.queue_size, inference_concurrency=args.concurrency,
+        keep_alive=args.keep_alive, use_render_cache=not args.no_render_cache,
+        use_response_cache=not args.no_response_cache
+    )
+    server = create_server(service, args.host, args.port, args.quiet)
+    service.start()
+    print(f"🧠 Mia: Enhancement service listening on http://{args.host}:{args.port} "
+          f"({args.workers} workers, queue {args.queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🌸 Miette: Finishing queued jobs before shutting down...")
+    finally:
+        server.server_close()
+        service.stop()
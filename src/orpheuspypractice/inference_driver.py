@@ -0,0 +1,275 @@
+"""
+⚡ Bounded thread-pool inference driver for the ChatMusician endpoint
+====================================================================
+
+``jghfmanager.cminferencer`` sends the prompts of a ``musical.yml`` strictly
+one after another, leaving a running Inference Endpoint idle between requests
+while its per-second cost keeps running.  This driver sends them from a pool
+of ``concurrency`` worker threads, each making blocking ``requests`` calls
+over one shared connection pool, so at most ``concurrency`` requests are in
+flight.  Requests have timeouts and retries, and the driver writes the same
+``{name}_{sname}_{prompt}.json`` outputs.
+
+Both paths report what they produced as a manifest, one entry per prompt in
+prompt order, so callers never have to scan directories for results::
+
+    [{'prompt_id': 'p1', 'path': './Song_v1_p1.json', 'response': {'generated_text': ...},
+      'error': None, 'elapsed': 4.2}, ...]
+
+With the driver, writing the JSON files is optional (``output_dir=None``):
+``iter_results`` yields each entry, payload included, as soon as its request
+completes, for in-memory pipelines (see ``pipeline``).
+
+🧠 Mia: Same contract as cminferencer, just without the idle gaps
+"""
+
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List
+
+# Same request cminferencer sends: the raw prompt with endpoint-default parameters.
+# Both can be overridden from orpheus-config.yml (prompt_template, parameters).
+DEFAULT_PROMPT_TEMPLATE = "{prompt}"
+DEFAULT_PARAMETERS = {}
+
+# Worth retrying: rate limiting and endpoint (re)loading
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# text-generation-inference route answering with server-sent token events
+STREAM_ROUTE = '/generate_stream'
+
+
+def output_path(musical: Dict[str, Any], prompt_id: str, output_dir: str = '.') -> str:
+    """Where cminferencer (and this driver) write the response to ``prompt_id``"""
+    return os.path.join(output_dir, f"{musical['name']}_{musical['sname']}_{prompt_id}.json")
+
+
+def _first_generation(response: Any) -> Any:
+    # cminferencer stores the first generation of the response list
+    return response[0] if isinstance(response, list) else response
+
+
+def clear_outputs(musical_config: Dict[str, Any], output_dir: str = '.'):
+    """
+    Remove earlier outputs of these prompts before cminferencer runs
+
+    cminferencer reports nothing, so a file it did not write this time would
+    otherwise be taken for this run's response.
+    """
+    musical = musical_config['musical']
+    for prompt_id in musical['prompts']:
+        path = output_path(musical, prompt_id, output_dir)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+def manifest_from_outputs(musical_config: Dict[str, Any], output_dir: str = '.',
+                          elapsed: float = None, load_responses: bool = False) -> List[Dict[str, Any]]:
+    """
+    Manifest of a cminferencer run, built from the file names it writes
+
+    Only valid after ``clear_outputs`` ran before cminferencer.  cminferencer
+    does not report per-prompt timing, so ``elapsed`` (the whole run) is
+    spread evenly over its prompts.  ``load_responses`` reads each
+    payload into the entry, e.g. before the output directory is deleted.
+    """
+    musical = musical_config['musical']
+    prompt_ids = list(musical['prompts'])
+    per_prompt = elapsed / len(prompt_ids) if elapsed is not None and prompt_ids else None
+    manifest = []
+    for prompt_id in prompt_ids:
+        path = output_path(musical, prompt_id, output_dir)
+        found = os.path.isfile(path)
+        response = None
+        if found and load_responses:
+            with open(path, 'r') as f:
+                response = _first_generation(json.load(f))
+        manifest.append({
+            'prompt_id': prompt_id,
+            'path': path if found else None,
+            'response': response,
+            'error': None if found else 'no output written',
+            'elapsed': per_prompt
+        })
+    return manifest
+
+
+class InferenceDriver:
+    """Runs many prompts against one endpoint from a bounded pool of worker threads"""
+
+    def __init__(self, endpoint_url: str, token: str = None, concurrency: int = 4,
+                 timeout: float = 300.0, retries: int = 2, parameters: Dict[str, Any] = None,
+                 prompt_template: str = DEFAULT_PROMPT_TEMPLATE, stream: bool = False):
+        self.endpoint_url = endpoint_url
+        self.token = token
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retries = retries
+        self.parameters = dict(DEFAULT_PARAMETERS, **(parameters or {}))
+        self.prompt_template = prompt_template
+        # Stream tokens and stop as soon as one complete ABC tune has arrived
+        self.stream = stream
+        self._session = None
+
+    def _get_session(self):
+        # One keep-alive connection pool sized to the number of in-flight requests
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency))
+            self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency))
+            self._session.headers['Content-Type'] = 'application/json'
+            if self.token:
+                self._session.headers['Authorization'] = f'Bearer {self.token}'
+        return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def query(self, prompt: str) -> Any:
+        """Blocking request with retries; returns the endpoint's JSON response"""
+        payload = {
+            'inputs': self.prompt_template.format(prompt=prompt),
+            'parameters': self.parameters
+        }
+        if self.stream:
+            return self._with_retries(self._post_stream, payload)
+        return self._with_retries(self._post, payload)
+
+    def _post(self, payload: Dict[str, Any]):
+        response = self._get_session().post(self.endpoint_url, json=payload, timeout=self.timeout)
+        if response.status_code in RETRY_STATUS_CODES:
+            return response
+        response.raise_for_status()
+        return response.json()
+
+    def _post_stream(self, payload: Dict[str, Any]):
+        """
+        Read server-sent token events until a complete ABC tune has arrived
+
+        Closing the connection early makes the server stop generating, so the
+        commentary the model adds after the tune is never produced.
+        """
+        from .abc_stream import AbcTuneDetector
+
+        url = self.endpoint_url.rstrip('/') + STREAM_ROUTE
+        response = self._get_session().post(url, json=payload, timeout=self.timeout, stream=True)
+        if response.status_code in RETRY_STATUS_CODES:
+            return response
+        response.raise_for_status()
+
+        detector = AbcTuneDetector()
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                event = json.loads(line[len('data:'):])
+                if event.get('error'):
+                    raise RuntimeError(f"Generation failed: {event['error']}")
+                token = event.get('token') or {}
+                if not token.get('special'):
+                    detector.feed(token.get('text', ''))
+                if detector.tune is not None:
+                    return {'generated_text': detector.generated_text, 'stopped_early': True}
+                if event.get('generated_text') is not None:
+                    return {'generated_text': event['generated_text'], 'stopped_early': False}
+        finally:
+            response.close()
+        # The stream ended without its final event: keep the tune if one was open
+        detector.flush()
+        return {'generated_text': detector.generated_text or detector.text, 'stopped_early': False}
+
+    def _with_retries(self, send, payload: Dict[str, Any]) -> Any:
+        """Call ``send``, which hands back the raw Response for retryable statuses"""
+        import requests
+
+        attempt = 0
+        while True:
+            try:
+                result = send(payload)
+                if not isinstance(result, requests.Response):
+                    return result
+                response = result
+                error = requests.HTTPError(f"{response.status_code} {response.reason}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt >= self.retries:
+                raise error
+            attempt += 1
+            time.sleep(random.uniform(0.5, 1.0) * 2 ** attempt)
+
+    def _query_prompt(self, prompt_id: str, prompt: str, output_file: str = None) -> Dict[str, Any]:
+        """One manifest entry; the response is only written out if ``output_file`` is set"""
+        start_time = time.time()
+        try:
+            response = _first_generation(self.query(prompt))
+        except Exception as e:
+            print(f"❌ Error in inference {prompt_id}: {str(e)}")
+            return {'prompt_id': prompt_id, 'path': None, 'response': None, 'error': str(e),
+                    'elapsed': time.time() - start_time}
+        if output_file:
+            with open(output_file, 'w') as f:
+                json.dump(response, f, indent=4)
+        print(f"✅ {prompt_id} -> {os.path.basename(output_file) if output_file else 'memory'} "
+              f"({time.time() - start_time:.1f}s)")
+        return {'prompt_id': prompt_id, 'path': output_file, 'response': response, 'error': None,
+                'elapsed': time.time() - start_time}
+
+    def _output_files(self, musical: Dict[str, Any], output_dir: str = None) -> Dict[str, str]:
+        return {
+            prompt_id: output_path(musical, prompt_id, output_dir) if output_dir else None
+            for prompt_id in musical['prompts']
+        }
+
+    def iter_results(self, musical_config: Dict[str, Any], output_dir: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield manifest entries in completion order, payload included
+
+        Nothing is written to disk unless ``output_dir`` is given.
+        """
+        musical = musical_config['musical']
+        output_files = self._output_files(musical, output_dir)
+        try:
+            # The pool size bounds the number of requests in flight
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                futures = [
+                    executor.submit(self._query_prompt, prompt_id, prompt, output_files[prompt_id])
+                    for prompt_id, prompt in musical['prompts'].items()
+                ]
+                for future in as_completed(futures):
+                    yield future.result()
+        finally:
+            self.close()
+
+    def run(self, musical_config: Dict[str, Any], output_dir: str = '.') -> List[Dict[str, Any]]:
+        """Run every prompt of a musical config; returns its manifest in prompt order"""
+        order = {prompt_id: index for index, prompt_id in enumerate(musical_config['musical']['prompts'])}
+        return sorted(self.iter_results(musical_config, output_dir), key=lambda entry: order[entry['prompt_id']])
+
+
+def run_musical_inference(musical_file: str = 'musical.yml', output_dir: str = '.',
+                          concurrency: int = 4, config_file: str = 'orpheus-config.yml') -> List[Dict[str, Any]]:
+    """
+    ``ohfi`` equivalent: boot the endpoint, run every prompt of ``musical_file``
+    with ``concurrency`` requests in flight, then pause unless kept alive
+    """
+    import yaml
+    from .link2abc_integration import HFEndpointManager
+
+    with open(musical_file, 'r') as f:
+        musical_config = yaml.safe_load(f)
+
+    hf_manager = HFEndpointManager(config_file)
+    try:
+        hf_manager.start_endpoint()
+        driver = hf_manager.create_inference_driver(concurrency)
+        return driver.run(musical_config, output_dir)
+    finally:
+        if hf_manager.should_shutdown():
+            hf_manager.shutdown_endpoint()
@@ -17,6 +17,9 @@ Usage Examples:
     
     # Batch processing with keep-alive
     oenhance --abc-file content.abc --keep-alive 300 --custom-prompt "Jazz-influenced harmonies"
+
+    # Long-lived service: submit jobs over HTTP instead of spawning a CLI per page
+    oenhance serve --workers 2 --queue-size 16
 """
 
 import argparse
@@ -30,8 +33,13 @@ from typing import Optional
 from .link2abc_integration import (
     process_with_orpheus_enhancement,
     CostBudgetManager,
-    OrpheusIntegrationBlock
+    OrpheusIntegrationBlock,
+    create_enhanced_format_converter
 )
+from .abc import parse_tune
+from .budget_ledger import DEFAULT_LEDGER_FILE, LEGACY_BUDGET_FILE
+from .render_cache import RenderCache
+from .response_cache import ResponseCache
 
 
 def create_cli_parser():
@@ -48,6 +56,7 @@ Examples:
   oenhance --abc-file melody.abc --output-dir ./music
   oenhance --abc-content "X:1\\nT:Test\\nM:4/4..." --name "test_song" 
   oenhance --abc-file melody.abc --hf-budget 1.00 --keep-alive 300
+  oenhance serve --port 8707 --workers 2   (see: oenhance serve --help)
         """,
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
@@ -116,6 +125,14 @@ Examples:
         help='Keep HuggingFace endpoint alive for N seconds (for batching)'
     )
     
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='Inference requests kept in flight against the endpoint '
+             '(default: 4; 0: use cminferencer, which pauses the endpoint when done)'
+    )
+    
     # Prompt customization
     parser.add_argument(
         '--hf-prompt',
@@ -123,6 +140,19 @@ Examples:
         help='Custom prompt for HuggingFace enhancement'
     )
     
+    # Rendering options
+    parser.add_argument(
+        '--no-render-cache',
+        action='store_true',
+        help='Always run abc2midi/MuseScore/ImageMagick instead of reusing cached renders'
+    )
+    
+    parser.add_argument(
+        '--no-response-cache',
+        action='store_true',
+        help='Always query the endpoint instead of reusing cached responses to identical prompts'
+    )
+    
     # Utility options
     parser.add_argument(
         '--budget-status',
@@ -176,39 +206,39 @@ def generate_creation_name(abc_file: str = None, abc_content: str = None) -> str
         return Path(abc_file).stem
     
     # Try to extract title from ABC content
-    if abc_content:
-        for line in abc_content.split('\n'):
-            if line.startswith('T:'):
-                title = line[2:].strip()
-                # Clean title for filename
-                return ''.join(c for c in title if c.isalnum() or c in '-_').lower()
+    tune = parse_tune(abc_content) if abc_content else None
+    if tune and tune.title:
+        # Clean title for filename
+        name = ''.join(c for c in tune.title if c.isalnum() or c in '-_').lower()
+        if name:
+            return name
     
     # Fallback to timestamp
     import time
     return f"music_{int(time.time())}"
 
 
-def show_budget_status():
-    """Display current budget status"""
-    budget_manager = CostBudgetManager()
-    
+def show_budget_status(budget_file: str = DEFAULT_LEDGER_FILE):
+    """Display current budget status (read-only: the budget file is never created)"""
     print("💰 Budget Status:")
+    if not os.path.exists(budget_file):
+        print(f"   No budget file found ({budget_file}): no daily budget set, nothing spent")
+        legacy_file = os.path.join(os.path.dirname(budget_file), LEGACY_BUDGET_FILE)
+        if os.path.exists(legacy_file):
+            print(f"   {legacy_file} will be imported on the next enhancement")
+        return
+    
+    budget_manager = CostBudgetManager(budget_file, read_only=True)
     print(f"   Daily Budget: ${budget_manager.daily_budget:.2f}")
     print(f"   Daily Spent:  ${budget_manager.current_daily_cost:.2f}")
     print(f"   Daily Remaining: ${budget_manager.daily_budget - budget_manager.current_daily_cost:.2f}")
-    
-    if os.path.exists(budget_manager.budget_file):
-        print(f"   Budget file: {budget_manager.budget_file}")
-    else:
-        print("   No budget file found")
+    print(f"   Budget file: {budget_file}")
 
 
 def reset_budget():
     """Reset budget counters"""
     budget_manager = CostBudgetManager()
-    budget_manager.current_daily_cost = 0.0
-    budget_manager.current_session_cost = 0.0
-    budget_manager.save_budget_state()
+    budget_manager.reset()
     print("✅ Budget counters reset")
 
 
@@ -238,6 +268,10 @@ def check_config():
 
 def main():
     """Main CLI entry point"""
+    if sys.argv[1:2] == ['serve']:
+        from .enhance_service import serve_main
+        return serve_main(sys.argv[2:])
+    
     parser = create_cli_parser()
     args = parser.parse_args()
     
@@ -254,6 +288,10 @@ def main():
         check_config()
         return
     
+    if args.daily_budget > 0:
+        # Stored in the shared ledger: applies to every later run too
+        CostBudgetManager().set_daily_budget(args.daily_budget)
+    
     # Load ABC content
     if args.abc_file:
         abc_content = load_abc_content(args.abc_file)
@@ -290,7 +328,10 @@ def main():
             enhance_hf=enhance_hf,
             hf_budget=args.hf_budget,
             keep_alive=args.keep_alive,
-            custom_prompt=args.hf_prompt
+            custom_prompt=args.hf_prompt,
+            use_render_cache=not args.no_render_cache,
+            inference_concurrency=args.concurrency,
+            use_response_cache=not args.no_response_cache
         )
         
         if args.json_output:
@@ -313,7 +354,7 @@ def main():
             # Show enhanced results
             if results.get('enhanced'):
                 enhanced = results['enhanced']
-                if not enhanced.get('error'):
+                if enhanced.get('abc_file') and not enhanced.get('error'):
                     print(f"⭐ Enhanced files:")
                     print(f"   ABC: {enhanced['abc_file']}")
                     print(f"   MIDI: {enhanced['midi_file']}")
@@ -322,7 +363,9 @@ def main():
                     print(f"   Processing time: {enhanced.get('processing_time', 0):.1f}s")
                     print(f"   Cost: ${enhanced.get('cost', 0):.3f}")
                 else:
-                    print(f"❌ Enhancement error: {enhanced.get('reason', 'unknown')}")
+                    print(f"❌ Enhancement error: {enhanced.get('error') or enhanced.get('reason', 'unknown')}")
+                    for issue in (enhanced.get('validation') or {}).get('errors', []):
+                        print(f"   {issue['code']}: {issue['message']}")
             
             if 'report_file' in results:
                 print(f"📊 Report: {results['report_file']}")
@@ -369,6 +412,25 @@ def main_batch_enhance():
         help='Keep endpoint alive between files (default: 10min)'
     )
     
+    parser.add_argument(
+        '--no-render-cache',
+        action='store_true',
+        help='Always re-render instead of reusing cached MIDI/audio/score files'
+    )
+    
+    parser.add_argument(
+        '--no-response-cache',
+        action='store_true',
+        help='Always query the endpoint instead of reusing cached responses to identical prompts'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=4,
+        help='Inference requests kept in flight against the endpoint (0: use cminferencer, default: 4)'
+    )
+    
     args = parser.parse_args()
     
     print(f"🎵 Batch processing {len(args.abc_files)} files...")
@@ -378,37 +440,26 @@ def main_batch_enhance():
     budget_manager = CostBudgetManager()
     budget_manager.set_session_budget(args.hf_budget)
     
-    integration_block = OrpheusIntegrationBlock(budget_manager)
+    render_cache = RenderCache(enabled=not args.no_render_cache)
+    integration_block = OrpheusIntegrationBlock(
+        budget_manager, render_cache, args.concurrency,
+        response_cache=ResponseCache(enabled=not args.no_response_cache)
+    )
     integration_block.hf_manager.set_keep_alive(args.keep_alive)
     
     results = []
+    items = []
     
-    for i, abc_file in enumerate(args.abc_files, 1):
-        print(f"\n📄 Processing {i}/{len(args.abc_files)}: {abc_file}")
-        
+    for abc_file in args.abc_files:
         try:
             abc_content = load_abc_content(abc_file)
             creation_name = Path(abc_file).stem
-            output_dir = os.path.join(args.output_base, creation_name)
-            
-            result = integration_block.process_link2abc_output(
-                abc_content=abc_content,
-                output_dir=output_dir,
-                creation_name=creation_name,
-                enhance_hf=True
-            )
-            
-            results.append({
+            items.append({
                 'file': abc_file,
-                'result': result
+                'abc_content': abc_content,
+                'output_dir': os.path.join(args.output_base, creation_name),
+                'creation_name': creation_name
             })
-            
-            if result.get('enhanced') and not result['enhanced'].get('error'):
-                enhanced = result['enhanced']
-                print(f"✅ Enhanced in {enhanced.get('processing_time', 0):.1f}s, cost: ${enhanced.get('cost', 0):.3f}")
-            else:
-                print("❌ Enhancement failed")
-        
         except Exception as e:
             print(f"❌ Error processing {abc_file}: {str(e)}")
             results.append({
@@ -416,6 +467,29 @@ def main_batch_enhance():
                 'error': str(e)
             })
     
+    # All pieces share one musical.yml and one inference run
+    batch_results = integration_block.process_link2abc_batch(items) if items else []
+    converter = create_enhanced_format_converter()
+    
+    for i, (item, result) in enumerate(zip(items, batch_results), 1):
+        print(f"\n📄 {i}/{len(items)}: {item['file']}")
+        result['report_file'] = converter.generate_comparison_report(result, item['output_dir'])
+        results.append({
+            'file': item['file'],
+            'result': result
+        })
+        
+        enhanced = result.get('enhanced') or {}
+        if enhanced.get('abc_file'):
+            print(f"✅ Enhanced in {enhanced.get('processing_time', 0):.1f}s, cost: ${enhanced.get('cost', 0):.3f}")
+            changes = (result.get('analysis') or {}).get('changes')
+            if changes:
+                print(f"📈 Notes {changes.get('note_count', 0):+}, pitch range {changes.get('pitch_range', 0):+}, "
+                      f"harmonic changes/bar {changes.get('harmonic_changes_per_bar', 0):+}, "
+                      f"pitch-class distance {changes.get('pitch_class_distance', 0):.2f}")
+        else:
+            print(f"❌ Enhancement failed: {enhanced.get('error') or enhanced.get('reason', 'unknown')}")
+    
     # Summary
     print(f"\n📊 Batch processing complete!")
     successful = len([r for r in results if 'error' not in r])
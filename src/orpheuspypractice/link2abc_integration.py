@@ -9,94 +9,122 @@ enabling professional AI music enhancement through HuggingFace ChatMusician.
 🌸 Miette: This is where the magic happens - web content becomes professional music!
 """
 
-import json
 import os
+import random
+import re
 import time
 import yaml
 import tempfile
 import subprocess
-from typing import Dict, List, Optional, Tuple, Any
-from pathlib import Path
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
 
-# Import from existing orpheuspypractice modules  
-from jgcmlib.jgcmhelper import (
-    postprocess_abc, 
-    extract_abc_from_text,
-    generate_markdown_output,
-    save_as_json_to_filename
-)
-from jghfmanager.cminferencer import main as hf_inference_main
-from jghfmanager.jgthfdata import JgHfConfig, JgHfMusicalPieces
+from .abc import normalize as normalize_tunes, parse as parse_abc
+from .abc_validation import select_best_tune
+from .batch_render import RenderBatcher
+from .budget_ledger import DEFAULT_LEDGER_FILE, BudgetLedger
+from .endpoint_session import EndpointLease
+from .render_cache import RenderCache
+from .response_cache import ResponseCache
+
+# jgcmlib and jghfmanager pull in music21 and huggingface_hub; they are
+# imported where they are used so `oenhance --budget-status` stays cheap.
 
 
 class CostBudgetManager:
-    """Manages HuggingFace cost budgets and usage tracking"""
+    """
+    Manages HuggingFace cost budgets and usage tracking
+    
+    Costs live in a SQLite ledger (see budget_ledger) shared by every process
+    using the same budget file, so parallel runs see each other's spending.
+    """
     
-    def __init__(self, budget_file: str = ".orpheus_budget.json"):
+    def __init__(self, budget_file: str = DEFAULT_LEDGER_FILE, read_only: bool = False):
         self.budget_file = budget_file
+        self.ledger = BudgetLedger(budget_file, read_only=read_only)
         self.session_budget = 0.0
-        self.daily_budget = 0.0
-        self.current_session_cost = 0.0
-        self.current_daily_cost = 0.0
-        self.load_budget_state()
-    
-    def load_budget_state(self):
-        """Load existing budget state from file"""
-        if os.path.exists(self.budget_file):
-            with open(self.budget_file, 'r') as f:
-                data = json.load(f)
-                self.daily_budget = data.get('daily_budget', 0.0)
-                self.current_daily_cost = data.get('daily_cost', 0.0)
-                last_date = data.get('last_date', '')
-                
-                # Reset daily cost if it's a new day
-                today = time.strftime('%Y-%m-%d')
-                if last_date != today:
-                    self.current_daily_cost = 0.0
+    
+    @property
+    def daily_budget(self) -> float:
+        return self.ledger.get_setting('daily_budget')
+    
+    @property
+    def current_daily_cost(self) -> float:
+        return self.ledger.totals()[0]
+    
+    @property
+    def current_session_cost(self) -> float:
+        return self.ledger.totals()[1]
     
     def set_session_budget(self, budget: float):
         """Set budget for current session"""
         self.session_budget = budget
         
     def set_daily_budget(self, budget: float):
-        """Set daily spending limit"""
-        self.daily_budget = budget
+        """Set daily spending limit (persisted for every process)"""
+        self.ledger.set_setting('daily_budget', budget)
     
     def can_spend(self, estimated_cost: float) -> bool:
-        """Check if we can afford the estimated cost"""
-        if self.session_budget > 0 and (self.current_session_cost + estimated_cost) > self.session_budget:
+        """Check if we can afford the estimated cost (reservations included)"""
+        daily, session = self.ledger.totals(include_reserved=True)
+        if self.session_budget > 0 and (session + estimated_cost) > self.session_budget:
             return False
-        if self.daily_budget > 0 and (self.current_daily_cost + estimated_cost) > self.daily_budget:
+        if self.daily_budget > 0 and (daily + estimated_cost) > self.daily_budget:
             return False
         return True
     
+    def reserve(self, estimated_cost: float) -> Optional[int]:
+        """Atomically hold estimated_cost; None when it would exceed a budget"""
+        return self.ledger.reserve(estimated_cost, self.daily_budget, self.session_budget)
+    
+    def commit(self, reservation_id: int, actual_cost: float):
+        """Charge actual_cost against a reservation"""
+        self.ledger.commit(reservation_id, actual_cost)
+    
+    def release(self, reservation_id: int):
+        """Give back a reservation that was not spent"""
+        self.ledger.release(reservation_id)
+    
     def record_cost(self, actual_cost: float):
         """Record actual cost incurred"""
-        self.current_session_cost += actual_cost
-        self.current_daily_cost += actual_cost
-        self.save_budget_state()
-    
-    def save_budget_state(self):
-        """Save current budget state to file"""
-        data = {
-            'daily_budget': self.daily_budget,
-            'daily_cost': self.current_daily_cost,
-            'last_date': time.strftime('%Y-%m-%d')
-        }
-        with open(self.budget_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        self.ledger.charge(actual_cost)
+    
+    def reset(self):
+        """Forget today's spending"""
+        self.ledger.reset_day()
 
 
 class HFEndpointManager:
     """Manages HuggingFace endpoint lifecycle with cost optimization"""
     
+    # Endpoint states that will never reach 'running' on their own
+    FAILURE_STATES = ('failed', 'updateFailed')
+    
     def __init__(self, config_file: str = "orpheus-config.yml"):
         self.config_file = config_file
         self.config = None
+        self.config_path = None
         self.endpoint = None
         self.keep_alive_until = 0
         self.boot_time = 0
+        self.session_metrics = {'boot_time': 0, 'status_polls': 0, 'status_transitions': []}
+        # Serializes start_endpoint when one manager is shared by worker threads
+        self._start_lock = threading.Lock()
+        # Enhancements of this process using the endpoint: the lease only
+        # knows processes, so worker threads sharing one pid count here
+        self._users = 0
+        self._users_lock = threading.RLock()
         self.load_config()
+        # Readiness polling: overall deadline and backoff bounds (seconds)
+        self.ready_timeout = float(self.config.huggingface.get('ready_timeout', 900))
+        self.poll_initial_delay = float(self.config.huggingface.get('poll_initial_delay', 2))
+        self.poll_max_delay = float(self.config.huggingface.get('poll_max_delay', 30))
+        self.lease = EndpointLease(
+            self.config.huggingface['name'],
+            self.config.huggingface['namespace']
+        )
     
     def load_config(self):
         """Load HuggingFace configuration"""
@@ -106,13 +134,19 @@ class HFEndpointManager:
             config_file = self.config_file
             
         if os.path.exists(config_file):
+            from jghfmanager.jgthfdata import JgHfConfig
             self.config = JgHfConfig(config_file)
+            # Absolute, so subprocesses running in another directory find it too
+            self.config_path = os.path.abspath(config_file)
         else:
             raise FileNotFoundError(f"HuggingFace config not found: {self.config_file}")
     
     def start_endpoint(self):
         """Start HuggingFace endpoint and measure boot time"""
-        print("🧠 Mia: Booting HuggingFace ChatMusician endpoint...")
+        with self._start_lock:
+            return self._start_endpoint()
+    
+    def _start_endpoint(self):
         start_time = time.time()
         
         # Use existing cminferencer logic but capture endpoint reference
@@ -126,44 +160,198 @@ class HFEndpointManager:
         namespace = self.config.huggingface['namespace']
         
         self.endpoint = api.get_inference_endpoint(name=name, namespace=namespace, token=token)
-        self.endpoint.resume()
         
-        # Wait for endpoint to be running
-        while self.endpoint.status != 'running':
-            self.endpoint = api.get_inference_endpoint(name=name, namespace=namespace, token=token)
-            print(".", end="", flush=True)
-            time.sleep(3)
+        # A valid lease from an earlier run means the endpoint is warm: skip resume/poll
+        # (unless its reaper was pausing it meanwhile: acquire waits for that)
+        if (self.lease.is_valid() and self.endpoint.status == 'running'
+                and self.lease.acquire(self.endpoint.url, self.keep_alive_until)):
+            self.lease.ensure_reaper(token_env)
+            self._record_status(self.endpoint.status, start_time)
+            self.boot_time = 0
+            print(f"🌸 Miette: Reusing warm endpoint (lease valid until {time.strftime('%H:%M:%S', time.localtime(self.lease.deadline()))})")
+            return self.endpoint
+        
+        print("🧠 Mia: Booting HuggingFace ChatMusician endpoint...")
+        self.endpoint.resume()
+        self.wait_until_ready(api, name, namespace, token, start_time)
+        while not self.lease.acquire(self.endpoint.url, self.keep_alive_until):
+            # Another run paused it while it booted; now held, it stays up
+            self.endpoint.resume()
+            self.wait_until_ready(api, name, namespace, token, start_time)
         
         self.boot_time = time.time() - start_time
+        self.session_metrics['boot_time'] = self.boot_time
         print(f"\n🌸 Miette: Endpoint is alive! Boot time: {self.boot_time:.1f}s")
+        
+        if self.keep_alive_until > time.time():
+            # Pauses the endpoint after the deadline even if this process is gone
+            self.lease.ensure_reaper(token_env)
         return self.endpoint
     
+    def _record_status(self, status: str, start_time: float):
+        transitions = self.session_metrics['status_transitions']
+        if not transitions or transitions[-1]['status'] != status:
+            transitions.append({
+                'status': status,
+                'elapsed': round(time.time() - start_time, 3),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+            })
+            if len(transitions) > 1:
+                print(f"\n🧠 Mia: Endpoint {transitions[-2]['status']} → {status}", end="", flush=True)
+    
+    def wait_until_ready(self, api, name: str, namespace: str, token: str, start_time: float = None):
+        """
+        Poll until the endpoint is running, with exponential backoff and jitter
+        
+        Raises RuntimeError on a terminal failure state and TimeoutError once
+        ``ready_timeout`` has elapsed.  Every status transition is recorded in
+        ``session_metrics['status_transitions']``.
+        """
+        start_time = start_time or time.time()
+        deadline = start_time + self.ready_timeout
+        delay = self.poll_initial_delay
+        woken = False
+        
+        while True:
+            status = self.endpoint.status
+            self._record_status(status, start_time)
+            
+            if status == 'running':
+                return self.endpoint
+            if status in self.FAILURE_STATES:
+                raise RuntimeError(f"Endpoint {namespace}/{name} entered terminal state '{status}'")
+            if status == 'paused':
+                # resume() raced with a pause (e.g. another run's reaper)
+                self.endpoint.resume()
+            elif status == 'scaledToZero' and not woken:
+                # Scaled-to-zero endpoints only scale back up on an incoming request
+                self._wake_scaled_to_zero(token)
+                woken = True
+            
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"Endpoint {namespace}/{name} not running after {self.ready_timeout:.0f}s (last status: '{status}')"
+                )
+            print(".", end="", flush=True)
+            time.sleep(min(random.uniform(delay / 2, delay), remaining))
+            delay = min(delay * 2, self.poll_max_delay)
+            
+            self.endpoint = api.get_inference_endpoint(name=name, namespace=namespace, token=token)
+            self.session_metrics['status_polls'] += 1
+    
+    def _wake_scaled_to_zero(self, token: str):
+        import requests
+        try:
+            requests.get(self.endpoint.url, headers={'Authorization': f'Bearer {token}'}, timeout=5)
+        except requests.RequestException:
+            pass
+    
+    def create_inference_driver(self, concurrency: int = 4):
+        """Bounded thread-pool driver for the running endpoint (see inference_driver)"""
+        from .inference_driver import InferenceDriver
+        
+        hf_config = self.config.huggingface
+        token = os.getenv(hf_config.get('token_env_var', 'HUGGINGFACE_API_KEY'))
+        settings = self.request_settings(use_driver=True)
+        return InferenceDriver(
+            self.endpoint.url, token, concurrency=concurrency,
+            timeout=float(hf_config.get('request_timeout', 300)),
+            retries=int(hf_config.get('request_retries', 2)),
+            parameters=settings['parameters'],
+            prompt_template=settings['prompt_template'],
+            stream=bool(hf_config.get('stream', False))
+        )
+    
+    def request_settings(self, use_driver: bool = True) -> Dict[str, Any]:
+        """
+        Model repository, generation parameters and prompt template of a request
+        
+        cminferencer always sends the bare prompt with endpoint defaults; only
+        the inference driver applies the optional config keys.
+        """
+        from .inference_driver import DEFAULT_PARAMETERS, DEFAULT_PROMPT_TEMPLATE
+        
+        hf_config = self.config.huggingface
+        settings = {
+            'repository': hf_config.get('repository'),
+            'parameters': dict(DEFAULT_PARAMETERS),
+            'prompt_template': DEFAULT_PROMPT_TEMPLATE
+        }
+        if use_driver:
+            settings['parameters'].update(hf_config.get('parameters') or {})
+            settings['prompt_template'] = hf_config.get('prompt_template', DEFAULT_PROMPT_TEMPLATE)
+        return settings
+    
     def set_keep_alive(self, seconds: int):
         """Set how long to keep endpoint alive for batching"""
         self.keep_alive_until = time.time() + seconds
+        self.lease.extend(self.keep_alive_until)
         print(f"🧠 Mia: Keeping endpoint alive for {seconds}s for batch processing")
     
     def should_shutdown(self) -> bool:
-        """Check if endpoint should be shut down"""
-        return time.time() > self.keep_alive_until
+        """Check if endpoint should be shut down (the shared lease counts too)"""
+        return time.time() > max(self.keep_alive_until, self.lease.deadline())
+    
+    def mark_paused_elsewhere(self):
+        """Record a pause made outside this manager (cminferencer pauses whenever it finishes)"""
+        if self.keep_alive_until > time.time():
+            print("🧠 Mia: cminferencer paused the endpoint, keep-alive only applies with --concurrency N")
+        self.keep_alive_until = 0
+        self.lease.mark_paused()
+        self.endpoint = None
+    
+    def begin_use(self):
+        """Count an enhancement about to use the endpoint"""
+        with self._users_lock:
+            self._users += 1
+    
+    def end_use(self):
+        """Uncount an enhancement; the last one out pauses the endpoint when due"""
+        with self._users_lock:
+            self._users -= 1
+            if not self._users and self.should_shutdown():
+                self.shutdown_endpoint()
     
     def shutdown_endpoint(self):
-        """Shutdown HuggingFace endpoint"""
+        """Shutdown HuggingFace endpoint unless another enhancement or process still uses it"""
+        with self._users_lock:
+            if self._users:
+                print(f"🧠 Mia: Endpoint still used by {self._users} enhancement(s) here, leaving it up")
+                return
+            self._shutdown_endpoint()
+    
+    def _shutdown_endpoint(self):
         if self.endpoint:
+            if not self.lease.release():
+                print("🧠 Mia: Endpoint still leased by another run, leaving it up")
+                self.endpoint = None
+                return
             print("🌸 Miette: Shutting down endpoint to save costs...")
-            self.endpoint.pause()
+            try:
+                self.endpoint.pause()
+            except Exception:
+                self.lease.cancel_pause()
+                raise
+            self.lease.mark_paused()
             self.endpoint = None
 
 
 class MusicalPromptManager:
     """Manages dynamic musical.yml generation for ChatMusician prompts"""
     
+    # cminferencer reads musical.yml from its working directory and writes
+    # {name}_{sname}_{prompt}.json next to it
+    MUSICAL_YML = 'musical.yml'
+    SNAME = 'enhanced'
+    
     @staticmethod
     def create_enhancement_prompt(abc_content: str, custom_prompt: str = None) -> str:
         """Create enhancement prompt for existing ABC notation"""
+        # Same tunes, same prompt: whitespace or prose around them does not matter
         base_prompt = f"""Please enhance this ABC music notation with professional arranging and creative harmonization:
 
-{abc_content}
+{normalize_tunes(abc_content)}
 
 Enhancement instructions:
 - Keep the original melodic structure but add sophisticated harmonies
@@ -178,24 +366,32 @@ Enhancement instructions:
         return base_prompt
     
     def generate_musical_yml(self, abc_content: str, creation_name: str, 
-                           custom_prompts: List[str] = None) -> str:
-        """Generate musical.yml file for HuggingFace inference"""
+                           custom_prompts: List[str] = None, work_dir: str = '.') -> str:
+        """Generate work_dir/musical.yml file for HuggingFace inference"""
         
         if not custom_prompts:
             custom_prompts = [self.create_enhancement_prompt(abc_content)]
         
-        musical_config = {
+        prompts = {f'enhancement_{i}': prompt for i, prompt in enumerate(custom_prompts, 1)}
+        return self.generate_batch_musical_yml(prompts, creation_name, work_dir)
+    
+    def build_musical_config(self, prompts: Dict[str, str], batch_name: str) -> Dict[str, Any]:
+        """musical.yml content holding every prompt of a batch, keyed by prompt id"""
+        return {
             'musical': {
-                'name': creation_name,
-                'sname': 'enhanced',
-                'prompts': {}
+                'name': batch_name,
+                'sname': self.SNAME,
+                'prompts': dict(prompts)
             }
         }
-        
-        for i, prompt in enumerate(custom_prompts, 1):
-            musical_config['musical']['prompts'][f'enhancement_{i}'] = prompt
-        
-        yaml_filename = f"{creation_name}_musical_enhanced.yml"
+    
+    def generate_batch_musical_yml(self, prompts: Dict[str, str], batch_name: str,
+                                   work_dir: str = '.') -> str:
+        """Generate one musical.yml holding every prompt of a batch, keyed by prompt id"""
+        return self.write_musical_yml(self.build_musical_config(prompts, batch_name), work_dir)
+    
+    def write_musical_yml(self, musical_config: Dict[str, Any], work_dir: str = '.') -> str:
+        yaml_filename = os.path.join(work_dir, self.MUSICAL_YML)
         with open(yaml_filename, 'w') as f:
             yaml.dump(musical_config, f, default_flow_style=False)
         
@@ -208,13 +404,24 @@ class OrpheusIntegrationBlock:
     
     This block processes ABC notation through HuggingFace enhancement and creates
     both original and enhanced outputs with comprehensive format conversion.
+    
+    It never changes the process working directory: every step takes explicit
+    paths, so several enhancements can run in threads of one process.
     """
     
-    def __init__(self, budget_manager: CostBudgetManager = None):
+    def __init__(self, budget_manager: CostBudgetManager = None, render_cache: RenderCache = None,
+                 inference_concurrency: int = 4, hf_manager: HFEndpointManager = None,
+                 inference_output_dir: str = None, response_cache: ResponseCache = None):
         self.budget_manager = budget_manager or CostBudgetManager()
-        self.hf_manager = HFEndpointManager()
+        self.render_cache = render_cache or RenderCache()
+        self.response_cache = response_cache or ResponseCache()
+        # N: in-process driver with N in flight, keeping the endpoint up for
+        # the lease; 0: jghfmanager's cminferencer, which pauses it when done
+        self.inference_concurrency = inference_concurrency
+        # Keep the raw inference JSON files here; None: responses stay in memory
+        self.inference_output_dir = inference_output_dir
+        self.hf_manager = hf_manager or HFEndpointManager()
         self.prompt_manager = MusicalPromptManager()
-        self.original_cwd = os.getcwd()
         
     def enhance_abc_content(self, abc_content: str, creation_name: str,
                           custom_prompt: str = None, estimated_cost: float = 0.10) -> Dict[str, Any]:
@@ -230,80 +437,330 @@ class OrpheusIntegrationBlock:
         Returns:
             Dictionary with enhancement results
         """
+        item = {'abc_content': abc_content, 'creation_name': creation_name, 'custom_prompt': custom_prompt}
+        return self.enhance_abc_batch([item], estimated_cost)[0]
+    
+    def enhance_abc_batch(self, items: List[Dict[str, Any]],
+                          estimated_cost: float = 0.10,
+                          on_result: Callable[[int, Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """
+        Enhance several ABC pieces with a single inference run
         
-        # Budget check
-        if not self.budget_manager.can_spend(estimated_cost):
-            print("🌸 Miette: Budget exceeded! Falling back to original generation...")
-            return {'enhanced': False, 'reason': 'budget_exceeded'}
+        Every piece's enhancement prompt goes into one musical.yml, so the
+        endpoint is started and the inference launched once for the batch.
+        Pieces whose prompt was answered before come from the response cache
+        at no cost; when all of them do, the endpoint is not started at all.
         
+        Args:
+            items: Dicts with 'abc_content', 'creation_name' and optional 'custom_prompt'
+            estimated_cost: Estimated cost per piece
+            on_result: Called with (item index, result) as soon as each piece's
+                result is known, e.g. to start rendering it before the rest of
+                the batch has been inferred
+            
+        Returns:
+            One enhancement result dictionary per item, in item order
+        """
         try:
-            # Create temporary working directory
-            with tempfile.TemporaryDirectory() as temp_dir:
-                os.chdir(temp_dir)
-                
-                # Generate musical.yml for HuggingFace
-                prompts = [self.prompt_manager.create_enhancement_prompt(abc_content, custom_prompt)]
-                musical_yml = self.prompt_manager.generate_musical_yml(
-                    abc_content, creation_name, prompts
+            from jgcmlib.jgcmhelper import extract_abc_from_text
+        except ImportError as e:
+            return [{'enhanced': False, 'reason': f'error: {str(e)}'} for _ in items]
+        
+        results = [None] * len(items)
+        
+        def finish(index: int, result: Dict[str, Any]):
+            results[index] = result
+            if on_result:
+                on_result(index, result)
+        
+        # Serve repeated prompts from the response cache
+        settings = self.hf_manager.request_settings(use_driver=self.inference_concurrency > 0)
+        prompts = {}
+        cache_keys = {}
+        for index, item in enumerate(items):
+            prompts[index] = self.prompt_manager.create_enhancement_prompt(
+                item['abc_content'], item.get('custom_prompt')
+            )
+            cache_keys[index] = self.response_cache.cache_key(
+                settings['repository'],
+                settings['prompt_template'].format(prompt=prompts[index]),
+                settings['parameters']
+            )
+            response = self.response_cache.get(cache_keys[index])
+            if response is not None:
+                result = self._build_enhancement_result(
+                    response, item['abc_content'], extract_abc_from_text, 0.0, 0.0
                 )
-                
-                # Start HuggingFace endpoint
-                endpoint = self.hf_manager.start_endpoint()
-                
-                # Run HuggingFace inference (reuse existing cminferencer logic)
-                start_time = time.time()
-                hf_inference_main()  # This uses the musical.yml we created
-                processing_time = time.time() - start_time
-                
-                # Find generated JSON files
-                json_files = [f for f in os.listdir('.') if f.endswith('.json') and creation_name in f]
-                
-                if not json_files:
-                    return {'enhanced': False, 'reason': 'no_output_generated'}
-                
-                # Process the first JSON result
-                enhanced_json = json_files[0]
-                enhanced_results = []
-                
-                with open(enhanced_json, 'r') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        generated_text = data[0].get('generated_text', '')
-                    else:
-                        generated_text = data.get('generated_text', '')
-                
-                # Extract enhanced ABC notation
-                enhanced_abc_list = extract_abc_from_text(generated_text)
-                
-                if not enhanced_abc_list:
-                    return {'enhanced': False, 'reason': 'no_abc_extracted'}
-                
-                enhanced_abc = enhanced_abc_list[0]
-                
-                # Copy results back to original directory
-                os.chdir(self.original_cwd)
-                
-                # Record actual cost (simplified estimation)
-                actual_cost = min(estimated_cost, estimated_cost * (processing_time / 30.0))
-                self.budget_manager.record_cost(actual_cost)
-                
-                return {
-                    'enhanced': True,
-                    'enhanced_abc': enhanced_abc,
-                    'original_abc': abc_content,
-                    'processing_time': processing_time,
-                    'cost': actual_cost
-                }
+                result['cached'] = True
+                finish(index, result)
+        cached_count = len([r for r in results if r])
+        if cached_count:
+            print(f"🌸 Miette: {cached_count} piece(s) served from the response cache, no endpoint time needed!")
+        
+        # Budget check: reserve each piece's estimated cost in the shared
+        # ledger, so concurrent runs cannot admit more than the budget allows
+        admitted = []
+        reservations = {}
+        for index, item in enumerate(items):
+            if results[index] is not None:
+                continue
+            reservation_id = self.budget_manager.reserve(estimated_cost)
+            if reservation_id is not None:
+                admitted.append(index)
+                reservations[index] = reservation_id
+            else:
+                finish(index, {'enhanced': False, 'reason': 'budget_exceeded'})
+        if len(admitted) + cached_count < len(items):
+            print(f"🌸 Miette: Budget exceeded! {len(items) - len(admitted) - cached_count} piece(s) fall back to original generation...")
+        if not admitted:
+            return results
+        
+        # One prompt per piece, keyed by a unique, file-name-safe prompt id
+        prompt_ids = {}
+        for index in admitted:
+            prompt_id = re.sub(r'[^A-Za-z0-9_-]', '_', items[index]['creation_name']) or 'piece'
+            while prompt_id in prompt_ids:
+                prompt_id += '_'
+            prompt_ids[prompt_id] = index
+        batch_name = items[admitted[0]]['creation_name'] if len(admitted) == 1 else f"batch_{int(time.time())}"
+        
+        self.hf_manager.begin_use()
+        try:
+            # Build the musical config for HuggingFace
+            musical_config = self.prompt_manager.build_musical_config(
+                {prompt_id: prompts[index] for prompt_id, index in prompt_ids.items()}, batch_name
+            )
+            
+            # Start HuggingFace endpoint
+            self.hf_manager.start_endpoint()
+            
+            # Run HuggingFace inference once for the whole batch, fanning results
+            # back out through each prompt's manifest entry as it arrives
+            for entry in self._run_inference(musical_config):
+                index = prompt_ids[entry['prompt_id']]
+                result = self._read_enhancement_output(
+                    entry, items[index]['abc_content'], extract_abc_from_text,
+                    estimated_cost, reservations.get(index)
+                )
+                if result.get('enhanced'):
+                    # Committed as the actual cost
+                    del reservations[index]
+                    self.response_cache.put(cache_keys[index], entry['response'], settings['repository'])
+                finish(index, result)
                 
         except Exception as e:
-            os.chdir(self.original_cwd)
             print(f"🌸 Miette: Enhancement failed: {str(e)}")
-            return {'enhanced': False, 'reason': f'error: {str(e)}'}
+            for index in admitted:
+                if results[index] is None:
+                    finish(index, {'enhanced': False, 'reason': f'error: {str(e)}'})
         
         finally:
-            # Shutdown endpoint if not keeping alive
-            if self.hf_manager.should_shutdown():
-                self.hf_manager.shutdown_endpoint()
+            # Pieces that produced nothing give their reservation back
+            for reservation_id in reservations.values():
+                self.budget_manager.release(reservation_id)
+            
+            # Shutdown endpoint if not keeping alive and no other enhancement uses it
+            self.hf_manager.end_use()
+        
+        return results
+    
+    def _run_inference(self, musical_config: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Run every prompt of musical_config, yielding manifest entries
+        (prompt_id, path, response, error, elapsed) with the response payload
+        
+        The inference driver keeps responses in memory unless inference_output_dir
+        is set; cminferencer always works through files, in a temporary
+        directory by default.
+        """
+        if self.inference_concurrency > 0:
+            driver = self.hf_manager.create_inference_driver(self.inference_concurrency)
+            yield from driver.iter_results(musical_config, self.inference_output_dir)
+        elif self.inference_output_dir:
+            yield from self._run_cminferencer(musical_config, self.inference_output_dir)
+        else:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                yield from self._run_cminferencer(musical_config, temp_dir)
+    
+    def _run_cminferencer(self, musical_config: Dict[str, Any], work_dir: str) -> List[Dict[str, Any]]:
+        """Run jghfmanager's cminferencer on musical_config in work_dir"""
+        # Reuse existing cminferencer logic.  It reads musical.yml and writes
+        # its outputs relative to the working directory, so it runs in a
+        # child process started in work_dir instead of chdir-ing this one.
+        from .inference_driver import clear_outputs, manifest_from_outputs
+        
+        musical_file = self.prompt_manager.write_musical_yml(musical_config, work_dir)
+        clear_outputs(musical_config, work_dir)
+        # start_endpoint already waited for 'running' within ready_timeout, but
+        # cminferencer resumes and polls again without a deadline of its own
+        prompt_count = len(musical_config['musical']['prompts'])
+        request_timeout = float(self.hf_manager.config.huggingface.get('request_timeout', 300))
+        start_time = time.time()
+        try:
+            subprocess.run(
+                [sys.executable, "-c", "from jghfmanager.cminferencer import main; main()",
+                 "--config", self.hf_manager.config_path,
+                 "--musical", os.path.basename(musical_file)],
+                cwd=work_dir, check=True,
+                timeout=self.hf_manager.ready_timeout + request_timeout * prompt_count
+            )
+        finally:
+            # cminferencer always pauses the endpoint on its way out
+            self.hf_manager.mark_paused_elsewhere()
+        return manifest_from_outputs(musical_config, work_dir, time.time() - start_time,
+                                     load_responses=True)
+    
+    def _read_enhancement_output(self, entry: Dict[str, Any], abc_content: str, extract_abc_from_text,
+                                 estimated_cost: float, reservation_id: int = None) -> Dict[str, Any]:
+        """Turn one inference manifest entry into an enhancement result"""
+        if not entry.get('response'):
+            return {'enhanced': False, 'reason': 'no_output_generated'}
+        
+        processing_time = entry.get('elapsed') or 0.0
+        # Actual cost (simplified estimation)
+        actual_cost = min(estimated_cost, estimated_cost * (processing_time / 30.0))
+        result = self._build_enhancement_result(
+            entry['response'], abc_content, extract_abc_from_text, processing_time, actual_cost
+        )
+        
+        if result['enhanced']:
+            if reservation_id is not None:
+                self.budget_manager.commit(reservation_id, actual_cost)
+            else:
+                self.budget_manager.record_cost(actual_cost)
+        return result
+    
+    def _build_enhancement_result(self, response: Dict[str, Any], abc_content: str, extract_abc_from_text,
+                                  processing_time: float, cost: float) -> Dict[str, Any]:
+        generated_text = response.get('generated_text', '')
+        
+        # Every tune of the answer is a candidate; jgcmlib's extraction is the fallback
+        candidates = parse_abc(generated_text).tunes or extract_abc_from_text(generated_text)
+        if not candidates:
+            return {'enhanced': False, 'reason': 'no_abc_extracted'}
+        
+        # Malformed ABC is rejected here instead of failing slowly in abc2midi/MuseScore
+        enhanced_abc, validation = select_best_tune(candidates)
+        if enhanced_abc is None:
+            return {'enhanced': False, 'reason': 'invalid_abc', 'validation': validation}
+        
+        return {
+            'enhanced': True,
+            'enhanced_abc': enhanced_abc,
+            'validation': validation,
+            'original_abc': abc_content,
+            'processing_time': processing_time,
+            'cost': cost,
+            'cached': False,
+            'endpoint_metrics': dict(self.hf_manager.session_metrics)
+        }
+    
+    @staticmethod
+    def _write_original(abc_content: str, output_dir: str, creation_name: str) -> str:
+        """Write the original ABC to output_dir/original/; returns the file"""
+        original_dir = os.path.join(output_dir, 'original')
+        os.makedirs(original_dir, exist_ok=True)
+        
+        abc_file = os.path.join(original_dir, f"{creation_name}.abc")
+        with open(abc_file, 'w') as f:
+            f.write(abc_content)
+        return abc_file
+    
+    @staticmethod
+    def _original_result(abc_file: str, outputs: Optional[Tuple[str, str, str]]) -> Dict[str, Any]:
+        if not outputs:
+            print(f"🌸 Miette: Original processing failed: {abc_file} did not render")
+            return {'error': f"rendering {abc_file} failed"}
+        score_path, audio_path, midi_path = outputs
+        return {
+            'abc_file': abc_file,
+            'midi_file': midi_path,
+            'audio_file': audio_path,
+            'score_file': score_path
+        }
+    
+    def _render_original(self, abc_content: str, output_dir: str, creation_name: str) -> Dict[str, Any]:
+        """Write the original ABC to output_dir/original/ and convert it to all formats"""
+        abc_file = self._write_original(abc_content, output_dir, creation_name)
+        
+        # Convert original to all formats
+        try:
+            return self._original_result(abc_file, self.render_cache.render(abc_file, score_ext="svg"))
+        except Exception as e:
+            print(f"🌸 Miette: Original processing failed: {str(e)}")
+            return {'error': str(e)}
+    
+    @staticmethod
+    def _write_enhanced(enhancement_result: Dict[str, Any], output_dir: str, creation_name: str) -> Optional[str]:
+        """Write an enhancement result to output_dir/enhanced/; None when nothing was enhanced"""
+        enhanced_dir = os.path.join(output_dir, 'enhanced')
+        os.makedirs(enhanced_dir, exist_ok=True)
+        
+        if not enhancement_result.get('enhanced'):
+            return None
+        
+        enhanced_abc_file = os.path.join(enhanced_dir, f"{creation_name}_enhanced.abc")
+        with open(enhanced_abc_file, 'w') as f:
+            f.write(enhancement_result['enhanced_abc'])
+        return enhanced_abc_file
+    
+    @staticmethod
+    def _enhanced_result(enhancement_result: Dict[str, Any], enhanced_abc_file: str,
+                         outputs: Optional[Tuple[str, str, str]]) -> Dict[str, Any]:
+        if not outputs:
+            print(f"🌸 Miette: Enhanced processing failed: {enhanced_abc_file} did not render")
+            return {'error': f"rendering {enhanced_abc_file} failed"}
+        enhanced_score, enhanced_audio, enhanced_midi = outputs
+        return {
+            'abc_file': enhanced_abc_file,
+            'midi_file': enhanced_midi,
+            'audio_file': enhanced_audio,
+            'score_file': enhanced_score,
+            'processing_time': enhancement_result['processing_time'],
+            'cost': enhancement_result['cost'],
+            'cached': enhancement_result.get('cached', False),
+            'validation': enhancement_result.get('validation')
+        }
+    
+    def _render_enhanced(self, enhancement_result: Dict[str, Any], output_dir: str,
+                         creation_name: str) -> Dict[str, Any]:
+        """Write an enhancement result to output_dir/enhanced/ and convert it to all formats"""
+        enhanced_abc_file = self._write_enhanced(enhancement_result, output_dir, creation_name)
+        if enhanced_abc_file is None:
+            return enhancement_result
+        
+        # Convert enhanced to all formats
+        try:
+            return self._enhanced_result(
+                enhancement_result, enhanced_abc_file,
+                self.render_cache.render(enhanced_abc_file, score_ext="svg")
+            )
+        except Exception as e:
+            print(f"🌸 Miette: Enhanced processing failed: {str(e)}")
+            return {'error': str(e)}
+    
+    @staticmethod
+    def _add_analysis(results: Dict[str, Any]) -> Dict[str, Any]:
+        """Add 'analysis' (MIDI features of both versions and what changed) when both rendered"""
+        original = results.get('original') or {}
+        enhanced = results.get('enhanced') or {}
+        if not (original.get('midi_file') and enhanced.get('midi_file')):
+            return results
+        try:
+            from .midi_features import compare_midi_files
+            results['analysis'] = compare_midi_files(original['midi_file'], enhanced['midi_file'])
+        except Exception as e:
+            print(f"🌸 Miette: MIDI analysis failed: {str(e)}")
+            results['analysis'] = {'error': str(e)}
+        return results
+    
+    def _apply_session_options(self, hf_budget: float, keep_alive: int):
+        # Set up budget and keep-alive
+        if hf_budget > 0:
+            self.budget_manager.set_session_budget(hf_budget)
+        
+        if keep_alive > 0:
+            self.hf_manager.set_keep_alive(keep_alive)
     
     def process_link2abc_output(self, abc_content: str, output_dir: str,
                               creation_name: str, enhance_hf: bool = False,
@@ -326,73 +783,85 @@ class OrpheusIntegrationBlock:
             'enhanced_enabled': enhance_hf
         }
         
-        # Set up budget and keep-alive
-        if hf_budget > 0:
-            self.budget_manager.set_session_budget(hf_budget)
+        self._apply_session_options(hf_budget, keep_alive)
         
-        if keep_alive > 0:
-            self.hf_manager.set_keep_alive(keep_alive)
+        if not enhance_hf:
+            results['original'] = self._render_original(abc_content, output_dir, creation_name)
+            return results
         
-        # Create output directories
-        original_dir = os.path.join(output_dir, 'original')
-        os.makedirs(original_dir, exist_ok=True)
+        # The original renders on a worker while the endpoint boots and infers
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            original_future = executor.submit(self._render_original, abc_content, output_dir, creation_name)
+            enhancement_result = self.enhance_abc_content(
+                abc_content, creation_name, custom_prompt
+            )
+            enhanced_future = executor.submit(self._render_enhanced, enhancement_result, output_dir, creation_name)
+            results['original'] = original_future.result()
+            results['enhanced'] = enhanced_future.result()
         
-        # Process original ABC
-        abc_file = os.path.join(original_dir, f"{creation_name}.abc")
-        with open(abc_file, 'w') as f:
-            f.write(abc_content)
+        self._add_analysis(results)
+        return results
+    
+    def process_link2abc_batch(self, items: List[Dict[str, Any]], custom_prompt: str = None,
+                               hf_budget: float = 0.0, keep_alive: int = 0) -> List[Dict[str, Any]]:
+        """
+        Process many Link2ABC outputs with one shared inference run
         
-        # Convert original to all formats
-        try:
-            from jgcmlib.jgabcli import pto_post_just_an_abc_file
-            score_path, audio_path, midi_path = pto_post_just_an_abc_file(abc_file, score_ext="svg")
-            
-            results['original'] = {
-                'abc_file': abc_file,
-                'midi_file': midi_path,
-                'audio_file': audio_path,
-                'score_file': score_path
-            }
-        except Exception as e:
-            print(f"🌸 Miette: Original processing failed: {str(e)}")
-            results['original']['error'] = str(e)
+        Each item is a dict with 'abc_content', 'output_dir', 'creation_name'
+        and optional 'custom_prompt' (falls back to ``custom_prompt``).  The
+        per-item results have the same structure as ``process_link2abc_output``
+        with enhance_hf=True, in item order.
+        """
+        self._apply_session_options(hf_budget, keep_alive)
         
-        # Process enhanced version if requested
-        if enhance_hf:
-            enhanced_dir = os.path.join(output_dir, 'enhanced')
-            os.makedirs(enhanced_dir, exist_ok=True)
+        # All originals go to one batch render (one abc2midi, one MuseScore)
+        # while the endpoint boots and infers; enhanced pieces are queued as
+        # soon as their result is known and rendered together with whatever
+        # else arrived while the previous batch was rendering
+        batcher = RenderBatcher(lambda abc_files: self.render_cache.render_many(abc_files, score_ext="svg"))
+        with batcher:
+            original_files = [
+                self._write_original(item['abc_content'], item['output_dir'], item['creation_name'])
+                for item in items
+            ]
+            original_futures = batcher.submit_many(original_files)
+            enhanced_futures = {}
             
-            enhancement_result = self.enhance_abc_content(
-                abc_content, creation_name, custom_prompt
-            )
+            def render_enhanced(index: int, enhancement_result: Dict[str, Any]):
+                item = items[index]
+                enhanced_abc_file = self._write_enhanced(enhancement_result, item['output_dir'], item['creation_name'])
+                future = batcher.submit(enhanced_abc_file) if enhanced_abc_file else None
+                enhanced_futures[index] = (enhancement_result, enhanced_abc_file, future)
             
-            if enhancement_result.get('enhanced'):
-                enhanced_abc = enhancement_result['enhanced_abc']
-                enhanced_abc_file = os.path.join(enhanced_dir, f"{creation_name}_enhanced.abc")
-                
-                with open(enhanced_abc_file, 'w') as f:
-                    f.write(enhanced_abc)
-                
-                # Convert enhanced to all formats
-                try:
-                    enhanced_score, enhanced_audio, enhanced_midi = pto_post_just_an_abc_file(
-                        enhanced_abc_file, score_ext="svg"
-                    )
-                    
-                    results['enhanced'] = {
-                        'abc_file': enhanced_abc_file,
-                        'midi_file': enhanced_midi,
-                        'audio_file': enhanced_audio,
-                        'score_file': enhanced_score,
-                        'processing_time': enhancement_result['processing_time'],
-                        'cost': enhancement_result['cost']
-                    }
-                except Exception as e:
-                    print(f"🌸 Miette: Enhanced processing failed: {str(e)}")
-                    results['enhanced'] = {'error': str(e)}
-            else:
-                results['enhanced'] = enhancement_result
+            enhancement_results = self.enhance_abc_batch([
+                {
+                    'abc_content': item['abc_content'],
+                    'creation_name': item['creation_name'],
+                    'custom_prompt': item.get('custom_prompt', custom_prompt)
+                }
+                for item in items
+            ], on_result=render_enhanced)
+            
+            for index, enhancement_result in enumerate(enhancement_results):
+                if index not in enhanced_futures:
+                    render_enhanced(index, enhancement_result)
         
+        def collect(result_func, abc_file, future, *args):
+            try:
+                return result_func(*args, abc_file, future.result())
+            except Exception as e:
+                print(f"🌸 Miette: Batch rendering failed: {str(e)}")
+                return {'error': str(e)}
+        
+        results = []
+        for index in range(len(items)):
+            enhancement_result, enhanced_abc_file, enhanced_future = enhanced_futures[index]
+            results.append(self._add_analysis({
+                'original': collect(self._original_result, original_files[index], original_futures[index]),
+                'enhanced': (collect(self._enhanced_result, enhanced_abc_file, enhanced_future, enhancement_result)
+                             if enhanced_future else enhancement_result),
+                'enhanced_enabled': True
+            }))
         return results
 
 
@@ -425,12 +894,12 @@ def create_enhanced_format_converter():
             
             if results.get('enhanced_enabled') and results.get('enhanced'):
                 enhanced = results['enhanced']
-                if not enhanced.get('error'):
+                if enhanced.get('abc_file') and not enhanced.get('error'):
                     report_content += f"""
 ## 🌟 Enhanced Version (HuggingFace ChatMusician)
 
 - **Processing Time**: {enhanced.get('processing_time', 0):.1f}s
-- **Cost**: ${enhanced.get('cost', 0):.3f}
+- **Cost**: ${enhanced.get('cost', 0):.3f}{' (response cache hit)' if enhanced.get('cached') else ''}
 - **ABC Source**: [{os.path.basename(enhanced['abc_file'])}]({enhanced['abc_file']})
 - **MIDI File**: [{os.path.basename(enhanced['midi_file'])}]({enhanced['midi_file']})
 - **Audio File**: [{os.path.basename(enhanced['audio_file'])}]({enhanced['audio_file']})
@@ -443,14 +912,47 @@ def create_enhanced_format_converter():
                 else:
                     report_content += f"""
 ## ❌ Enhancement Failed
-Reason: {enhanced.get('reason', 'unknown')}
+Reason: {enhanced.get('error') or enhanced.get('reason', 'unknown')}
 """
+                    for issue in (enhanced.get('validation') or {}).get('errors', []):
+                        report_content += f"- `{issue['code']}`: {issue['message']}\n"
+            
+            analysis = results.get('analysis')
+            if analysis and not analysis.get('error'):
+                report_content += EnhancedFormatConverter.format_analysis(analysis)
             
             report_file = os.path.join(output_dir, 'generation_report.md')
             with open(report_file, 'w') as f:
                 f.write(report_content)
             
             return report_file
+        
+        @staticmethod
+        def format_analysis(analysis: Dict[str, Any]) -> str:
+            """Markdown table of the MIDI features of both versions"""
+            original, enhanced, changes = analysis['original'], analysis['enhanced'], analysis['changes']
+            rows = [
+                ('Notes', 'note_count'),
+                ('Length (beats)', 'duration_beats'),
+                ('Notes per beat', 'notes_per_beat'),
+                ('Pitch range (semitones)', 'pitch_range'),
+                ('Mean pitch (MIDI)', 'pitch_mean'),
+                ('Mean polyphony', 'polyphony_mean'),
+                ('Harmonic changes per bar', 'harmonic_changes_per_bar'),
+            ]
+            table = """
+## 📈 Musical Changes
+
+| Feature | Original | Enhanced | Change |
+|---|---|---|---|
+"""
+            for label, name in rows:
+                if name in changes:
+                    table += f"| {label} | {original[name]} | {enhanced[name]} | {changes[name]:+} |\n"
+            if 'pitch_class_distance' in changes:
+                table += (f"\nPitch-class distance: {changes['pitch_class_distance']:.2f} "
+                          f"(0 = same pitch classes, 1 = none shared)\n")
+            return table
     
     return EnhancedFormatConverter()
 
@@ -478,16 +980,29 @@ def integrate_with_link2abc_cli():
 
 def process_with_orpheus_enhancement(abc_content: str, output_dir: str, creation_name: str,
                                    enhance_hf: bool = False, hf_budget: float = 0.0,
-                                   keep_alive: int = 0, custom_prompt: str = None) -> Dict[str, Any]:
+                                   keep_alive: int = 0, custom_prompt: str = None,
+                                   use_render_cache: bool = True,
+                                   inference_concurrency: int = 4,
+                                   use_response_cache: bool = True,
+                                   integration_block: OrpheusIntegrationBlock = None) -> Dict[str, Any]:
     """
     Main integration function for Link2ABC to call
     
+    ``integration_block`` lets a long-lived caller (``oenhance serve``) reuse
+    its warm managers; ``use_render_cache``, ``inference_concurrency`` and
+    ``use_response_cache`` only apply to the block built when none is given.
+    
     🧠 Mia: This is the recursive bridge that connects web content to professional music
     🌸 Miette: The magic transformation happens here!
     """
     
-    budget_manager = CostBudgetManager()
-    integration_block = OrpheusIntegrationBlock(budget_manager)
+    if integration_block is None:
+        budget_manager = CostBudgetManager()
+        render_cache = RenderCache(enabled=use_render_cache)
+        integration_block = OrpheusIntegrationBlock(
+            budget_manager, render_cache, inference_concurrency,
+            response_cache=ResponseCache(enabled=use_response_cache)
+        )
     
     results = integration_block.process_link2abc_output(
         abc_content=abc_content,
@@ -517,6 +1032,8 @@ def process_with_orpheus_enhancement(abc_content: str, output_dir: str, creation
 
 
 if __name__ == "__main__":
+    import json
+
     # Test/demo usage
     test_abc = """X:1
 T:Test Melody
@@ -1,18 +1,26 @@
 #%%
 import os
-from click import prompt
 import dotenv
-from langchain import hub
 import argparse
+import time
+import uuid
 import yaml
 
-import langsmith 
-# Initialize LangSmith client
-LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
-if not LANGSMITH_API_KEY:
-    print("Error: LANGSMITH_API_KEY environment variable is not set.")
-    exit(1)
-client = langsmith.Client(api_key=LANGSMITH_API_KEY)
+# langchain, langgraph, langchain_openai, the shell tool and langsmith take
+# seconds to import: they are loaded by main() once the configuration is
+# valid, so `olca init`, `--help` and configuration errors return at once.
+
+_langsmith_client = None
+
+
+def get_langsmith_client():
+    """LangSmith client, created on first use (only when tracing is enabled)"""
+    global _langsmith_client
+    if _langsmith_client is None:
+        import langsmith
+        api_key = os.getenv("LANGSMITH_API_KEY") or os.getenv("LANGCHAIN_API_KEY")
+        _langsmith_client = langsmith.Client(api_key=api_key)
+    return _langsmith_client
 
 
 #jgwill/olca1
@@ -93,37 +101,40 @@ dotenv.load_dotenv()
 
 #%%
 
-# First we initialize the model we want to use.
-from json import load
-from langchain_openai import ChatOpenAI,OpenAI
-from langchain.agents import AgentExecutor, create_react_agent
-
-from langchain_community.agent_toolkits.load_tools import load_tools
-
-import warnings
-#
-
-# Suppress the specific UserWarning
-warnings.filterwarnings("ignore", category=UserWarning, message="The shell tool has no safeguards by default. Use at your own risk.")
-
-from langchain_community.tools.shell import ShellTool
-
-from typing import Literal
-
-from langchain_core.tools import tool
+def _load_agent_modules():
+    """Import the agent stack; called once the configuration has been validated"""
+    import warnings
+    # Suppress the specific UserWarning
+    warnings.filterwarnings("ignore", category=UserWarning, message="The shell tool has no safeguards by default. Use at your own risk.")
+
+    from langchain_openai import ChatOpenAI, OpenAI
+    from langchain_community.agent_toolkits.load_tools import load_tools
+    from langgraph.prebuilt import create_react_agent
+    from langgraph.errors import GraphRecursionError
+    return ChatOpenAI, OpenAI, load_tools, create_react_agent, GraphRecursionError
+
+
+def _weather_tool():
+    from typing import Literal
+    from langchain_core.tools import tool
+
+    @tool
+    def get_weather(city: Literal["nyc", "sf"]):
+        """Use this to get weather information."""
+        if city == "nyc":
+            return "It might be cloudy in nyc"
+        elif city == "sf":
+            return "It's always sunny in sf"
+        else:
+            raise AssertionError("Unknown city")
+    return get_weather
 
-from langgraph.prebuilt import create_react_agent
-from langgraph.errors import GraphRecursionError
 
-@tool
-def get_weather(city: Literal["nyc", "sf"]):
-    """Use this to get weather information."""
-    if city == "nyc":
-        return "It might be cloudy in nyc"
-    elif city == "sf":
-        return "It's always sunny in sf"
-    else:
-        raise AssertionError("Unknown city")
+def __getattr__(name):
+    # The example tool needs langchain_core: build it only when asked for
+    if name == "get_weather":
+        return _weather_tool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def print_stream(stream):
@@ -146,9 +157,89 @@ def prepare_input(user_input, system_instructions,append_prompt=True, human=Fals
         
     return inputs
 
+# Agent state lives in .olca/: a langgraph SQLite checkpointer keyed by thread
+# id, and the id of the thread the next run continues
+OLCA_DIR = ".olca"
+CHECKPOINT_DB = "checkpoints.sqlite"
+THREAD_FILE = "thread_id"
+
+
+def resolve_thread_id(olca_dir=OLCA_DIR, thread_id=None, new_thread=False):
+    """Thread to run: the given id, else the one remembered in .olca/, else a new one; remembered for the next run"""
+    thread_file = os.path.join(olca_dir, THREAD_FILE)
+    if not thread_id and not new_thread and os.path.exists(thread_file):
+        with open(thread_file, 'r') as file:
+            thread_id = file.read().strip()
+    if not thread_id:
+        thread_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(olca_dir, exist_ok=True)
+    with open(thread_file, 'w') as file:
+        file.write(thread_id + "\n")
+    return thread_id
+
+
+def open_checkpointer(olca_dir=OLCA_DIR):
+    """SqliteSaver on .olca/checkpoints.sqlite"""
+    import sqlite3
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    os.makedirs(olca_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(olca_dir, CHECKPOINT_DB), check_same_thread=False)
+    return SqliteSaver(conn)
+
+
+# What langgraph's react agent answers instead of its tool calls when the
+# recursion limit is near; the run then ends with GraphRecursionError
+OUT_OF_STEPS_ANSWER = "Sorry, need more steps to process this request."
+
+
+def _out_of_steps(messages):
+    return bool(messages) and not getattr(messages[-1], "tool_calls", None) and \
+        getattr(messages[-1], "content", None) == OUT_OF_STEPS_ANSWER
+
+
+def agent_inputs(graph, run_config, user_input, system_instructions, append_prompt=True, human=False):
+    """
+    (inputs, config, status) for this run given the thread's saved state:
+
+    new       nothing saved: system and user messages
+    continue  the model already has its instructions and history: only the
+              user message
+    resume    the last run stopped at the recursion limit: no inputs, and a
+              config pointing at the last checkpoint before the agent gave
+              up, so the graph carries on from that step
+    """
+    state = graph.get_state(run_config) if graph.checkpointer else None
+    if state is None or not state.values.get("messages"):
+        return prepare_input(user_input, system_instructions, append_prompt, human), run_config, 'new'
+    if state.next:
+        return None, run_config, 'resume'
+    if _out_of_steps(state.values["messages"]):
+        for snapshot in graph.get_state_history(run_config):
+            if snapshot.next and not _out_of_steps(snapshot.values.get("messages")):
+                return None, dict(run_config, configurable=dict(snapshot.config["configurable"])), 'resume'
+    return {"messages": [("user", user_input)]}, run_config, 'continue'
+
+
+def thread_inputs(graph, run_config, user_input, system_instructions, append_prompt=True, human=False,
+                  continue_thread=False, olca_dir=OLCA_DIR):
+    """
+    ``agent_inputs`` for the run's thread, moved to a new thread when the
+    last run completed and continuing was not asked for: re-sending the
+    same prompt on top of an answered history only grows every later prompt
+
+    Returns (inputs, config, status, thread_id); runs cut short by the
+    recursion limit still resume.
+    """
+    inputs, config, status = agent_inputs(graph, run_config, user_input, system_instructions, append_prompt, human)
+    if status == 'continue' and not continue_thread:
+        run_config = dict(run_config, configurable={"thread_id": resolve_thread_id(olca_dir, new_thread=True)})
+        inputs, config, status = agent_inputs(graph, run_config, user_input, system_instructions, append_prompt, human)
+    return inputs, config, status, run_config["configurable"]["thread_id"]
+
+
 OLCA_DESCRIPTION = "OlCA (Orpheus Langchain CLI Assistant) (very Experimental and dangerous)"
 OLCA_EPILOG = "For more information: https://github.com/jgwill/orpheuspypractice/wiki/olca"
-OLCA_USAGE="olca [-D] [-H] [-M] [-T] [init] [-y]"
+OLCA_USAGE="olca [-D] [-H] [-M] [-T] [-c CONFIG] [--thread ID | --continue | --new-thread | --no-checkpoint] [init] [-y]\n       olca batch [-h] [CONFIG ...] [-m MANIFEST] [-j WORKERS]"
 def _parse_args():
     parser = argparse.ArgumentParser(description=OLCA_DESCRIPTION, epilog=OLCA_EPILOG,usage=OLCA_USAGE)
     parser.add_argument("-D", "--disable-system-append", action="store_true", help="Disable prompt appended to system instructions")
@@ -157,13 +248,30 @@ def _parse_args():
     parser.add_argument("-T", "--tracing", action="store_true", help="Enable tracing")
     parser.add_argument("init", nargs='?', help="Initialize olca interactive mode")
     parser.add_argument("-y", "--yes", action="store_true", help="Accept the new file olca.yml")
+    parser.add_argument("-c", "--config", help="Configuration file to use instead of ./olca.yml")
+    parser.add_argument("--thread", help="Thread id to run or continue (default: a new thread, unless the last run of ./.olca stopped early)")
+    parser.add_argument("--continue", dest="continue_thread", action="store_true", help="Continue the last thread even though its last run completed")
+    parser.add_argument("--new-thread", action="store_true", help="Start a new thread even though the last run stopped early")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Do not save or restore agent state")
     return parser.parse_args()
 
 def main():
+    import sys
+    if sys.argv[1:2] == ["batch"]:
+        # Many configurations at once: see olca_batch
+        from .olca_batch import main as batch_main
+        return batch_main(sys.argv[2:])
+    
     args = _parse_args()
     olca_config_file = 'olca_config.yaml'
     olca_new_config_file = 'olca.yml'
     
+    if args.config:
+        if not os.path.exists(args.config):
+            print(f"Error: configuration file '{args.config}' not found.")
+            exit(1)
+        olca_new_config_file = args.config
+    
     if args.init:
         if os.path.exists(olca_new_config_file) or os.path.exists(olca_config_file):
             print("Error: Configuration file already exists. Cannot run 'olca init'.")
@@ -188,8 +296,8 @@ def main():
     tracing_enabled = config.get('tracing', False) or args.tracing
     if tracing_enabled:
         os.environ["LANGCHAIN_TRACING_V2"] = "true"
-        if not os.getenv("LANGCHAIN_API_KEY"):
-            print("Error: LANGCHAIN_API_KEY environment variable is required for tracing. Please set it up at : https://smith.langchain.com/settings")
+        if not (os.getenv("LANGCHAIN_API_KEY") or os.getenv("LANGSMITH_API_KEY")):
+            print("Error: LANGCHAIN_API_KEY (or LANGSMITH_API_KEY) environment variable is required for tracing. Please set it up at : https://smith.langchain.com/settings")
             exit(1)
     
     try:
@@ -211,6 +319,17 @@ def main():
             except:
                 print("Error: Could not load .env file")
                 exit(1)
+    if not os.getenv(api_key_variable):
+        print(f"Error: neither {api_keyname} nor {api_key_variable} environment variable is set.")
+        exit(1)
+    
+    # Tool output budget (tool_output in olca.yml)
+    from .olca_tools import OutputBudget
+    try:
+        budget = OutputBudget.from_config(config.get('tool_output'), OLCA_DIR)
+    except (TypeError, ValueError) as e:
+        print(f"Error: invalid 'tool_output' in {olca_config_file}: {e}")
+        exit(1)
 
 
        
@@ -222,7 +341,7 @@ def main():
     user_input = config.get('user_input', '')
     model_name=config.get('model_name', "gpt-4o-mini")
     recursion_limit=config.get('recursion_limit', 15)
-    disable_system_append = _parse_args().disable_system_append
+    disable_system_append = args.disable_system_append
     
     # Use the system_instructions and user_input in your CLI logic
     print("System Instructions:", system_instructions)
@@ -231,8 +350,10 @@ def main():
     print("Recursion Limit:", recursion_limit)
     print("Trace:", tracing_enabled)
     
-    
-    
+    # Configuration is valid: now pay for the agent stack
+    ChatOpenAI, OpenAI, load_tools, create_react_agent, GraphRecursionError = _load_agent_modules()
+    if tracing_enabled:
+        get_langsmith_client()
     
     model = ChatOpenAI(model=model_name, temperature=0)
     selected_tools = [ "terminal"]
@@ -259,23 +380,71 @@ def main():
             tools = load_tools(    selected_tools,    allow_dangerous_tools=True)
     
     
+    # Cap what each tool result adds to the message history
+    if budget is not None:
+        from .olca_tools import budget_tools, model_summarizer
+        if budget.summarize:
+            budget.summarizer = model_summarizer(ChatOpenAI(model=config['tool_output'].get('summarize_model', model_name), temperature=0))
+        tools = budget_tools(tools, budget)
+    
+    # Checkpointed runs resume the thread's saved graph state (after the
+    # recursion limit, or when asked to continue) instead of having the
+    # model re-read .olca/ through the terminal
+    checkpoint = config.get('checkpoint', True) and not args.no_checkpoint
+    run_config = {"recursion_limit": recursion_limit}
+    checkpointer = None
+    thread_id = None
+    if checkpoint:
+        thread_id = resolve_thread_id(OLCA_DIR, args.thread or config.get('thread_id'), args.new_thread)
+        run_config["configurable"] = {"thread_id": thread_id}
+        checkpointer = open_checkpointer(OLCA_DIR)
+    
     # Define the graph
-    graph = create_react_agent(model, tools=tools)
+    graph = create_react_agent(model, tools=tools, checkpointer=checkpointer)
     
     if graph.config is None:
       graph.config = {}
     graph.config["recursion_limit"] = recursion_limit
     
-    inputs = prepare_input(user_input, system_instructions, not disable_system_append, human_switch)
+    if checkpoint:
+        # Only named threads and --continue add this prompt to a completed thread
+        continue_thread = args.continue_thread or bool(args.thread or config.get('thread_id'))
+        inputs, stream_config, status, thread_id = thread_inputs(
+            graph, run_config, user_input, system_instructions, not disable_system_append, human_switch,
+            continue_thread, OLCA_DIR
+        )
+        print(f"Thread: {thread_id} ({status})")
+    else:
+        inputs, stream_config, status = agent_inputs(graph, run_config, user_input, system_instructions, not disable_system_append, human_switch)
     
-
+    # Time and tokens of every model call, tool call and step, to .olca/metrics/
+    metrics = None
+    if config.get('metrics', True):
+        from .olca_metrics import METRICS_DIR, RunMetrics
+        metrics = RunMetrics(METRICS_DIR, thread_id)
+        stream_config = dict(stream_config, callbacks=[metrics])
+
+    run_status = "error"
     try:
-        os.makedirs('.olca', exist_ok=True)
-        print_stream(graph.stream(inputs, stream_mode="values"))
+        os.makedirs(OLCA_DIR, exist_ok=True)
+        stream = graph.stream(inputs, stream_config, stream_mode="values")
+        print_stream(metrics.instrument(stream) if metrics else stream)
+        run_status = "completed"
     except GraphRecursionError as e:
         #print(f"Error: {e}")
+        run_status = "recursion_limit"
         print("Recursion limit reached. Please increase the 'recursion_limit' in the olca_config.yaml file.")
+        if checkpoint:
+            print(f"Run olca again to resume thread {thread_id} from its last step.")
         print("For troubleshooting, visit: https://python.langchain.com/docs/troubleshooting/errors/GRAPH_RECURSION_LIMIT")
+    finally:
+        if metrics is not None:
+            from .olca_metrics import format_summary
+            totals = metrics.close(run_status)
+            print(format_summary(metrics.records, totals["seconds"]))
+            print(f"Metrics: {metrics.path}")
+        if checkpointer is not None:
+            checkpointer.conn.close()
 
 def generate_config_example():
     config = {
@@ -0,0 +1,310 @@
+"""
+🗂️ olca batch: many agent tasks at once
+=======================================
+
+``olca`` runs the one ``olca.yml`` of the current directory.  ``olca batch``
+runs many configurations side by side, each as its own ``olca`` process:
+
+    olca batch repos/*/olca.yml -j 4
+    olca batch -m tasks.yml
+
+Every task gets its own working directory and so its own ``.olca/``
+(checkpoints, metrics, instructions), its own recursion limit and an
+optional timeout.  A bounded worker pool runs them; a slow task only holds
+its own worker.  A manifest lists the tasks and shared defaults::
+
+    workers: 4
+    recursion_limit: 20         # default for every task
+    timeout: 1800               # seconds, per task
+    tasks:
+      - config: repos/a/olca.yml            # working directory: repos/a
+      - name: b-report
+        config: shared/report.yml
+        workdir: repos/b
+        recursion_limit: 40
+        env: {GITHUB_REPO: org/b}
+      - name: notes
+        config: {user_input: "Summarize ./docs", system_instructions: "..."}
+
+A task without ``workdir`` runs in its config file's directory, or in the
+batch directory for inline configs.  Two tasks may not share a working
+directory.  The batch directory (``.olca/batch/<timestamp>/`` by default)
+keeps each task's effective config and log, and ``results.json``: status,
+time and the ``.olca/metrics`` totals of every task, plus their sum.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import yaml
+
+DEFAULT_WORKERS = 4
+METRICS_DIR = os.path.join(".olca", "metrics")
+# Metrics totals summed over the batch
+TOTAL_KEYS = ("model_calls", "model_seconds", "prompt_tokens", "completion_tokens",
+              "tool_calls", "tool_seconds", "tool_output_bytes", "steps")
+
+
+def _task_name(config_path: str) -> str:
+    stem = os.path.splitext(os.path.basename(config_path))[0]
+    if stem in ("olca", "olca_config"):
+        # repos/a/olca.yml is task "a"
+        return os.path.basename(os.path.dirname(os.path.abspath(config_path))) or stem
+    return stem
+
+
+def load_tasks(configs: List[str] = None, manifest: str = None, batch_dir: str = ".",
+               recursion_limit: int = None, timeout: float = None) -> List[Dict[str, Any]]:
+    """
+    Tasks from config files and/or a manifest, each a dict with 'name',
+    'config' (dict), 'workdir', 'recursion_limit', 'timeout', 'env' and
+    'args'; raises ValueError for an unusable list
+    """
+    entries = [{"config": path} for path in configs or []]
+    defaults = {}
+    if manifest:
+        with open(manifest, "r") as f:
+            data = yaml.safe_load(f) or {}
+        if isinstance(data, list):
+            data = {"tasks": data}
+        base = os.path.dirname(os.path.abspath(manifest))
+        for entry in data.get("tasks") or []:
+            entry = {"config": entry} if isinstance(entry, str) else dict(entry)
+            # Paths in a manifest are relative to the manifest
+            for key in ("config", "workdir"):
+                if isinstance(entry.get(key), str):
+                    entry[key] = os.path.join(base, entry[key])
+            entries.append(entry)
+        defaults = {key: data[key] for key in ("recursion_limit", "timeout", "env", "args") if key in data}
+    if recursion_limit is not None:
+        defaults["recursion_limit"] = recursion_limit
+    if timeout is not None:
+        defaults["timeout"] = timeout
+
+    tasks = []
+    names = set()
+    for index, entry in enumerate(entries, 1):
+        source = entry.get("config")
+        if isinstance(source, str):
+            if not os.path.isfile(source):
+                raise ValueError(f"task {index}: configuration file '{source}' not found")
+            with open(source, "r") as f:
+                config = yaml.safe_load(f) or {}
+            name = entry.get("name") or _task_name(source)
+            workdir = entry.get("workdir") or os.path.dirname(os.path.abspath(source))
+        elif isinstance(source, dict):
+            config = dict(source)
+            name = entry.get("name") or f"task-{index}"
+            workdir = entry.get("workdir")
+        else:
+            raise ValueError(f"task {index}: 'config' must be a file or a mapping")
+
+        base_name, suffix = name, 2
+        while name in names:
+            name = f"{base_name}-{suffix}"
+            suffix += 1
+        names.add(name)
+        tasks.append({
+            "name": name,
+            "config": config,
+            "workdir": os.path.abspath(workdir or os.path.join(batch_dir, name, "work")),
+            "recursion_limit": entry.get("recursion_limit",
+                                         config.get("recursion_limit", defaults.get("recursion_limit"))),
+            "timeout": entry.get("timeout", defaults.get("timeout")),
+            "env": dict(defaults.get("env") or {}, **(entry.get("env") or {})),
+            "args": list(entry.get("args", defaults.get("args")) or []),
+        })
+
+    # Isolated .olca/ state needs one working directory per task
+    seen = {}
+    for task in tasks:
+        if task["workdir"] in seen:
+            raise ValueError(f"tasks '{seen[task['workdir']]}' and '{task['name']}' share the working directory "
+                             f"{task['workdir']}; give one of them its own 'workdir' in a manifest")
+        seen[task["workdir"]] = task["name"]
+    return tasks
+
+
+def _metrics_files(workdir: str) -> set:
+    metrics_dir = os.path.join(workdir, METRICS_DIR)
+    return set(os.listdir(metrics_dir)) if os.path.isdir(metrics_dir) else set()
+
+
+def _run_totals(workdir: str, files: set) -> Dict[str, Any]:
+    """The 'run' record olca wrote to each of ``files`` (normally one)"""
+    totals = {}
+    for name in sorted(files):
+        with open(os.path.join(workdir, METRICS_DIR, name), "r") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("type") == "run":
+                    totals = record
+    return totals
+
+
+def run_task(task: Dict[str, Any], batch_dir: str, stop: threading.Event = None) -> Dict[str, Any]:
+    """Run one task as an ``olca`` process in its working directory"""
+    task_dir = os.path.join(batch_dir, task["name"])
+    os.makedirs(task_dir, exist_ok=True)
+    os.makedirs(task["workdir"], exist_ok=True)
+    config = dict(task["config"])
+    if task["recursion_limit"] is not None:
+        config["recursion_limit"] = task["recursion_limit"]
+    # Nobody is at the terminal of a batch task; its metrics go in results.json
+    config["human"] = False
+    config.setdefault("metrics", True)
+    config_file = os.path.join(task_dir, "olca.yml")
+    with open(config_file, "w") as f:
+        yaml.safe_dump(config, f)
+    log_file = os.path.join(task_dir, "olca.log")
+
+    result = {"name": task["name"], "workdir": task["workdir"], "config": config_file, "log": log_file}
+    if stop is not None and stop.is_set():
+        return dict(result, status="cancelled", seconds=0.0)
+
+    env = dict(os.environ, **{key: str(value) for key, value in task["env"].items()})
+    env["PYTHONUNBUFFERED"] = "1"
+    before = _metrics_files(task["workdir"])
+    start = time.perf_counter()
+    with open(log_file, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "orpheuspypractice.olca", "--config", config_file] + task["args"],
+            cwd=task["workdir"], env=env, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+        try:
+            returncode = process.wait(timeout=task["timeout"])
+            status = None
+        except subprocess.TimeoutExpired:
+            # The agent's shell commands share its session: stop them too
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+            returncode = process.returncode
+            status = "timeout"
+    seconds = round(time.perf_counter() - start, 3)
+
+    metrics = _run_totals(task["workdir"], _metrics_files(task["workdir"]) - before)
+    if status is None:
+        status = metrics.get("status") or ("completed" if returncode == 0 else "error")
+        if returncode != 0 and status == "completed":
+            status = "error"
+    return dict(result, status=status, returncode=returncode, seconds=seconds,
+                metrics={key: value for key, value in metrics.items() if key in TOTAL_KEYS})
+
+
+def run_batch(tasks: List[Dict[str, Any]], batch_dir: str, workers: int = DEFAULT_WORKERS,
+              on_result=None) -> Dict[str, Any]:
+    """Run every task with at most ``workers`` at a time; results in task order plus totals"""
+    os.makedirs(batch_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = [None] * len(tasks)
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(run_task, task, batch_dir, stop): index for index, task in enumerate(tasks)}
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = {"name": tasks[index]["name"], "status": "error",
+                                      "error": f"{type(e).__name__}: {e}", "seconds": 0.0}
+                if on_result:
+                    on_result(results[index])
+        except KeyboardInterrupt:
+            # Tasks already running finish; queued ones are skipped
+            stop.set()
+            raise
+
+    totals = {key: 0 for key in TOTAL_KEYS}
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+        for key, value in (result.get("metrics") or {}).items():
+            totals[key] += value
+    summary = {
+        "batch_dir": os.path.abspath(batch_dir),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - start, 3),
+        "task_seconds": round(sum(result.get("seconds", 0.0) for result in results), 3),
+        "statuses": statuses,
+        "totals": {key: round(value, 4) for key, value in totals.items()},
+        "tasks": results,
+    }
+    with open(os.path.join(batch_dir, "results.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def format_results(summary: Dict[str, Any]) -> str:
+    """Plain-text table of a batch's tasks and totals"""
+    lines = [f"{'task':<28} {'status':<16} {'seconds':>8} {'steps':>6} {'prompt tok':>10} {'tool KB':>8}"]
+    for result in summary["tasks"]:
+        metrics = result.get("metrics") or {}
+        lines.append(f"{result['name'][:28]:<28} {result['status']:<16} {result.get('seconds', 0.0):>8.1f} "
+                     f"{metrics.get('steps', 0):>6} {metrics.get('prompt_tokens', 0):>10} "
+                     f"{metrics.get('tool_output_bytes', 0) / 1024:>8.1f}")
+    totals = summary["totals"]
+    lines.append(f"{'total':<28} {'':<16} {summary['task_seconds']:>8.1f} {totals['steps']:>6} "
+                 f"{totals['prompt_tokens']:>10} {totals['tool_output_bytes'] / 1024:>8.1f}")
+    statuses = ", ".join(f"{count} {status}" for status, count in sorted(summary["statuses"].items()))
+    lines.append(f"{statuses}; wall time {summary['seconds']:.1f}s for {summary['task_seconds']:.1f}s "
+                 f"of task time ({summary['workers']} workers)")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="olca batch",
+        description="🗂️ Run many olca configurations concurrently, each in its own working directory"
+    )
+    parser.add_argument("configs", nargs="*", help="olca.yml files (each runs in its own directory)")
+    parser.add_argument("-m", "--manifest", help="YAML manifest of tasks (see olca_batch)")
+    parser.add_argument("-j", "--workers", type=int, help=f"Tasks run at once (default: manifest, else {DEFAULT_WORKERS})")
+    parser.add_argument("--batch-dir", help="Where task configs, logs and results.json go "
+                                            "(default: .olca/batch/<timestamp>)")
+    parser.add_argument("--recursion-limit", type=int, help="Recursion limit of tasks that set none")
+    parser.add_argument("--timeout", type=float, help="Seconds before a task is stopped")
+    args = parser.parse_args(argv)
+
+    if not args.configs and not args.manifest:
+        parser.error("give olca.yml files and/or --manifest")
+    batch_dir = os.path.abspath(args.batch_dir or os.path.join(".olca", "batch", time.strftime("%Y%m%d%H%M%S")))
+    try:
+        tasks = load_tasks(args.configs, args.manifest, batch_dir, args.recursion_limit, args.timeout)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if not tasks:
+        print("Error: no tasks to run")
+        sys.exit(1)
+
+    workers = args.workers
+    if workers is None and args.manifest:
+        with open(args.manifest, "r") as f:
+            data = yaml.safe_load(f)
+        workers = data.get("workers") if isinstance(data, dict) else None
+    workers = workers or DEFAULT_WORKERS
+
+    print(f"🗂️ {len(tasks)} tasks, {workers} at a time → {batch_dir}")
+
+    def report(result):
+        print(f"  {result['status']:<16} {result['name']} ({result.get('seconds', 0.0):.1f}s)")
+
+    summary = run_batch(tasks, batch_dir, workers, on_result=report)
+    print(format_results(summary))
+    print(f"📊 Results: {os.path.join(batch_dir, 'results.json')}")
+    if set(summary["statuses"]) - {"completed"}:
+        sys.exit(1)
@@ -0,0 +1,195 @@
+"""
+⏱️ olca run metrics: where do an agent run's time and tokens go?
+================================================================
+
+``RunMetrics`` is a LangChain callback handler passed to ``graph.stream``; it
+times every model call and every tool call and records token usage and tool
+output sizes.  ``instrument`` wraps the stream itself and times each graph
+step.  Every record is appended to ``.olca/metrics/<run>.jsonl`` as it
+happens, so an interrupted run keeps what it measured::
+
+    {"type": "model", "step": 1, "name": "gpt-4o-mini", "seconds": 1.42,
+     "prompt_tokens": 1650, "completion_tokens": 38, "prompt_messages": 2}
+    {"type": "tool", "step": 2, "name": "terminal", "seconds": 0.08,
+     "input": "ls -R", "output_bytes": 48210}
+    {"type": "step", "step": 2, "seconds": 0.09}
+
+``format_summary`` turns a run's records into the table olca prints at the
+end: calls, time and tokens per model and tool, then the slowest calls.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+METRICS_DIR = os.path.join(".olca", "metrics")
+# Characters of tool input and prompt kept in a record
+PREVIEW_CHARS = 200
+SLOWEST_CALLS = 5
+
+
+def _size(output: Any) -> int:
+    """Bytes of a tool result as it enters the message history"""
+    content = getattr(output, "content", output)
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+    return len(content.encode("utf-8", errors="replace"))
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Prompt and completion tokens of an LLMResult (usage metadata, else llm_output)"""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not (prompt or completion):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0)
+        completion = usage.get("completion_tokens", 0)
+    return {"prompt_tokens": prompt, "completion_tokens": completion}
+
+
+class RunMetrics(BaseCallbackHandler):
+    """Records model calls, tool calls and graph steps of one olca run"""
+
+    def __init__(self, metrics_dir: str = METRICS_DIR, thread_id: str = None, run_name: str = None):
+        os.makedirs(metrics_dir, exist_ok=True)
+        run_name = run_name or f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(metrics_dir, f"{run_name}.jsonl")
+        self.thread_id = thread_id
+        self.records: List[Dict[str, Any]] = []
+        self._started: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._run_start = time.perf_counter()
+
+    def record(self, record: Dict[str, Any]):
+        if self.thread_id:
+            record = dict(record, thread_id=self.thread_id)
+        record.setdefault("time", time.time())
+        with self._lock:
+            self.records.append(record)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def _start(self, run_id, **fields):
+        self._started[run_id] = dict(fields, start=time.perf_counter())
+
+    def _finish(self, run_id, kind: str, **fields):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start = started.pop("start")
+        self.record(dict({"type": kind, "seconds": round(time.perf_counter() - start, 4)}, **started, **fields))
+
+    # Model calls
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        prompt = messages[0] if messages else []
+        self._start(run_id, step=(metadata or {}).get("langgraph_step"),
+                    name=(metadata or {}).get("ls_model_name") or (serialized or {}).get("name"),
+                    prompt_messages=len(prompt),
+                    prompt_chars=sum(len(str(message.content)) for message in prompt))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, step=(metadata or {}).get("langgraph_step"),
+                    name=(metadata or {}).get("ls_model_name") or (serialized or {}).get("name"),
+                    prompt_messages=len(prompts), prompt_chars=sum(len(prompt) for prompt in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, "model", **_token_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "model", error=f"{type(error).__name__}: {error}")
+
+    # Tool calls
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, step=(metadata or {}).get("langgraph_step"), name=(serialized or {}).get("name"),
+                    input=str(input_str)[:PREVIEW_CHARS])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id, "tool", output_bytes=_size(output))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "tool", error=f"{type(error).__name__}: {error}")
+
+    # Graph steps
+    def instrument(self, stream: Iterable) -> Iterator:
+        """Yield from a ``graph.stream`` while timing each step (step 0: the input state)"""
+        start = time.perf_counter()
+        for step, item in enumerate(stream):
+            self.record({"type": "step", "step": step, "seconds": round(time.perf_counter() - start, 4)})
+            yield item
+            # Time spent by the consumer (printing) is not the graph's
+            start = time.perf_counter()
+
+    def close(self, status: str = None) -> Dict[str, Any]:
+        """Write the run's totals (and how it ended) as the last record and return them"""
+        totals = summarize(self.records)
+        totals["seconds"] = round(time.perf_counter() - self._run_start, 4)
+        if status:
+            totals["status"] = status
+        self.record(dict({"type": "run"}, **totals))
+        return totals
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals over model and tool records"""
+    totals = {"model_calls": 0, "model_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+              "tool_calls": 0, "tool_seconds": 0.0, "tool_output_bytes": 0, "steps": 0}
+    for record in records:
+        if record["type"] == "model":
+            totals["model_calls"] += 1
+            totals["model_seconds"] += record["seconds"]
+            totals["prompt_tokens"] += record.get("prompt_tokens", 0)
+            totals["completion_tokens"] += record.get("completion_tokens", 0)
+        elif record["type"] == "tool":
+            totals["tool_calls"] += 1
+            totals["tool_seconds"] += record["seconds"]
+            totals["tool_output_bytes"] += record.get("output_bytes", 0)
+        elif record["type"] == "step":
+            totals["steps"] = max(totals["steps"], record["step"])
+    totals["model_seconds"] = round(totals["model_seconds"], 4)
+    totals["tool_seconds"] = round(totals["tool_seconds"], 4)
+    return totals
+
+
+def format_summary(records: List[Dict[str, Any]], seconds: Optional[float] = None) -> str:
+    """Plain-text table: per model/tool totals, then the slowest calls"""
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for record in records:
+        if record["type"] not in ("model", "tool"):
+            continue
+        group = groups.setdefault((record["type"], record.get("name") or "?"),
+                                  {"calls": 0, "seconds": 0.0, "max": 0.0, "prompt": 0, "completion": 0, "bytes": 0})
+        group["calls"] += 1
+        group["seconds"] += record["seconds"]
+        group["max"] = max(group["max"], record["seconds"])
+        group["prompt"] += record.get("prompt_tokens", 0)
+        group["completion"] += record.get("completion_tokens", 0)
+        group["bytes"] += record.get("output_bytes", 0)
+
+    lines = [f"{'kind':<6} {'name':<24} {'calls':>5} {'total s':>8} {'max s':>7} "
+             f"{'prompt tok':>10} {'compl tok':>9} {'output KB':>9}"]
+    for (kind, name), group in sorted(groups.items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(f"{kind:<6} {name[:24]:<24} {group['calls']:>5} {group['seconds']:>8.2f} {group['max']:>7.2f} "
+                     f"{group['prompt']:>10} {group['completion']:>9} {group['bytes'] / 1024:>9.1f}")
+    if seconds is not None:
+        lines.append(f"wall time {seconds:.2f}s")
+
+    slowest = sorted((record for record in records if record["type"] in ("model", "tool")),
+                     key=lambda record: -record["seconds"])[:SLOWEST_CALLS]
+    if slowest:
+        lines.append("slowest calls:")
+        for record in slowest:
+            detail = record.get("input") if record["type"] == "tool" else \
+                f"{record.get('prompt_tokens', 0)} prompt tokens, {record.get('prompt_messages', 0)} messages"
+            lines.append(f"  {record['seconds']:>7.2f}s  step {record.get('step')}  {record['type']} "
+                         f"{record.get('name')}: {detail}")
+    return "\n".join(lines)
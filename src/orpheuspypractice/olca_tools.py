@@ -0,0 +1,166 @@
+"""
+✂️ Tool output budget for olca
+=============================
+
+The ``terminal`` tool returns whatever a command prints, and every later model
+call re-sends it: one ``ls -R`` or log dump inflates all following prompts
+and can overflow the context window.  ``OutputBudget`` caps each tool result
+before it enters the message history:
+
+    under max_bytes   passed through unchanged
+    over max_bytes    head and tail kept (cut at line ends), the middle replaced
+                      by a marker; the full output is spilled to
+                      ``.olca/tool_outputs/`` and the marker names the file so
+                      the agent can ``grep``/``sed`` it on demand
+    summarize         optionally, a model summary replaces head and tail
+
+Configured under ``tool_output`` in ``olca.yml`` (``tool_output: false``
+turns it off)::
+
+    tool_output:
+      max_bytes: 12000        # per tool result
+      head_ratio: 0.6         # share of the budget kept from the start
+      spill: true             # write full outputs to .olca/tool_outputs/
+      summarize: false        # summarize long outputs with the model
+      summarize_model: gpt-4o-mini   # default: model_name
+      tools: [terminal]       # tools the budget applies to
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+DEFAULT_MAX_BYTES = 12000
+DEFAULT_HEAD_RATIO = 0.6
+DEFAULT_TOOLS = ["terminal"]
+SPILL_DIR = "tool_outputs"
+# Most of an output a summarizer is shown (head and tail beyond that)
+SUMMARIZE_INPUT_BYTES = 100000
+
+SUMMARY_PROMPT = (
+    "Summarize this command output for an agent that will decide its next step. "
+    "Keep errors, warnings, counts, file paths and the final status verbatim. "
+    "Answer in at most {max_bytes} bytes of plain text."
+)
+
+
+class OutputBudget:
+    """Caps tool results at ``max_bytes``; see the module docstring"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, head_ratio: float = DEFAULT_HEAD_RATIO,
+                 spill_dir: Optional[str] = None, summarizer: Callable[[str, int], str] = None,
+                 tools: List[str] = None, summarize: bool = None):
+        if max_bytes <= 0:
+            raise ValueError(f"tool_output.max_bytes must be positive, got {max_bytes}")
+        if not 0 <= head_ratio <= 1:
+            raise ValueError(f"tool_output.head_ratio must be between 0 and 1, got {head_ratio}")
+        self.max_bytes = max_bytes
+        self.head_ratio = head_ratio
+        self.spill_dir = spill_dir
+        self.summarizer = summarizer
+        # Whether a summarizer should be attached (olca does, with the model)
+        self.summarize = summarizer is not None if summarize is None else summarize
+        self.tools = list(DEFAULT_TOOLS if tools is None else tools)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings: Any, olca_dir: str = ".olca") -> Optional["OutputBudget"]:
+        """Budget from the ``tool_output`` entry of olca.yml; None when it is false"""
+        if settings is False:
+            return None
+        settings = settings if isinstance(settings, dict) else {}
+        return cls(
+            max_bytes=int(settings.get("max_bytes", DEFAULT_MAX_BYTES)),
+            head_ratio=float(settings.get("head_ratio", DEFAULT_HEAD_RATIO)),
+            spill_dir=os.path.join(olca_dir, SPILL_DIR) if settings.get("spill", True) else None,
+            tools=settings.get("tools"),
+            summarize=bool(settings.get("summarize", False))
+        )
+
+    def _spill(self, tool_name: str, text: str) -> str:
+        with self._lock:
+            self._count += 1
+            count = self._count
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{count:03d}-{tool_name}.txt")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    @staticmethod
+    def head_tail(data: bytes, head_bytes: int, tail_bytes: int) -> tuple:
+        """(head, tail) texts of ``data``, cut back to line ends when one is near"""
+        head = data[:head_bytes]
+        newline = head.rfind(b"\n")
+        if newline >= head_bytes // 2:
+            head = head[:newline + 1]
+        tail = data[len(data) - tail_bytes:] if tail_bytes else b""
+        newline = tail.find(b"\n")
+        if 0 <= newline < tail_bytes // 2:
+            tail = tail[newline + 1:]
+        return head.decode("utf-8", errors="ignore"), tail.decode("utf-8", errors="ignore")
+
+    @staticmethod
+    def _marker(omitted: int, lines: int, total: int, note: str) -> str:
+        return f"\n[... {omitted} bytes, {lines} lines omitted of {total} bytes{note} ...]\n"
+
+    def truncate(self, text: str, note: str = "", max_bytes: int = None) -> str:
+        """Head and tail of ``text`` within ``max_bytes``, the middle replaced by a marker"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        data = text.encode("utf-8", errors="replace")
+        if len(data) <= max_bytes:
+            return text
+        # The marker's numbers are not known yet; at their largest it is never shorter
+        longest = self._marker(len(data), data.count(b"\n"), len(data), note)
+        room = max_bytes - len(longest.encode())
+        if room < 0:
+            # Not even the marker fits
+            return longest.encode()[:max(0, max_bytes)].decode("utf-8", errors="ignore")
+        head_bytes = int(room * self.head_ratio)
+        head, tail = self.head_tail(data, head_bytes, room - head_bytes)
+        omitted = data[len(head.encode()):len(data) - len(tail.encode())]
+        return head + self._marker(len(omitted), omitted.count(b"\n"), len(data), note) + tail
+
+    def apply(self, tool_name: str, output: Any) -> Any:
+        """The tool result to put in the message history"""
+        if tool_name not in self.tools or not isinstance(output, str):
+            return output
+        if len(output.encode("utf-8", errors="replace")) <= self.max_bytes:
+            return output
+        spill_path = self._spill(tool_name, output) if self.spill_dir else None
+        note = f"; full output: {spill_path}" if spill_path else ""
+
+        if self.summarizer is not None:
+            try:
+                header = f"[Summary of {len(output.encode())} bytes of output{note}]\n"
+                room = self.max_bytes - len(header.encode())
+                if room > 0:
+                    summary = self.summarizer(self.truncate(output, max_bytes=SUMMARIZE_INPUT_BYTES), room)
+                    return header + self.truncate(summary, max_bytes=room)
+            except Exception as e:
+                note += f"; summary failed: {type(e).__name__}"
+        return self.truncate(output, note)
+
+
+def model_summarizer(model) -> Callable[[str, int], str]:
+    """Summarizer calling a chat model, asked for at most ``max_bytes``"""
+    def summarize(text: str, max_bytes: int) -> str:
+        answer = model.invoke([("system", SUMMARY_PROMPT.format(max_bytes=max_bytes)), ("user", text)])
+        return answer.content if isinstance(answer.content, str) else str(answer.content)
+    return summarize
+
+
+def budget_tools(tools: List[Any], budget: OutputBudget) -> List[Any]:
+    """Wrap the tools the budget applies to; the others are returned as they are"""
+    from langchain_core.tools import StructuredTool
+
+    def wrap(tool):
+        def run(**kwargs):
+            # The inner call is the same tool run: keep it out of the callbacks
+            return budget.apply(tool.name, tool.invoke(kwargs, config={"callbacks": []}))
+        return StructuredTool.from_function(func=run, name=tool.name, description=tool.description,
+                                            args_schema=tool.args_schema)
+
+    return [wrap(tool) if tool.name in budget.tools else tool for tool in tools]
@@ -0,0 +1,144 @@
+"""
+🚰 In-memory inference → ABC → render pipeline
+==============================================
+
+The file-based path writes ``musical.yml``, lets inference write one JSON file
+per prompt, reads each back for its ``generated_text``, writes a ``.txt`` and
+an ``.abc`` and only then renders.  Here each stage is a generator consuming
+the previous one, so a response is parsed and its tune handed to a render
+worker as soon as its request completes::
+
+    prompts ──▶ responses ──▶ validated ABC ──▶ render batches ──▶ results
+
+Only the ``.abc`` and its renders are written; the JSON responses and the
+``.txt`` of the generated text are kept only with ``persist_responses``.
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from .abc import parse as parse_abc
+from .abc_validation import select_best_tune
+from .batch_render import RenderBatcher
+from .inference_driver import output_path
+from .render_cache import RenderCache
+
+
+def extract_tunes(entries: Iterable[Dict[str, Any]], extract_abc_from_text: Callable = None,
+                  persist_text: bool = False) -> Iterator[Dict[str, Any]]:
+    """Attach the best valid ABC tune of each response as ``abc`` (or an ``error``) and its ``validation``"""
+    if extract_abc_from_text is None:
+        from jgcmlib.jgcmhelper import extract_abc_from_text
+
+    for entry in entries:
+        entry = dict(entry)
+        if entry.get('error'):
+            yield entry
+            continue
+        generated_text = (entry.get('response') or {}).get('generated_text', '')
+        if persist_text and entry.get('path'):
+            with open(os.path.splitext(entry['path'])[0] + '.txt', 'w') as f:
+                f.write(generated_text)
+        candidates = parse_abc(generated_text).tunes or extract_abc_from_text(generated_text)
+        if not candidates:
+            entry['error'] = 'no ABC notation in the generated text'
+            yield entry
+            continue
+        # Hopeless tunes stop here, before abc2midi and MuseScore are spawned
+        entry['abc'], entry['validation'] = select_best_tune(candidates)
+        if entry['abc'] is None:
+            codes = ', '.join(issue['code'] for issue in entry['validation']['errors'])
+            entry['error'] = f"invalid ABC ({codes})"
+        yield entry
+
+
+def render_tunes(entries: Iterable[Dict[str, Any]], musical: Dict[str, Any], output_dir: str = '.',
+                 jobs: int = 0, score_ext: str = "jpg", use_render_cache: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Write tunes as they arrive and render them in batches; yields results as they are ready
+
+    Tunes that arrive while a batch renders make up the next batch, so
+    abc2midi and MuseScore start once per batch rather than once per tune,
+    and rendering still overlaps inference.  ``jobs`` batches may render at
+    the same time (default: one).
+    """
+    render_cache = RenderCache(enabled=use_render_cache)
+
+    def render_batch(abc_files):
+        hits = []
+        outputs = render_cache.render_many(abc_files, score_ext=score_ext, hits=hits)
+        return list(zip(outputs, hits))
+
+    pending = []
+    with RenderBatcher(render_batch, workers=jobs if jobs > 0 else 1) as batcher:
+        for entry in entries:
+            result = {'prompt_id': entry['prompt_id'], 'json_file': entry.get('path'), 'ok': False}
+            if entry.get('validation'):
+                result['validation'] = entry['validation']
+            if entry.get('error'):
+                result.update(error=entry['error'], elapsed=0.0)
+                yield result
+                continue
+            abc_file = os.path.splitext(output_path(musical, entry['prompt_id'], output_dir))[0] + '.abc'
+            with open(abc_file, 'w') as f:
+                f.write(entry['abc'])
+            result['abc_file'] = abc_file
+            pending.append((result, time.time(), batcher.submit(abc_file)))
+            # Hand back what already finished without waiting for inference to end
+            while pending and pending[0][2].done():
+                yield _render_result(*pending.pop(0))
+        for item in pending:
+            yield _render_result(*item)
+
+
+def _render_result(result: Dict[str, Any], start_time: float, future) -> Dict[str, Any]:
+    try:
+        outputs, cached = future.result()
+        if outputs:
+            score_path, audio_path, midi_path = outputs
+            result.update(ok=True, midi_file=midi_path, audio_file=audio_path,
+                          score_file=score_path, cached=cached)
+        else:
+            result['error'] = f"rendering {result['abc_file']} failed"
+    except Exception as e:
+        result['error'] = str(e)
+    result['elapsed'] = time.time() - start_time
+    return result
+
+
+def run_pipeline(driver, musical_config: Dict[str, Any], output_dir: str = '.', persist_responses: bool = False,
+                 jobs: int = 0, score_ext: str = "jpg", use_render_cache: bool = True,
+                 extract_abc_from_text: Callable = None) -> Iterator[Dict[str, Any]]:
+    """Chain driver responses → extracted tunes → renders, all in memory"""
+    responses = driver.iter_results(musical_config, output_dir if persist_responses else None)
+    tunes = extract_tunes(responses, extract_abc_from_text, persist_text=persist_responses)
+    return render_tunes(tunes, musical_config['musical'], output_dir, jobs, score_ext, use_render_cache)
+
+
+def run_musical_pipeline(musical_file: str = 'musical.yml', output_dir: str = '.', concurrency: int = 4,
+                         persist_responses: bool = False, jobs: int = 0, score_ext: str = "jpg",
+                         use_render_cache: bool = True,
+                         config_file: str = 'orpheus-config.yml') -> List[Dict[str, Any]]:
+    """
+    Boot the endpoint, stream every prompt of ``musical_file`` through the
+    pipeline, then pause unless kept alive; results follow prompt order
+    """
+    import yaml
+    from .link2abc_integration import HFEndpointManager
+
+    with open(musical_file, 'r') as f:
+        musical_config = yaml.safe_load(f)
+
+    hf_manager = HFEndpointManager(config_file)
+    try:
+        hf_manager.start_endpoint()
+        driver = hf_manager.create_inference_driver(concurrency)
+        results = list(run_pipeline(driver, musical_config, output_dir, persist_responses,
+                                    jobs, score_ext, use_render_cache))
+    finally:
+        if hf_manager.should_shutdown():
+            hf_manager.shutdown_endpoint()
+
+    order = list(musical_config['musical']['prompts'])
+    return sorted(results, key=lambda result: order.index(result['prompt_id']))
@@ -0,0 +1,266 @@
+"""
+🗄️ Content-addressed render cache for ABC → MIDI/audio/score conversion
+=======================================================================
+
+``pto_post_just_an_abc_file`` spawns abc2midi, MuseScore and ImageMagick for
+every call, even when the exact same tune was rendered a minute ago (Link2ABC
+re-submits pages, enhanced output often equals the original).  This cache keys
+rendered artifacts by a hash of the normalized ABC text plus render options,
+copies them in on a miss and hardlinks (or copies) them back on a hit.
+
+Layout::
+
+    ~/.cache/orpheuspypractice/render/
+    └── ab/abcdef.../
+        ├── manifest.json      # artifact roles, suffixes, size; mtime = last use
+        ├── score-1.svg
+        ├── audio.mp3
+        └── midi.mid
+
+Eviction is LRU on the manifest mtime, bounded by total size.
+
+Environment:
+    ORPHEUS_RENDER_CACHE_DIR      cache location
+    ORPHEUS_RENDER_CACHE_MAX_MB   size bound (default: 512)
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+CACHE_FORMAT_VERSION = 2
+DEFAULT_MAX_MB = 512
+
+# Order of the tuple returned by pto_post_just_an_abc_file
+ARTIFACT_ROLES = ('score', 'audio', 'midi')
+
+
+def default_cache_dir() -> str:
+    return os.getenv(
+        "ORPHEUS_RENDER_CACHE_DIR",
+        os.path.join(os.getenv("HOME", "."), ".cache", "orpheuspypractice", "render")
+    )
+
+
+def normalize_abc(abc_content: str) -> str:
+    """
+    Normalize ABC text so that whitespace-only differences share a cache entry
+
+    A blank line ends a tune, so runs of blank lines collapse to one rather
+    than vanish.
+    """
+    lines = [line.rstrip() for line in abc_content.replace('\r\n', '\n').replace('\r', '\n').split('\n')]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip('\n')
+
+
+def _link_or_copy(src: str, dst: str):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered ABC artifacts"""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, enabled: bool = True):
+        self.cache_dir = cache_dir or default_cache_dir()
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("ORPHEUS_RENDER_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def cache_key(self, abc_content: str, **options) -> str:
+        """Hash of the normalized ABC text plus render options (e.g. score_ext)"""
+        payload = json.dumps({
+            'version': CACHE_FORMAT_VERSION,
+            'abc': normalize_abc(abc_content),
+            'options': options
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Return the entry manifest for ``key`` and mark it as recently used"""
+        manifest_file = os.path.join(self._entry_dir(key), 'manifest.json')
+        try:
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+            os.utime(manifest_file, None)
+            return manifest
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key: str, abc_file: str, artifacts: Dict[str, str]) -> bool:
+        """Store rendered artifacts of ``abc_file`` under ``key``"""
+        if not all(path and os.path.isfile(path) for path in artifacts.values()):
+            return False
+
+        abc_dir = os.path.dirname(os.path.abspath(abc_file))
+        stem = os.path.splitext(os.path.basename(abc_file))[0]
+        entry_dir = self._entry_dir(key)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+
+        # Build the entry next to its final location, then rename it into place
+        # so concurrent workers never observe a half-written entry.
+        staging_dir = tempfile.mkdtemp(prefix=f".{key[:8]}-", dir=os.path.dirname(entry_dir))
+        manifest = {'artifacts': {}, 'size': 0, 'created_at': time.time()}
+        try:
+            for role, path in artifacts.items():
+                name = os.path.basename(path)
+                suffix = name[len(stem):] if name.startswith(stem) else os.path.splitext(name)[1]
+                cached_name = f"{role}{suffix}"
+                # A copy: renderers overwrite their outputs in place, which
+                # would rewrite a linked entry along with them
+                shutil.copy2(path, os.path.join(staging_dir, cached_name))
+                manifest['artifacts'][role] = {
+                    'file': cached_name,
+                    'suffix': suffix,
+                    'subdir': os.path.relpath(os.path.dirname(os.path.abspath(path)), abc_dir)
+                }
+                manifest['size'] += os.path.getsize(path)
+            with open(os.path.join(staging_dir, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging_dir, entry_dir)
+        except OSError:
+            # Another worker stored the same key first
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return False
+
+        self.evict()
+        return True
+
+    def materialize(self, key: str, manifest: Dict, abc_file: str) -> Dict[str, str]:
+        """
+        Hardlink or copy cached artifacts next to ``abc_file``
+
+        Targets are unlinked first, so a later render writing over them in
+        place leaves the entry alone.
+        """
+        abc_dir = os.path.dirname(abc_file)
+        stem = os.path.splitext(os.path.basename(abc_file))[0]
+        entry_dir = self._entry_dir(key)
+        paths = {}
+        for role, info in manifest['artifacts'].items():
+            target_dir = os.path.normpath(os.path.join(abc_dir, info['subdir']))
+            os.makedirs(target_dir, exist_ok=True)
+            target = os.path.join(target_dir, f"{stem}{info['suffix']}")
+            _link_or_copy(os.path.join(entry_dir, info['file']), target)
+            paths[role] = target
+        return paths
+
+    def render(self, abc_file: str, score_ext: str = "svg",
+               render_func: Callable = None) -> Tuple[str, str, str]:
+        """
+        Drop-in replacement for ``pto_post_just_an_abc_file``
+
+        Returns (score_path, audio_path, midi_path), from cache when possible.
+        """
+        if render_func is None:
+            from .batch_render import render_abc_file as render_func
+
+        if not self.enabled:
+            return render_func(abc_file, score_ext=score_ext)
+
+        with open(abc_file, 'r') as f:
+            key = self.cache_key(f.read(), score_ext=score_ext)
+
+        manifest = self.lookup(key)
+        if manifest:
+            try:
+                paths = self.materialize(key, manifest, abc_file)
+                self.hits += 1
+                return tuple(paths.get(role) for role in ARTIFACT_ROLES)
+            except (OSError, KeyError):
+                # Entry evicted underneath us or damaged: fall back to rendering
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+        self.misses += 1
+        outputs = render_func(abc_file, score_ext=score_ext)
+        if outputs:
+            self.store(key, abc_file, dict(zip(ARTIFACT_ROLES, outputs)))
+        return outputs
+
+    def render_many(self, abc_files: List[str], score_ext: str = "svg", batch_func: Callable = None,
+                    hits: List[bool] = None) -> List[Optional[Tuple[str, str, str]]]:
+        """
+        ``render`` for many files: cache hits are linked back, all misses go
+        to one ``batch_func`` call (default: ``batch_render.render_abc_files``)
+
+        Returns one (score_path, audio_path, midi_path) tuple, or None, per
+        file; ``hits``, when given, is filled with one cache-hit flag per file.
+        """
+        if batch_func is None:
+            from .batch_render import render_abc_files as batch_func
+
+        results = [None] * len(abc_files)
+        if hits is not None:
+            hits[:] = [False] * len(abc_files)
+        keys = {}
+        misses = []
+        for index, abc_file in enumerate(abc_files):
+            if self.enabled:
+                with open(abc_file, 'r') as f:
+                    keys[index] = self.cache_key(f.read(), score_ext=score_ext)
+                manifest = self.lookup(keys[index])
+                if manifest:
+                    try:
+                        paths = self.materialize(keys[index], manifest, abc_file)
+                        self.hits += 1
+                        results[index] = tuple(paths.get(role) for role in ARTIFACT_ROLES)
+                        if hits is not None:
+                            hits[index] = True
+                        continue
+                    except (OSError, KeyError):
+                        shutil.rmtree(self._entry_dir(keys[index]), ignore_errors=True)
+            misses.append(index)
+
+        self.misses += len(misses)
+        outputs = batch_func([abc_files[index] for index in misses], score_ext=score_ext) if misses else []
+        for index, output in zip(misses, outputs):
+            results[index] = output
+            if output and self.enabled:
+                self.store(keys[index], abc_files[index], dict(zip(ARTIFACT_ROLES, output)))
+        return results
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                if key.startswith('.'):
+                    continue
+                manifest_file = os.path.join(prefix_dir, key, 'manifest.json')
+                try:
+                    with open(manifest_file, 'r') as f:
+                        size = json.load(f).get('size', 0)
+                    yield os.path.getmtime(manifest_file), size, os.path.join(prefix_dir, key)
+                except (OSError, ValueError):
+                    continue
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits ``max_bytes``"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
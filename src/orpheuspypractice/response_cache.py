@@ -0,0 +1,133 @@
+"""
+💬 Prompt-level response cache for ChatMusician enhancements
+===========================================================
+
+``MusicalPromptManager.create_enhancement_prompt`` is deterministic, and
+Link2ABC reruns keep asking to enhance the very same ABC.  This cache keeps
+each endpoint response keyed by model repository, prompt text and generation
+parameters, so a repeated enhancement costs nothing and, when every piece of
+a batch hits, the endpoint is never booted.
+
+Layout::
+
+    ~/.cache/orpheuspypractice/responses/
+    └── ab/abcdef....json      # {"created_at", "repository", "response"}; mtime = last use
+
+Entries expire after a TTL; beyond the size bound the least recently used
+ones are evicted.
+
+Environment:
+    ORPHEUS_RESPONSE_CACHE_DIR      cache location
+    ORPHEUS_RESPONSE_CACHE_TTL      entry lifetime in seconds (default: 30 days)
+    ORPHEUS_RESPONSE_CACHE_MAX_MB   size bound (default: 64)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MAX_MB = 64
+
+
+def default_cache_dir() -> str:
+    return os.getenv(
+        "ORPHEUS_RESPONSE_CACHE_DIR",
+        os.path.join(os.getenv("HOME", "."), ".cache", "orpheuspypractice", "responses")
+    )
+
+
+class ResponseCache:
+    """TTL- and size-bounded cache of endpoint responses per prompt"""
+
+    def __init__(self, cache_dir: str = None, ttl: float = None, max_bytes: int = None,
+                 enabled: bool = True):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.ttl = ttl if ttl is not None else float(os.getenv("ORPHEUS_RESPONSE_CACHE_TTL", DEFAULT_TTL))
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("ORPHEUS_RESPONSE_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def cache_key(self, repository: str, prompt: str, parameters: Dict[str, Any] = None) -> str:
+        """Hash of the model repository, exact prompt text and generation parameters"""
+        payload = json.dumps({
+            'version': CACHE_FORMAT_VERSION,
+            'repository': repository,
+            'prompt': prompt,
+            'parameters': parameters or {}
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response for ``key``, or None when missing, expired or disabled"""
+        if not self.enabled:
+            return None
+        entry_file = self._entry_file(key)
+        try:
+            with open(entry_file, 'r') as f:
+                entry = json.load(f)
+            if time.time() - entry['created_at'] > self.ttl:
+                os.remove(entry_file)
+                raise KeyError(key)
+            os.utime(entry_file, None)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['response']
+
+    def put(self, key: str, response: Dict[str, Any], repository: str = None):
+        if not self.enabled:
+            return
+        entry_file = self._entry_file(key)
+        os.makedirs(os.path.dirname(entry_file), exist_ok=True)
+        # Write next to the final name and rename, so readers never see half an entry
+        fd, tmp_file = tempfile.mkstemp(prefix=f".{key[:8]}-", dir=os.path.dirname(entry_file))
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'created_at': time.time(), 'repository': repository, 'response': response}, f)
+        os.replace(tmp_file, entry_file)
+        self.evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name.startswith('.'):
+                    continue
+                entry_file = os.path.join(prefix_dir, name)
+                try:
+                    stat = os.stat(entry_file)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry_file
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits ``max_bytes``"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_file in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry_file)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -0,0 +1,232 @@
+"""
+⏱️ Cold-start benchmark for orpheuspypractice console scripts
+============================================================
+
+Every console script resolves ``module:attr`` in a fresh interpreter before a
+single argument is parsed.  This module measures exactly that cost for each
+entry point, in a clean subprocess, and reports which heavy dependencies got
+dragged in along the way.
+
+Commands that must return at once without any work to do (``olca --help``,
+configuration errors) are measured the same way, running the entry point in
+a scratch directory.
+
+Usage:
+    obench-startup                         # all entry points, table output
+    obench-startup odep oenhance -n 10     # only some entry points
+    obench-startup --commands              # entry points and COMMANDS
+    obench-startup "olca --help"           # one command
+    obench-startup --output bench.json     # record results as JSON
+    obench-startup --max-ms 150            # exit 1 if any entry point is slower
+"""
+
+import argparse
+import json
+import statistics
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# Mirrors the console_scripts table of setup.py
+ENTRY_POINTS = {
+    "oabc": ("orpheuspypractice", "jgabcli_main"),
+    "omid2score": ("orpheuspypractice", "jgabcli_main_mid2score"),
+    "osay_hello_orpheuspypractice": ("orpheuspypractice", "say_hello"),
+    "olca": ("orpheuspypractice.olca", "main"),
+    "oiv": ("orpheuspypractice.oiv", "main"),
+    "odep": ("orpheuspypractice.dependency_action", "main"),
+    "ohfi": ("orpheuspypractice", "jgthfcli_main"),
+    "wfohfi_then_oabc_foreach_json_files": ("orpheuspypractice", "wfohfi_then_oabc_foreach_json_files"),
+    "oenhance": ("orpheuspypractice.link2abc_cli", "main"),
+    "obatch-enhance": ("orpheuspypractice.link2abc_cli", "main_batch_enhance"),
+    "obench-startup": ("orpheuspypractice.startup_benchmark", "main"),
+}
+
+# Invocations that must not pay for the heavy stacks: (module, attr, argv,
+# files written to the scratch working directory)
+COMMANDS = {
+    "olca --help": ("orpheuspypractice.olca", "main", ["--help"], {}),
+    "olca init (config exists)": ("orpheuspypractice.olca", "main", ["init"], {"olca.yml": "model_name: gpt-4o-mini\n"}),
+    "olca (tracing without key)": ("orpheuspypractice.olca", "main", [], {"olca.yml": "tracing: true\n"}),
+    "olca (API key missing)": ("orpheuspypractice.olca", "main", [], {"olca.yml": "api_keyname: OBENCH_UNSET_KEY\n"}),
+}
+
+# Removed from the environment of COMMANDS so no run reaches a remote service
+SECRET_VARIABLES = ["OPENAI_API_KEY", "LANGCHAIN_API_KEY", "LANGSMITH_API_KEY", "LANGCHAIN_TRACING_V2"]
+
+# Top-level packages whose presence in sys.modules means a slow start
+HEAVY_MODULES = [
+    "music21",
+    "huggingface_hub",
+    "jgcmlib",
+    "jghfmanager",
+    "langchain",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_community",
+    "langgraph",
+    "langsmith",
+    "numpy",
+    "pandas",
+]
+
+_PROBE = """
+import sys, time, json, importlib
+start = time.perf_counter()
+error = None
+try:
+    module = importlib.import_module(sys.argv[1])
+    getattr(module, sys.argv[2])
+except BaseException as e:
+    error = f"{type(e).__name__}: {e}"
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in sys.argv[3].split(",") if m in sys.modules)
+print(json.dumps({"import_s": elapsed, "heavy_modules": heavy, "error": error}))
+"""
+
+# Same as _PROBE, but calls the entry point with argv; stdout is swallowed
+_COMMAND_PROBE = """
+import sys, time, json, importlib, io, contextlib
+module, attr, heavy_names, argv = sys.argv[1], sys.argv[2], sys.argv[3], json.loads(sys.argv[4])
+sys.argv = [attr] + argv
+start = time.perf_counter()
+error = None
+exit_code = 0
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        getattr(importlib.import_module(module), attr)()
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in heavy_names.split(",") if m in sys.modules)
+print(json.dumps({"import_s": elapsed, "heavy_modules": heavy, "error": error, "exit_code": exit_code}))
+"""
+
+
+def _measure(command: List[str], repeat: int, cwd: str = None, env: Dict[str, str] = None) -> Dict:
+    import_times = []
+    process_times = []
+    probe = {}
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(command, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        process_times.append(time.perf_counter() - start)
+        lines = proc.stdout.strip().splitlines()
+        if not lines:
+            probe = {"error": proc.stderr.strip() or f"exit code {proc.returncode}", "heavy_modules": []}
+            break
+        probe = json.loads(lines[-1])
+        import_times.append(probe["import_s"])
+
+    return {
+        "import_ms": 1000 * statistics.median(import_times) if import_times else None,
+        "process_ms": 1000 * statistics.median(process_times),
+        "heavy_modules": probe.get("heavy_modules", []),
+        "error": probe.get("error"),
+        "exit_code": probe.get("exit_code"),
+        "repeat": repeat,
+    }
+
+
+def measure_entry_point(module: str, attr: str, repeat: int = 5) -> Dict:
+    """Resolve ``module:attr`` in ``repeat`` fresh interpreters and time it"""
+    result = _measure([sys.executable, "-c", _PROBE, module, attr, ",".join(HEAVY_MODULES)], repeat)
+    result.pop("exit_code")
+    return dict(result, target=f"{module}:{attr}")
+
+
+def measure_command(name: str, repeat: int = 5) -> Dict:
+    """
+    Run one of ``COMMANDS`` in ``repeat`` fresh interpreters; ``import_ms`` is
+    the time from importing the module to the entry point's return or exit
+    """
+    module, attr, argv, files = COMMANDS[name]
+    # The package must stay importable from the scratch directory
+    env = {key: value for key, value in os.environ.items() if key not in SECRET_VARIABLES}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                      env.get("PYTHONPATH")]))
+    with tempfile.TemporaryDirectory(prefix="obench-") as work_dir:
+        for filename, content in files.items():
+            with open(os.path.join(work_dir, filename), "w") as f:
+                f.write(content)
+        result = _measure([sys.executable, "-c", _COMMAND_PROBE, module, attr, ",".join(HEAVY_MODULES),
+                           json.dumps(argv)], repeat, cwd=work_dir, env=env)
+    return dict(result, target=f"{module}:{attr} {' '.join(argv)}".strip())
+
+
+def run_benchmark(names: List[str] = None, repeat: int = 5) -> Dict[str, Dict]:
+    """Benchmark the given console scripts and commands (all entry points by default)"""
+    names = names or list(ENTRY_POINTS)
+    results = {}
+    for name in names:
+        if name in COMMANDS:
+            results[name] = measure_command(name, repeat=repeat)
+        else:
+            module, attr = ENTRY_POINTS[name]
+            results[name] = measure_entry_point(module, attr, repeat=repeat)
+    return results
+
+
+def format_results(results: Dict[str, Dict]) -> str:
+    """Render benchmark results as a plain-text table"""
+    lines = [f"{'entry point':<38} {'import ms':>10} {'process ms':>11}  heavy modules / error"]
+    for name, res in results.items():
+        import_ms = f"{res['import_ms']:.1f}" if res['import_ms'] is not None else "-"
+        detail = res['error'] or ", ".join(res['heavy_modules']) or "-"
+        lines.append(f"{name:<38} {import_ms:>10} {res['process_ms']:>11.1f}  {detail}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='obench-startup',
+        description='⏱️ Measure cold-start time of orpheuspypractice console scripts'
+    )
+    parser.add_argument('entry_points', nargs='*',
+                        help=f"Entry points or commands to measure (default: all entry points): "
+                             f"{', '.join(list(ENTRY_POINTS) + list(COMMANDS))}")
+    parser.add_argument('--commands', action='store_true',
+                        help='Measure every command of COMMANDS as well')
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='Fresh interpreters per entry point (default: 5)')
+    parser.add_argument('--output', type=str, help='Write results to this JSON file')
+    parser.add_argument('--max-ms', type=float, default=0.0,
+                        help='Fail if any import time exceeds this many milliseconds')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.entry_points if name not in ENTRY_POINTS and name not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown entry point(s): {', '.join(unknown)}")
+
+    names = args.entry_points or list(ENTRY_POINTS)
+    if args.commands:
+        names += [name for name in COMMANDS if name not in names]
+    results = run_benchmark(names, repeat=args.repeat)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results
+            }, f, indent=2)
+        print(f"📊 Results written to {args.output}")
+
+    if args.max_ms > 0:
+        slow = [name for name, res in results.items()
+                if res['import_ms'] is not None and res['import_ms'] > args.max_ms]
+        if slow:
+            print(f"❌ Slower than {args.max_ms:.0f}ms: {', '.join(slow)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
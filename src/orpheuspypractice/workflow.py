@@ -0,0 +1,234 @@
+"""
+🌊 Inference-then-convert workflow
+=================================
+
+Implementation of ``wfohfi_then_oabc_foreach_json_files``: run the ``ohfi``
+inferences, then convert every JSON file they produced to ABC, MIDI, audio
+and score.  The files to convert come from the inference manifest, not from
+a scan of the current directory, so the master collection file and stale
+results of earlier runs are left alone.  All files are rendered in one batch
+(``batch_render``) so abc2midi, MuseScore and ImageMagick start once, not once
+per file; ``--no-batch-render`` converts each file on its own in a process
+pool (``--jobs``).  With ``--concurrency`` the responses never go through JSON
+files at all: see ``pipeline``.
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from .display_pool import worker_displays
+from .render_cache import RenderCache
+
+
+def convert_json_file(json_file: str, score_ext: str = "jpg", use_render_cache: bool = True) -> Dict[str, Any]:
+    """Convert one inference JSON file to ABC and all media formats"""
+    from jgcmlib.jgabcli import extract_abc_from_json_to_abc_file
+
+    start_time = time.time()
+    try:
+        abc_filename = extract_abc_from_json_to_abc_file(json_file)
+        render_cache = RenderCache(enabled=use_render_cache)
+        score_path, audio_path, midi_path = render_cache.render(abc_filename, score_ext=score_ext)
+        return {
+            'json_file': json_file,
+            'ok': True,
+            'abc_file': abc_filename,
+            'midi_file': midi_path,
+            'audio_file': audio_path,
+            'score_file': score_path,
+            'cached': render_cache.hits > 0,
+            'elapsed': time.time() - start_time
+        }
+    except Exception as e:
+        return {
+            'json_file': json_file,
+            'ok': False,
+            'error': str(e),
+            'elapsed': time.time() - start_time
+        }
+
+
+def convert_json_files_batch(json_files: List[str], jobs: int = 0, score_ext: str = "jpg",
+                             use_render_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Convert JSON files to media with one abc2midi and one MuseScore run per batch
+
+    The files are split into ``jobs`` batches rendered side by side
+    (``jobs <= 0``: a single batch, so MuseScore starts only once).  Results
+    come back in sorted file order.
+    """
+    from jgcmlib.jgabcli import extract_abc_from_json_to_abc_file
+
+    json_files = sorted(json_files)
+    start_time = time.time()
+    results = []
+    abc_files = {}
+    for index, json_file in enumerate(json_files):
+        results.append({'json_file': json_file, 'ok': False})
+        try:
+            abc_files[index] = extract_abc_from_json_to_abc_file(json_file)
+        except Exception as e:
+            results[index].update(error=str(e), elapsed=0.0)
+
+    indexes = list(abc_files)
+    batches = max(1, min(jobs, len(indexes)))
+    chunks = [indexes[start::batches] for start in range(batches)]
+    print(f"Rendering {len(indexes)} ABC files in {batches} batch{'es' if batches > 1 else ''}")
+    render_cache = RenderCache(enabled=use_render_cache)
+
+    def render_chunk(chunk):
+        hits = []
+        outputs = render_cache.render_many([abc_files[index] for index in chunk], score_ext=score_ext, hits=hits)
+        return list(zip(chunk, outputs, hits))
+
+    with ThreadPoolExecutor(max_workers=batches) as executor:
+        for chunk_results in executor.map(render_chunk, [chunk for chunk in chunks if chunk]):
+            for index, outputs, cached in chunk_results:
+                result = results[index]
+                result['abc_file'] = abc_files[index]
+                if outputs:
+                    score_path, audio_path, midi_path = outputs
+                    result.update(ok=True, midi_file=midi_path, audio_file=audio_path,
+                                  score_file=score_path, cached=cached)
+                else:
+                    result['error'] = f"rendering {abc_files[index]} failed"
+                # Per-file times are not known inside a batch: report the batch's
+                result['elapsed'] = time.time() - start_time
+    return results
+
+
+def convert_json_files(json_files: List[str], jobs: int = 0, score_ext: str = "jpg",
+                       use_render_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Convert JSON files to media, ``jobs`` files at a time
+
+    Files are processed in sorted order and results come back in that same
+    order whatever the completion order, so output layout and summary are
+    deterministic.  ``jobs <= 0`` means one worker per CPU core.
+    """
+    json_files = sorted(json_files)
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    jobs = min(jobs, len(json_files))
+
+    if jobs <= 1:
+        results = []
+        for json_file in json_files:
+            print(f"Processing {json_file}")
+            results.append(convert_json_file(json_file, score_ext, use_render_cache))
+        return results
+
+    print(f"Processing {len(json_files)} JSON files with {jobs} workers")
+    # Each worker renders on a display of its own, owned by this process
+    with worker_displays(jobs) as displays:
+        environments = multiprocessing.Queue()
+        for variables in displays:
+            environments.put(variables)
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_use_display,
+                                 initargs=(environments,)) as executor:
+            futures = [executor.submit(convert_json_file, json_file, score_ext, use_render_cache)
+                       for json_file in json_files]
+            results = []
+            for json_file, future in zip(json_files, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # A crashed worker still gets its line in the summary
+                    results.append({'json_file': json_file, 'ok': False, 'error': f"worker failed: {e}",
+                                    'elapsed': 0.0})
+    return results
+
+
+def _use_display(environments):
+    os.environ.update(environments.get())
+
+
+def print_conversion_summary(results: List[Dict[str, Any]]):
+    """Print a per-file summary of successes and failures"""
+    print("\n📊 Conversion summary:")
+    for result in results:
+        if result['ok']:
+            cached = ", cached render" if result.get('cached') else ""
+            print(f"✅ {result.get('json_file') or result['prompt_id']} -> {result['abc_file']} ({result['elapsed']:.1f}s{cached})")
+        else:
+            print(f"❌ {result.get('json_file') or result['prompt_id']}: {result['error']}")
+    successful = len([r for r in results if r['ok']])
+    print(f"✅ Successful: {successful}/{len(results)}")
+
+
+def run_inferences(musical_file: str = 'musical.yml', concurrency: int = 0) -> List[Dict[str, Any]]:
+    """Run every prompt of ``musical_file`` in the current directory; returns the manifest"""
+    from .inference_driver import clear_outputs, manifest_from_outputs, run_musical_inference
+
+    if concurrency > 0:
+        return run_musical_inference(musical_file, '.', concurrency=concurrency)
+
+    import yaml
+    from jghfmanager.jgthfcli import main as jgthfcli_main
+
+    with open(musical_file, 'r') as f:
+        musical_config = yaml.safe_load(f)
+    clear_outputs(musical_config, '.')
+    start_time = time.time()
+    jgthfcli_main()
+    return manifest_from_outputs(musical_config, '.', time.time() - start_time)
+
+
+def wfohfi_then_oabc_foreach_json_files(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='wfohfi_then_oabc_foreach_json_files',
+        description='Run the musical.yml inferences, then convert each result to ABC, MIDI, audio and score'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=0,
+        help='Number of render batches run in parallel (default: 1); with --no-batch-render, '
+             'number of JSON files converted in parallel (default: number of CPU cores)'
+    )
+    parser.add_argument(
+        '--no-batch-render',
+        action='store_true',
+        help='Render each file with its own abc2midi/MuseScore processes instead of in batches'
+    )
+    parser.add_argument(
+        '--no-render-cache',
+        action='store_true',
+        help='Always re-render instead of reusing cached MIDI/audio/score files'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=0,
+        help='Run inferences through the thread-pool driver with N requests in flight and convert '
+             'responses in memory as they arrive (default: 0, use ohfi)'
+    )
+    parser.add_argument(
+        '--keep-json',
+        action='store_true',
+        help='With --concurrency, also write the JSON responses and generated text files'
+    )
+    args = parser.parse_args(argv)
+
+    if args.concurrency > 0:
+        from .pipeline import run_musical_pipeline
+        print("Run Inferences and convert each response to abc as soon as it arrives.")
+        results = run_musical_pipeline('musical.yml', '.', args.concurrency, persist_responses=args.keep_json,
+                                       jobs=args.jobs, score_ext="jpg", use_render_cache=not args.no_render_cache)
+        print_conversion_summary(results)
+        return results
+
+    print("Run Inferences then convert to abc commands foreach json file they produced.")
+    manifest = run_inferences()
+    for entry in manifest:
+        if not entry['path']:
+            print(f"❌ {entry['prompt_id']}: {entry['error']}")
+
+    json_files = [entry['path'] for entry in manifest if entry['path']]
+    convert = convert_json_files if args.no_batch_render else convert_json_files_batch
+    results = convert(json_files, jobs=args.jobs, score_ext="jpg", use_render_cache=not args.no_render_cache)
+    print_conversion_summary(results)
+    return results
@@ -0,0 +1,69 @@
+import unittest
+import os
+from orpheuspypractice.abc import parse, parse_file, parse_tune, normalize
+
+SAMPLES = os.path.join(os.path.dirname(__file__), '..', 'samples')
+
+ANSWER = """Here is your tune:
+X:1
+T:First
+M:3/4
+L:1/8
+K:G
+V:1 clef=treble
+|: "G" G2 B2 d2 | "D7" A2 [K:D] F2 D2 :|1 "G" G6 :|2 "C" c6 |]
+
+Some commentary.
+X:7
+T:Second
+K:Am
+"^intro" A2 B2 | c4 |]
+"""
+
+
+class TestAbcParser(unittest.TestCase):
+  def test_book_is_indexed_by_x_number(self):
+    book = parse(ANSWER)
+    self.assertEqual([tune.number for tune in book], [1, 7])
+    self.assertEqual(book[7].title, "Second")
+    self.assertIsNone(book.get(2))
+    self.assertEqual(book.preamble, "Here is your tune:\n")
+
+  def test_header_voices_bars_and_chords(self):
+    tune = parse(ANSWER)[1]
+    self.assertEqual((tune.meter, tune.unit_length, tune.key), ("3/4", "1/8", "G"))
+    self.assertEqual(tune.voices, {'1': 'clef=treble'})
+    self.assertEqual([bar.strip() for bar in tune.bars()],
+                     ['"G" G2 B2 d2', '"D7" A2 [K:D] F2 D2', '"G" G6', '"C" c6'])
+    self.assertEqual([(tune.bar_index(position), symbol) for position, symbol in tune.chords],
+                     [(0, 'G'), (1, 'D7'), (2, 'G'), (3, 'C')])
+    # Annotations are not chord symbols
+    self.assertEqual(parse(ANSWER)[7].chords, [])
+
+  def test_volta_brackets(self):
+    for ending in (":|[1 c2 d2 | [2 e2 f2 |]", ":| [1 c2 d2 :| [2 e2 f2 |]", ":|1 c2 d2 :|2 e2 f2 |]"):
+      tune = parse_tune(f"X:1\nK:C\n|: A2 B2 {ending}\n")
+      self.assertEqual([bar.strip() for bar in tune.bars()], ['A2 B2', 'c2 d2', 'e2 f2'], ending)
+
+  def test_fragment_without_x_and_normalize(self):
+    tune = parse_tune("T:Loose\nK:C\nCDEF|\n")
+    self.assertIsNone(tune.number)
+    self.assertEqual(tune.title, "Loose")
+    self.assertIsNone(parse_tune("no music here"))
+    # Fields before the first X: without a K: are the file header
+    book = parse("M:6/8\n%%MIDI program 1\nX:1\nK:C\nC|\n")
+    self.assertEqual([tune.number for tune in book], [1])
+    self.assertEqual(book.preamble, "M:6/8\n%%MIDI program 1\n")
+    self.assertEqual(normalize("Hi!\nX:1  \nT:A\nK:C\nC|  \n\n"), "X:1\nT:A\nK:C\nC|")
+    self.assertEqual(parse_tune("X:1\nK:C\nC|\n").digest(), parse_tune("X:1 \r\nK:C\r\nC|  ").digest())
+
+  def test_samples(self):
+    for name in sorted(os.listdir(SAMPLES)):
+      if name.endswith('.abc'):
+        book = parse_file(os.path.join(SAMPLES, name))
+        self.assertEqual(len(book), 1)
+        self.assertTrue(book[1].key and book[1].bars())
+
+
+if __name__ == '__main__':
+  unittest.main()
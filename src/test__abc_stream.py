@@ -0,0 +1,55 @@
+import unittest
+from orpheuspypractice.abc_stream import AbcTuneDetector
+
+TUNE = "X:1\nT:Stream\nM:4/4\nL:1/4\nK:C\nC D E F | G A B c |\nc B A G | F E D C |]\n"
+ANSWER = "Here is the enhanced tune:\n" + TUNE + "\nThis arrangement adds a second phrase."
+
+
+def _feed(detector, text, size):
+  """Feed ``text`` in chunks of ``size``; the index of the chunk completing a tune"""
+  for index in range(0, len(text), size):
+    if detector.feed(text[index:index + size]) is not None:
+      return index
+  return None
+
+
+class TestAbcTuneDetector(unittest.TestCase):
+  def test_tune_split_across_chunks(self):
+    for size in (1, 3, 7, 64):
+      detector = AbcTuneDetector()
+      stopped_at = _feed(detector, ANSWER, size)
+      self.assertEqual(detector.tune, TUNE, size)
+      self.assertEqual(detector.generated_text, "Here is the enhanced tune:\n" + TUNE)
+      # Detected at the blank line, before the commentary was generated
+      self.assertLess(stopped_at, ANSWER.index("This arrangement"))
+
+  def test_header_split_mid_line(self):
+    detector = AbcTuneDetector()
+    for chunk in ("Sure!\nX", ":1", "\nT:Split\nK", ":G", "\nG A B c |", "]\n", "\n"):
+      detector.feed(chunk)
+    self.assertEqual(detector.tune, "X:1\nT:Split\nK:G\nG A B c |]\n")
+
+  def test_no_tune_before_a_blank_line(self):
+    detector = AbcTuneDetector()
+    # Blank lines inside the header and before any music do not end the tune
+    self.assertIsNone(_feed(detector, "X:1\nT:Open\n\nK:D\n\nD E F G |\n", 5))
+    self.assertIsNone(detector.tune)
+
+  def test_flush_ends_a_stream_without_trailing_newline(self):
+    detector = AbcTuneDetector()
+    _feed(detector, "Tune:\n" + TUNE.rstrip("\n"), 4)
+    self.assertIsNone(detector.tune)
+    self.assertEqual(detector.flush(), TUNE)
+    self.assertEqual(detector.generated_text, "Tune:\n" + TUNE)
+    self.assertEqual(detector.text, "Tune:\n" + TUNE.rstrip("\n"))
+
+    # Nothing to end: no header, or no music after K:
+    for text in ("Just prose", "X:1\nT:Header only\nK:C"):
+      detector = AbcTuneDetector()
+      detector.feed(text)
+      self.assertIsNone(detector.flush())
+      self.assertIsNone(detector.generated_text)
+
+
+if __name__ == '__main__':
+  unittest.main()
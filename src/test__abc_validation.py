@@ -0,0 +1,33 @@
+import unittest
+from orpheuspypractice.abc_validation import bar_duration, select_best_tune, validate_abc
+
+GOOD = "X:2\nT:Good\nM:6/8\nL:1/8\nK:D\nA | (3def d2 A FAd | [DFA]3 z3 :|\n"
+
+
+class TestAbcValidation(unittest.TestCase):
+  def test_bar_durations(self):
+    self.assertEqual(bar_duration("(3def d2 A FAd", compound=True)[0], 8)
+    self.assertEqual(bar_duration('"D" [DFA]3 z3')[0], 6)
+    self.assertEqual(bar_duration("A/B/ c>d e2")[0], 5)
+    self.assertTrue(bar_duration("Z4")[1])
+
+  def test_structured_reasons(self):
+    report = validate_abc("X:1\nT:Bad\nM:4/4\nL:1/4\nK:C\n|: A B c | d e f g a | [CE G2 |\n")
+    self.assertFalse(report['valid'])
+    codes = {issue['code'] for issue in report['errors']}
+    self.assertEqual(codes, {'unbalanced_repeats', 'unbalanced_chord'})
+    self.assertEqual(validate_abc("X:1\nT:No key\nA B c|\n")['errors'][0]['code'], 'missing_header')
+    self.assertEqual(validate_abc("just words")['errors'][0]['code'], 'no_tune')
+
+  def test_best_valid_candidate_wins(self):
+    abc, report = select_best_tune(["X:1\nT:Broken\nK:C\n\"Am A2|\n\n" + GOOD])
+    self.assertEqual(report['number'], 2)
+    self.assertTrue(abc.startswith("X:2\nT:Good"))
+    self.assertEqual([candidate['valid'] for candidate in report['candidates']], [False, True])
+    abc, report = select_best_tune(["X:1\nT:Empty\nK:C\n"])
+    self.assertIsNone(abc)
+    self.assertEqual(report['errors'][0]['code'], 'empty_body')
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import stat
+import sys
+import tempfile
+import threading
+from orpheuspypractice.batch_render import RenderBatcher, render_abc_files
+
+# Stand-ins for abc2midi and MuseScore that log their calls
+FAKE_ABC2MIDI = """import re, sys
+open('calls.log', 'a').write('abc2midi\\n')
+for number in re.findall(r'^X:(\\d+)', open(sys.argv[1]).read(), re.M):
+  open('book%s.mid' % number, 'w').write(number)
+"""
+FAKE_MUSESCORE = """import json, sys
+open(%r, 'a').write('musescore\\n')
+for job in json.load(open(sys.argv[2])):
+  for out in job['out']:
+    open(out[:-4] + '-1.svg' if out.endswith('.svg') else out, 'w').write(open(job['in']).read())
+"""
+
+
+class TestBatchRender(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.log = os.path.join(self.tmp.name, 'calls.log')
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def _tool(self, name, source):
+    path = os.path.join(self.tmp.name, name)
+    with open(path, 'w') as f:
+      f.write(f"#!{sys.executable}\n" + source)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+  def test_one_process_per_tool_and_outputs_map_back(self):
+    abc_files = []
+    for name in ('alpha', 'beta', 'gamma'):
+      abc_files.append(os.path.join(self.tmp.name, f"{name}.abc"))
+      with open(abc_files[-1], 'w') as f:
+        f.write(f"X:7\nT:{name}\nM:4/4\nL:1/4\nK:C\nCDEF|\n")
+    with open(os.path.join(self.tmp.name, 'broken.abc'), 'w') as f:
+      f.write("no music")
+    abc_files.insert(1, os.path.join(self.tmp.name, 'broken.abc'))
+
+    results = render_abc_files(
+      abc_files,
+      abc2midi_bin=self._tool('abc2midi', FAKE_ABC2MIDI.replace("'calls.log'", repr(self.log))),
+      musescore_bin=self._tool('musescore', FAKE_MUSESCORE % self.log),
+      fallback=lambda abc_file, score_ext: None
+    )
+    self.assertIsNone(results[1])
+    for index in (0, 2, 3):
+      stem = os.path.splitext(abc_files[index])[0]
+      outputs = results[index]
+      self.assertEqual(outputs, (f"{stem}.svg", f"{stem}.mp3", f"{stem}.mid"))
+    # Tune order in the book decides the X: number, and so the MIDI content
+    with open(results[3][2]) as f:
+      self.assertEqual(f.read(), '3')
+    with open(self.log) as f:
+      self.assertEqual(f.read().split(), ['abc2midi', 'musescore'])
+
+  def test_file_header_carried_and_multi_tune_files_rendered_alone(self):
+    abc_files = [os.path.join(self.tmp.name, name) for name in ('header.abc', 'medley.abc')]
+    with open(abc_files[0], 'w') as f:
+      f.write("%abc-2.1\nM:6/8\n%%MIDI program 40\n\nX:3\nT:Jig\nL:1/8\nK:D\nDEF GAB|\n")
+    with open(abc_files[1], 'w') as f:
+      f.write("X:1\nT:One\nK:C\nCDEF|\n\nX:2\nT:Two\nK:G\nGABc|\n")
+    books, alone = [], []
+    abc2midi = FAKE_ABC2MIDI.replace("'calls.log'", repr(self.log)) + f"open({self.log!r} + '.book', 'w').write(open(sys.argv[1]).read())\n"
+
+    def fallback(abc_file, score_ext):
+      alone.append(abc_file)
+
+    render_abc_files(abc_files, abc2midi_bin=self._tool('abc2midi', abc2midi),
+                     musescore_bin=self._tool('musescore', FAKE_MUSESCORE % self.log), fallback=fallback)
+    with open(self.log + '.book') as f:
+      self.assertEqual(f.read(), "X:1\nM:6/8\n%%MIDI program 40\nT:Jig\nL:1/8\nK:D\nDEF GAB|\n\n")
+    self.assertEqual(alone, [abc_files[1]])
+
+  def test_batcher_groups_files_queued_during_a_batch(self):
+    started = threading.Event()
+    release = threading.Event()
+    batches = []
+
+    def render_many(abc_files):
+      batches.append(list(abc_files))
+      started.set()
+      release.wait(5)
+      return [f"{abc_file}.out" for abc_file in abc_files]
+
+    with RenderBatcher(render_many) as batcher:
+      first = batcher.submit('a.abc')
+      started.wait(5)
+      later = [batcher.submit(name) for name in ('b.abc', 'c.abc')]
+      release.set()
+    self.assertEqual(batches, [['a.abc'], ['b.abc', 'c.abc']])
+    self.assertEqual([future.result() for future in [first] + later], ['a.abc.out', 'b.abc.out', 'c.abc.out'])
+
+
+if __name__ == '__main__':
+  unittest.main()
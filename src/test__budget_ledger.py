@@ -0,0 +1,99 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+from orpheuspypractice.budget_ledger import BudgetLedger
+from orpheuspypractice.link2abc_cli import show_budget_status
+
+
+def _reserve_and_commit(ledger_file):
+  ledger = BudgetLedger(ledger_file)
+  reservation = ledger.reserve(1.0, daily_limit=5.0)
+  if reservation is None:
+    return False
+  ledger.commit(reservation, 1.0)
+  return True
+
+
+class TestBudgetLedger(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.ledger_file = os.path.join(self.tmp.name, ".orpheus_budget.db")
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def test_reservations_count_until_committed_or_released(self):
+    ledger = BudgetLedger(self.ledger_file)
+    first = ledger.reserve(0.6, session_limit=1.0)
+    self.assertIsNotNone(first)
+    self.assertIsNone(ledger.reserve(0.6, session_limit=1.0))
+    self.assertEqual(ledger.totals(), (0, 0))
+    ledger.commit(first, 0.25)
+    self.assertEqual(ledger.totals(), (0.25, 0.25))
+    second = ledger.reserve(0.7, session_limit=1.0)
+    ledger.release(second)
+    self.assertEqual(ledger.totals(include_reserved=True), (0.25, 0.25))
+
+  def test_sessions_share_daily_total(self):
+    BudgetLedger(self.ledger_file).charge(2.0)
+    other = BudgetLedger(self.ledger_file)
+    self.assertEqual(other.totals(), (2.0, 0))
+    self.assertIsNone(other.reserve(1.5, daily_limit=3.0))
+    other.reset_day()
+    self.assertEqual(other.totals(), (0, 0))
+
+  def test_parallel_processes_never_overspend(self):
+    with ProcessPoolExecutor(max_workers=4) as executor:
+      admitted = list(executor.map(_reserve_and_commit, [self.ledger_file] * 12))
+    self.assertEqual(admitted.count(True), 5)
+    self.assertEqual(BudgetLedger(self.ledger_file).totals()[0], 5.0)
+
+  def test_imports_legacy_json_state(self):
+    with open(os.path.join(self.tmp.name, ".orpheus_budget.json"), "w") as f:
+      json.dump({'daily_budget': 4.0, 'daily_cost': 1.5, 'last_date': time.strftime('%Y-%m-%d')}, f)
+    # Two runs open the new ledger at once: both find no file, then create it
+    barrier = threading.Barrier(2)
+    init_schema = BudgetLedger._init_schema
+
+    def racing_init_schema(ledger):
+      barrier.wait(5)
+      init_schema(ledger)
+
+    with mock.patch.object(BudgetLedger, '_init_schema', racing_init_schema):
+      runs = [threading.Thread(target=BudgetLedger, args=(self.ledger_file,)) for _ in range(2)]
+      for run in runs:
+        run.start()
+      for run in runs:
+        run.join()
+    ledger = BudgetLedger(self.ledger_file)
+    self.assertEqual(ledger.get_setting('daily_budget'), 4.0)
+    self.assertEqual(ledger.totals()[0], 1.5)
+
+  def test_status_is_read_only(self):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+      show_budget_status(self.ledger_file)
+    self.assertIn("No budget file found", output.getvalue())
+    self.assertFalse(os.path.exists(self.ledger_file))
+
+    ledger = BudgetLedger(self.ledger_file)
+    ledger.set_setting('daily_budget', 3.0)
+    ledger.charge(1.0)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+      show_budget_status(self.ledger_file)
+    self.assertIn("Daily Remaining: $2.00", output.getvalue())
+    with self.assertRaises(sqlite3.OperationalError):
+      BudgetLedger(self.ledger_file, read_only=True).charge(1.0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import os
+import stat
+import sys
+import tempfile
+from unittest import mock
+from orpheuspypractice import display_pool
+from orpheuspypractice.display_pool import DisplayPool, inherited_display
+
+# Stand-in for Xvfb: reports a display through -displayfd and creates its socket
+FAKE_XVFB = """import os, signal, sys, time
+number = 900 + os.getpid() % 5000
+socket = os.path.join(os.environ['ORPHEUS_X11_SOCKET_DIR'], 'X%d' % number)
+open(socket, 'w').close()
+def stop(*args):
+  os.remove(socket)
+  sys.exit(0)
+signal.signal(signal.SIGTERM, stop)
+os.write(int(sys.argv[sys.argv.index('-displayfd') + 1]), b'%d\\n' % number)
+while True:
+  time.sleep(1)
+"""
+
+
+class TestDisplayPool(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.xvfb = os.path.join(self.tmp.name, 'Xvfb')
+    with open(self.xvfb, 'w') as f:
+      f.write(f"#!{sys.executable}\n" + FAKE_XVFB)
+    os.chmod(self.xvfb, os.stat(self.xvfb).st_mode | stat.S_IEXEC)
+    self.socket_dir = os.path.join(self.tmp.name, 'X11-unix')
+    os.mkdir(self.socket_dir)
+    patcher = mock.patch.dict(os.environ, {'ORPHEUS_X11_SOCKET_DIR': self.socket_dir})
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def test_one_display_per_worker_and_restart_on_crash(self):
+    pool = DisplayPool(size=2, platform='xvfb', xvfb_bin=self.xvfb)
+    try:
+      with pool.lease() as first, pool.lease() as second:
+        self.assertNotEqual(first['DISPLAY'], second['DISPLAY'])
+      self.assertTrue(all(display['healthy'] for display in pool.health()['displays']))
+
+      server = pool._servers[0]
+      crashed = server.display
+      server.process.kill()
+      server.process.wait()
+      os.remove(os.path.join(self.socket_dir, f"X{crashed[1:]}"))
+      with pool.lease() as first, pool.lease() as second:
+        self.assertNotEqual(first['DISPLAY'], second['DISPLAY'])
+      self.assertEqual(server.restarts, 1)
+      self.assertNotEqual(server.display, crashed)
+      self.assertTrue(server.healthy())
+    finally:
+      pool.shutdown()
+
+  def test_default_display_is_never_leased(self):
+    pool = DisplayPool(size=1, platform='xvfb', xvfb_bin=self.xvfb)
+    try:
+      with pool.lease() as env:
+        leased = env['DISPLAY']
+        default = pool.default_display()
+        self.assertNotEqual(default, leased)
+      with pool.lease() as env:
+        self.assertEqual(env['DISPLAY'], leased)
+      self.assertEqual(pool.default_display(), default)
+
+      environ = {name: value for name, value in os.environ.items() if name not in ('DISPLAY', 'QT_QPA_PLATFORM')}
+      with mock.patch.object(display_pool, '_pool', pool), mock.patch.dict(os.environ, environ, clear=True):
+        with inherited_display():
+          with inherited_display():
+            self.assertEqual(os.environ['DISPLAY'], default)
+          self.assertEqual(os.environ['DISPLAY'], default)
+        self.assertNotIn('DISPLAY', os.environ)
+    finally:
+      pool.shutdown()
+    self.assertEqual(os.listdir(self.socket_dir), [])
+
+  def test_offscreen_platform(self):
+    pool = DisplayPool(size=1, platform='offscreen')
+    with pool.lease() as env:
+      self.assertEqual(env['QT_QPA_PLATFORM'], 'offscreen')
+    with self.assertRaises(ValueError):
+      DisplayPool(platform='wayland')
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+from orpheuspypractice.endpoint_session import EndpointLease, reap
+
+# A live process other than this one
+OTHER_PID = os.getppid()
+
+
+class TestEndpointLease(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.lease = EndpointLease('chatmusician', 'me', os.path.join(self.tmp.name, 'lease.json'))
+    self.paused = []
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def _set(self, **fields):
+    with self.lease._locked() as table:
+      table.setdefault(self.lease.key, {}).update(fields)
+
+  def _pause(self, lease, token_env_var):
+    self.paused.append(lease.key)
+
+  def test_acquire_and_release(self):
+    self.assertTrue(self.lease.acquire('https://endpoint', time.time() + 60))
+    self.assertTrue(self.lease.is_valid())
+    self.assertEqual(self.lease.read()['holders'], [os.getpid()])
+    # Deadline ahead: keep it up
+    self.assertFalse(self.lease.release())
+    self.assertEqual(self.lease.read()['status'], 'running')
+
+    self.lease.acquire()
+    self._set(keep_alive_until=0, holders=[OTHER_PID, os.getpid()])
+    # Another live run still holds it
+    self.assertFalse(self.lease.release())
+    self.assertEqual(self.lease.read()['holders'], [OTHER_PID])
+
+    self._set(holders=[])
+    self.assertTrue(self.lease.release())
+    self.assertEqual(self.lease.read()['status'], 'pausing')
+    self.lease.mark_paused()
+    self.assertEqual(self.lease.read()['status'], 'paused')
+    self.assertFalse(self.lease.is_valid())
+
+  def test_acquire_waits_for_a_pause_in_progress(self):
+    self._set(status='pausing', pausing_pid=OTHER_PID, holders=[], keep_alive_until=0)
+    timer = threading.Timer(0.2, self.lease.mark_paused)
+    timer.start()
+    started = time.time()
+    # The caller has to resume the endpoint the other run just paused
+    self.assertFalse(self.lease.acquire('https://endpoint', poll_interval=0.05))
+    self.assertGreaterEqual(time.time() - started, 0.15)
+    entry = self.lease.read()
+    self.assertEqual((entry['status'], entry['holders']), ('running', [os.getpid()]))
+    timer.join()
+
+    # Held again: nobody may start pausing it
+    self._set(keep_alive_until=0)
+    self.assertFalse(self.lease.claim_pause())
+
+  def test_reaper_pauses_an_expired_unheld_lease(self):
+    self._set(status='running', holders=[], keep_alive_until=time.time() - 1, reaper_pid=os.getpid())
+    reap(self.lease, pause=self._pause)
+    self.assertEqual(self.paused, [self.lease.key])
+    entry = self.lease.read()
+    self.assertEqual(entry['status'], 'paused')
+    self.assertNotIn('reaper_pid', entry)
+
+  def test_reaper_skips_a_lease_acquired_after_its_check(self):
+    stale = {'status': 'running', 'holders': [], 'keep_alive_until': time.time() - 1}
+    self._set(**stale)
+    # A run acquires the lease between the reaper's read and its pause
+    self.lease.acquire('https://endpoint')
+    reads = iter([stale])
+    real_read = self.lease.read
+    self.lease.read = lambda: next(reads, None) or real_read()
+
+    def finish_run(seconds):
+      # That run finishes and pauses the endpoint itself
+      self.assertTrue(self.lease.release())
+      self.lease.mark_paused()
+
+    with mock.patch('orpheuspypractice.endpoint_session.time.sleep', finish_run):
+      reap(self.lease, pause=self._pause)
+    self.assertEqual(self.paused, [])
+
+  def test_failed_pause_leaves_the_lease_running(self):
+    self._set(status='running', holders=[], keep_alive_until=0)
+
+    def fail(lease, token_env_var):
+      raise RuntimeError('api down')
+
+    with self.assertRaises(RuntimeError):
+      reap(self.lease, pause=fail)
+    self.assertEqual(self.lease.read()['status'], 'running')
+
+
+if __name__ == '__main__':
+  unittest.main()
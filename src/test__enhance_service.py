@@ -0,0 +1,69 @@
+import unittest
+import json
+import threading
+from urllib import request, error
+from orpheuspypractice.enhance_service import (
+  EnhancementService, QueueFullError, create_server, submit_job, wait_for_job
+)
+
+ABC = "X:1\nT:Test\nM:4/4\nL:1/4\nK:C\nC D E F |\n"
+
+
+class TestEnhancementService(unittest.TestCase):
+  def setUp(self):
+    self.release = threading.Event()
+    self.calls = []
+    self.service = EnhancementService(process_func=self._process, workers=1, queue_size=1)
+
+  def _process(self, abc_content, output_dir, creation_name, enhance_hf=True, custom_prompt=None):
+    self.release.wait(5)
+    self.calls.append(creation_name)
+    if creation_name == "broken":
+      raise RuntimeError("render failed")
+    return {'original': {'abc_file': f"{output_dir}/original/{creation_name}.abc"}}
+
+  def _finish(self, job_id):
+    job = self.service.get(job_id)
+    while job['status'] not in ('done', 'failed'):
+      job = self.service.wait(job_id, job['status'], 5)
+    return job
+
+  def test_jobs_run_and_report_results(self):
+    self.service.start()
+    self.release.set()
+    done = self._finish(self.service.submit(ABC, "out", "tune")['id'])
+    self.assertEqual(done['status'], 'done')
+    self.assertEqual(done['results']['original']['abc_file'], "out/original/tune.abc")
+    failed = self._finish(self.service.submit(ABC, "out", "broken")['id'])
+    self.assertEqual(failed['status'], 'failed')
+    self.assertEqual(failed['error'], "render failed")
+    self.service.stop()
+
+  def test_full_queue_rejects_instead_of_blocking(self):
+    self.service.submit(ABC, "out", "first")
+    with self.assertRaises(QueueFullError):
+      self.service.submit(ABC, "out", "second")
+
+  def test_http_submit_and_stream(self):
+    server = create_server(self.service, port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+      self.service.start()
+      job = submit_job(base_url, ABC, "out", creation_name="tune")
+      self.assertEqual(job['status'], 'queued')
+      self.release.set()
+      self.assertEqual(wait_for_job(base_url, job['id'], timeout=5)['status'], 'done')
+      with request.urlopen(f"{base_url}/health") as response:
+        self.assertEqual(json.load(response)['jobs'], {'done': 1})
+      with self.assertRaises(error.HTTPError) as ctx:
+        request.urlopen(request.Request(f"{base_url}/jobs", data=b'{}'))
+      self.assertEqual(ctx.exception.code, 400)
+    finally:
+      server.shutdown()
+      server.server_close()
+      self.service.stop()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import yaml
+from orpheuspypractice import inference_driver
+from orpheuspypractice.inference_driver import InferenceDriver, output_path
+from orpheuspypractice.workflow import run_inferences
+
+try:
+  import jghfmanager.jgthfcli
+  HAS_JGHFMANAGER = True
+except ImportError:
+  HAS_JGHFMANAGER = False
+
+MUSICAL = {'musical': {'name': 'Song', 'sname': 'v1', 'prompts': {'p1': 'first', 'p2': 'second'}}}
+
+
+class _Endpoint(BaseHTTPRequestHandler):
+  """Answers 'slow' late, 'flaky' with a 503 first and 'broken' with a 400"""
+  requests = []
+  in_flight = 0
+  max_in_flight = 0
+  lock = threading.Lock()
+
+  def log_message(self, *args):
+    pass
+
+  def do_POST(self):
+    prompt = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['inputs']
+    cls = type(self)
+    with cls.lock:
+      cls.requests.append(prompt)
+      attempts = cls.requests.count(prompt)
+      cls.in_flight += 1
+      cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+    threading.Event().wait(0.3 if prompt == 'slow' else 0.05)
+    with cls.lock:
+      cls.in_flight -= 1
+    if prompt == 'broken' or (prompt == 'flaky' and attempts == 1):
+      status, body = (400 if prompt == 'broken' else 503), b'{}'
+    else:
+      status, body = 200, json.dumps([{'generated_text': f'answer to {prompt}'}]).encode()
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+
+class TestInferenceDriver(unittest.TestCase):
+  def setUp(self):
+    _Endpoint.requests, _Endpoint.max_in_flight = [], 0
+    self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Endpoint)
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+    # No backoff sleeps between retries
+    patcher = mock.patch.object(inference_driver, 'random', mock.Mock(uniform=lambda a, b: 0.0))
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def tearDown(self):
+    self.server.shutdown()
+    self.server.server_close()
+
+  def _musical(self, *prompts):
+    return {'musical': {'name': 'Song', 'sname': 'v1', 'prompts': {f'p{i}': p for i, p in enumerate(prompts, 1)}}}
+
+  def test_completion_order_and_prompt_order(self):
+    musical = self._musical('slow', 'a', 'b', 'c', 'd')
+    driver = InferenceDriver(self.url, concurrency=2)
+    self.assertEqual([entry['prompt_id'] for entry in driver.iter_results(musical)][-1], 'p1')
+    manifest = InferenceDriver(self.url, concurrency=2).run(musical, output_dir=None)
+    self.assertEqual([entry['prompt_id'] for entry in manifest], ['p1', 'p2', 'p3', 'p4', 'p5'])
+    self.assertEqual(manifest[0]['response'], {'generated_text': 'answer to slow'})
+    self.assertEqual(_Endpoint.max_in_flight, 2)
+
+  def test_retries_only_retryable_errors(self):
+    manifest = InferenceDriver(self.url, concurrency=2, retries=1).run(self._musical('flaky', 'broken'), None)
+    self.assertEqual(manifest[0]['response'], {'generated_text': 'answer to flaky'})
+    self.assertIsNone(manifest[1]['response'])
+    self.assertIn('400', manifest[1]['error'])
+    self.assertEqual(sorted(_Endpoint.requests), ['broken', 'flaky', 'flaky'])
+
+  def test_gives_up_after_retries(self):
+    manifest = InferenceDriver(self.url, retries=0).run(self._musical('flaky'), None)
+    self.assertIn('503', manifest[0]['error'])
+    self.assertEqual(_Endpoint.requests, ['flaky'])
+
+
+@unittest.skipUnless(HAS_JGHFMANAGER, "jghfmanager is not installed")
+class TestCminferencerManifest(unittest.TestCase):
+  def test_stale_outputs_are_not_reported(self):
+    with tempfile.TemporaryDirectory() as work_dir:
+      cwd = os.getcwd()
+      os.chdir(work_dir)
+      try:
+        with open('musical.yml', 'w') as f:
+          yaml.safe_dump(MUSICAL, f)
+        # Both prompts answered by an earlier run
+        for prompt_id in ('p1', 'p2'):
+          with open(output_path(MUSICAL['musical'], prompt_id), 'w') as f:
+            json.dump({'generated_text': 'old'}, f)
+
+        def cminferencer():
+          # This run only gets an answer to p2
+          with open(output_path(MUSICAL['musical'], 'p2'), 'w') as f:
+            json.dump([{'generated_text': 'new'}], f)
+
+        with mock.patch('jghfmanager.jgthfcli.main', cminferencer):
+          manifest = run_inferences('musical.yml')
+      finally:
+        os.chdir(cwd)
+
+    self.assertEqual([entry['prompt_id'] for entry in manifest], ['p1', 'p2'])
+    self.assertEqual((manifest[0]['path'], manifest[0]['error']), (None, 'no output written'))
+    self.assertEqual((manifest[1]['path'], manifest[1]['error']), ('./Song_v1_p2.json', None))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import subprocess
+import sys
+import os
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _loaded_modules_after(statement):
+  # Run in a fresh interpreter so sys.modules reflects only this import
+  probe = f"import sys; {statement}; print(','.join(sorted(sys.modules)))"
+  out = subprocess.run([sys.executable, "-c", probe], cwd=SRC_DIR, check=True,
+                       stdout=subprocess.PIPE, text=True).stdout
+  return set(out.strip().split(","))
+
+
+class TestLazyImports(unittest.TestCase):
+  def test_package_import_is_light(self):
+    loaded = _loaded_modules_after("import orpheuspypractice")
+    self.assertNotIn("jgcmlib", loaded)
+    self.assertNotIn("jghfmanager", loaded)
+
+  def test_oenhance_import_is_light(self):
+    loaded = _loaded_modules_after("import orpheuspypractice.link2abc_cli")
+    for heavy in ("jgcmlib", "jghfmanager", "huggingface_hub", "music21"):
+      self.assertNotIn(heavy, loaded)
+
+  def test_olca_import_is_light(self):
+    loaded = _loaded_modules_after("import orpheuspypractice.olca")
+    for heavy in ("langsmith", "langchain", "langchain_core", "langchain_openai", "langgraph"):
+      self.assertNotIn(heavy, loaded)
+
+  def test_olca_commands_skip_agent_stack(self):
+    # --help and configuration errors must return before the agent stack loads
+    from orpheuspypractice.startup_benchmark import COMMANDS, measure_command
+    for name in COMMANDS:
+      result = measure_command(name, repeat=1)
+      self.assertIsNone(result['error'], name)
+      self.assertEqual(result['heavy_modules'], [], name)
+
+  def test_unknown_attribute(self):
+    import orpheuspypractice
+    with self.assertRaises(AttributeError):
+      orpheuspypractice.does_not_exist
+
+if __name__ == '__main__':
+  unittest.main()
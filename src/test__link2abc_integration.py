@@ -0,0 +1,100 @@
+import unittest
+import os
+import tempfile
+from unittest import mock
+import yaml
+
+try:
+  import jghfmanager.jgthfdata
+  HAS_JGHFMANAGER = True
+except ImportError:
+  HAS_JGHFMANAGER = False
+
+
+class _Endpoint:
+  """InferenceEndpoint stand-in counting pauses"""
+  def __init__(self, status='running'):
+    self.status = status
+    self.url = 'https://endpoint'
+    self.pauses = 0
+
+  def pause(self):
+    self.pauses += 1
+    self.status = 'paused'
+
+
+class _Api:
+  """HfApi stand-in: each poll sees the next status (the last one repeats)"""
+  def __init__(self, statuses):
+    self.statuses = list(statuses)
+
+  def get_inference_endpoint(self, name, namespace, token=None):
+    status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+    return _Endpoint(status)
+
+
+@unittest.skipUnless(HAS_JGHFMANAGER, "jghfmanager is not installed")
+class TestHFEndpointManager(unittest.TestCase):
+  def setUp(self):
+    from orpheuspypractice.link2abc_integration import HFEndpointManager
+    self.tmp = tempfile.TemporaryDirectory()
+    config_file = os.path.join(self.tmp.name, 'orpheus-config.yml')
+    with open(config_file, 'w') as f:
+      yaml.safe_dump({'huggingface': {'name': 'chatmusician', 'namespace': 'me'}}, f)
+    with mock.patch.dict(os.environ, {'ORPHEUS_ENDPOINT_LEASE': os.path.join(self.tmp.name, 'lease.json')}):
+      self.manager = HFEndpointManager(config_file)
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def _wait(self, *statuses):
+    """wait_until_ready from the first status, polling through the others"""
+    self.manager.poll_initial_delay = self.manager.poll_max_delay = 0.001
+    self.manager.endpoint = _Endpoint(statuses[0])
+    return self.manager.wait_until_ready(_Api(statuses[1:] or statuses), 'chatmusician', 'me', 'token')
+
+  def _transitions(self):
+    return [t['status'] for t in self.manager.session_metrics['status_transitions']]
+
+  def test_ready_after_boot_states(self):
+    endpoint = self._wait('pending', 'pending', 'initializing', 'running')
+    self.assertEqual(endpoint.status, 'running')
+    self.assertEqual(self._transitions(), ['pending', 'initializing', 'running'])
+    self.assertEqual(self.manager.session_metrics['status_polls'], 3)
+
+  def test_failure_state_raises(self):
+    with self.assertRaises(RuntimeError) as ctx:
+      self._wait('pending', 'initializing', 'failed')
+    self.assertIn("'failed'", str(ctx.exception))
+    self.assertEqual(self._transitions(), ['pending', 'initializing', 'failed'])
+
+  def test_scaled_to_zero_is_woken_once(self):
+    with mock.patch.object(self.manager, '_wake_scaled_to_zero') as wake:
+      endpoint = self._wait('scaledToZero', 'scaledToZero', 'initializing', 'running')
+    wake.assert_called_once_with('token')
+    self.assertEqual(endpoint.status, 'running')
+
+  def test_deadline(self):
+    self.manager.ready_timeout = 0.05
+    with self.assertRaises(TimeoutError) as ctx:
+      self._wait('initializing')
+    self.assertIn("last status: 'initializing'", str(ctx.exception))
+    self.assertGreater(self.manager.session_metrics['status_polls'], 1)
+
+  def test_last_enhancement_out_pauses(self):
+    # Two worker threads of one process, no keep-alive
+    endpoint = self.manager.endpoint = _Endpoint()
+    self.manager.lease.acquire(endpoint.url)
+    self.manager.begin_use()
+    self.manager.begin_use()
+    self.manager.end_use()
+    self.assertEqual(endpoint.pauses, 0)
+    self.manager.shutdown_endpoint()
+    self.assertEqual(endpoint.pauses, 0)
+    self.manager.end_use()
+    self.assertEqual(endpoint.pauses, 1)
+    self.assertEqual(self.manager.lease.read()['status'], 'paused')
+
+
+if __name__ == '__main__':
+  unittest.main()
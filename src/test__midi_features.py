@@ -0,0 +1,81 @@
+import unittest
+import os
+import struct
+import tempfile
+from orpheuspypractice.midi_features import read_midi, piano_roll, midi_features, compare_midi_files
+
+DIVISION = 480
+
+
+def vlq(value):
+  out = [value & 0x7F]
+  value >>= 7
+  while value:
+    out.insert(0, (value & 0x7F) | 0x80)
+    value >>= 7
+  return bytes(out)
+
+
+def write_midi(path, chords, tempo=500000):
+  """chords: list of (pitches, beats) played one after another"""
+  events = vlq(0) + b'\xff\x51\x03' + tempo.to_bytes(3, 'big')
+  events += vlq(0) + b'\xff\x58\x04\x03\x02\x18\x08'  # 3/4
+  for pitches, beats in chords:
+    for pitch in pitches:
+      events += vlq(0) + bytes([0x90, pitch, 80])
+    for index, pitch in enumerate(pitches):
+      # Running status and note-on velocity 0 as note-off
+      events += vlq(int(beats * DIVISION) if index == 0 else 0) + bytes([pitch, 0])
+  events += vlq(0) + b'\xff\x2f\x00'
+  with open(path, 'wb') as f:
+    f.write(b'MThd' + struct.pack('>IHHH', 6, 0, 1, DIVISION))
+    f.write(b'MTrk' + struct.pack('>I', len(events)) + events)
+
+
+class TestMidiFeatures(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.melody = os.path.join(self.tmp.name, 'melody.mid')
+    self.harmonized = os.path.join(self.tmp.name, 'harmonized.mid')
+    write_midi(self.melody, [([60], 1), ([62], 1), ([64], 1), ([65], 1), ([67], 2)], tempo=1000000)
+    write_midi(self.harmonized, [([48, 60], 1), ([62], 1), ([64], 1), ([41, 65], 1), ([43, 67], 2)], tempo=1000000)
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def test_read_midi(self):
+    notes = read_midi(self.melody)
+    self.assertEqual(list(notes.pitch), [60, 62, 64, 65, 67])
+    self.assertEqual(list(notes.onset), [0, 1, 2, 3, 4])
+    self.assertEqual(list(notes.duration), [1, 1, 1, 1, 2])
+    # 60 BPM: one second per beat
+    self.assertEqual(list(notes.onset_seconds), [0, 1, 2, 3, 4])
+    self.assertEqual(notes.beats_per_bar, 3.0)
+
+  def test_features(self):
+    notes = read_midi(self.harmonized)
+    roll = piano_roll(notes)
+    self.assertEqual(roll.shape, (128, 24))
+    self.assertTrue(roll[48, :4].all() and not roll[48, 4:].any())
+    features = midi_features(notes)
+    self.assertEqual(features['note_count'], 8)
+    self.assertEqual(features['duration_seconds'], 6.0)
+    self.assertEqual(features['pitch_range'], 67 - 41)
+    self.assertEqual(features['polyphony_max'], 2)
+    self.assertAlmostEqual(sum(features['pitch_class_histogram']), 1.0, places=3)
+    # Pitch-class sets {C}, {D}, {E}, {F}, {G}, {G}: four changes in two bars
+    self.assertEqual(features['harmonic_changes_per_bar'], 2.0)
+
+  def test_compare(self):
+    analysis = compare_midi_files(self.melody, self.harmonized)
+    changes = analysis['changes']
+    self.assertEqual(changes['note_count'], 3)
+    self.assertEqual(changes['duration_beats'], 0)
+    # Same pitch classes, but the bass doubles C, F and G for longer
+    self.assertTrue(0 < changes['pitch_class_distance'] < 0.2)
+    self.assertEqual(compare_midi_files(self.melody, self.melody)['changes']['pitch_class_distance'], 0)
+    self.assertGreater(changes['polyphony_mean'], 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import itertools
+import sqlite3
+import tempfile
+from orpheuspypractice.olca import resolve_thread_id, agent_inputs, thread_inputs, OUT_OF_STEPS_ANSWER
+
+try:
+  from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+  from langchain_core.messages import AIMessage
+  from langchain_core.tools import tool
+  from langgraph.checkpoint.sqlite import SqliteSaver
+  from langgraph.errors import GraphRecursionError
+  from langgraph.prebuilt import create_react_agent
+  HAS_LANGGRAPH = True
+except ImportError:
+  HAS_LANGGRAPH = False
+
+
+class TestThreadId(unittest.TestCase):
+  def test_remembered_until_replaced(self):
+    with tempfile.TemporaryDirectory() as olca_dir:
+      first = resolve_thread_id(olca_dir)
+      self.assertEqual(resolve_thread_id(olca_dir), first)
+      self.assertEqual(resolve_thread_id(olca_dir, "named"), "named")
+      self.assertEqual(resolve_thread_id(olca_dir), "named")
+      self.assertNotIn(resolve_thread_id(olca_dir, new_thread=True), (first, "named"))
+
+
+@unittest.skipUnless(HAS_LANGGRAPH, "langgraph is not installed")
+class TestCheckpointedRuns(unittest.TestCase):
+  def _graph(self, path, answers):
+    class FakeModel(GenericFakeChatModel):
+      def bind_tools(self, tools, **kwargs):
+        return self
+
+    @tool
+    def terminal(commands: str) -> str:
+      """Run commands"""
+      return f"ran {commands}"
+
+    checkpointer = SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    return create_react_agent(FakeModel(messages=iter(answers)), tools=[terminal], checkpointer=checkpointer)
+
+  def test_new_continue_and_resume(self):
+    calls = [AIMessage(content='', tool_calls=[{'name': 'terminal', 'args': {'commands': f'step {i}'}, 'id': f'call{i}'}])
+             for i in range(3)]
+    with tempfile.TemporaryDirectory() as olca_dir:
+      path = f"{olca_dir}/checkpoints.sqlite"
+      config = {"recursion_limit": 3, "configurable": {"thread_id": "t"}}
+      graph = self._graph(path, itertools.chain(calls, itertools.repeat(AIMessage(content='done'))))
+
+      inputs, stream_config, status = agent_inputs(graph, config, "go", "system")
+      self.assertEqual((status, [role for role, _ in inputs["messages"]]), ('new', ['system', 'user']))
+      with self.assertRaises(GraphRecursionError):
+        list(graph.stream(inputs, stream_config, stream_mode="values"))
+      self.assertEqual(graph.get_state(config).values["messages"][-1].content, OUT_OF_STEPS_ANSWER)
+
+      # A new process picks the thread up from the step before the agent gave up
+      graph = self._graph(path, itertools.chain(calls[2:], itertools.repeat(AIMessage(content='done'))))
+      inputs, stream_config, status = agent_inputs(graph, dict(config, recursion_limit=20), "go", "system")
+      self.assertEqual((inputs, status), (None, 'resume'))
+      list(graph.stream(inputs, stream_config, stream_mode="values"))
+      messages = graph.get_state(config).values["messages"]
+      self.assertEqual([m.content for m in messages[-3:]], ['', 'ran step 2', 'done'])
+      self.assertNotIn(OUT_OF_STEPS_ANSWER, [m.content for m in messages])
+
+      inputs, _, status = agent_inputs(graph, config, "next", "system")
+      self.assertEqual((status, inputs), ('continue', {"messages": [("user", "next")]}))
+
+      # A completed thread only grows when asked to continue
+      inputs, _, status, thread_id = thread_inputs(graph, config, "go", "system", olca_dir=olca_dir)
+      self.assertEqual((status, [role for role, _ in inputs["messages"]]), ('new', ['system', 'user']))
+      self.assertNotEqual(thread_id, "t")
+      self.assertEqual(resolve_thread_id(olca_dir), thread_id)
+      _, _, status, thread_id = thread_inputs(graph, config, "next", "system", continue_thread=True, olca_dir=olca_dir)
+      self.assertEqual((status, thread_id), ('continue', "t"))
+
+
+if __name__ == '__main__':
+  unittest.main()
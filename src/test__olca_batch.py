@@ -0,0 +1,69 @@
+import unittest
+import json
+import os
+import tempfile
+import yaml
+from orpheuspypractice.olca_batch import load_tasks, run_batch
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _write(path, data):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, "w") as f:
+    yaml.safe_dump(data, f)
+  return path
+
+
+class TestLoadTasks(unittest.TestCase):
+  def test_configs_and_manifest(self):
+    with tempfile.TemporaryDirectory() as root:
+      a = _write(f"{root}/repos/a/olca.yml", {"user_input": "a"})
+      _write(f"{root}/shared/report.yml", {"user_input": "report", "recursion_limit": 5})
+      manifest = _write(f"{root}/tasks.yml", {"recursion_limit": 20, "timeout": 60, "tasks": [
+        {"config": "shared/report.yml", "workdir": "repos/b", "recursion_limit": 40, "env": {"REPO": "b"}},
+        {"config": "shared/report.yml", "workdir": "repos/c"},
+        {"config": {"user_input": "inline"}},
+      ]})
+      tasks = load_tasks([a], manifest, batch_dir=f"{root}/batch")
+
+      self.assertEqual([t["name"] for t in tasks], ["a", "report", "report-2", "task-4"])
+      self.assertEqual([t["workdir"] for t in tasks], [f"{root}/repos/a", f"{root}/repos/b", f"{root}/repos/c",
+                                                       f"{root}/batch/task-4/work"])
+      self.assertEqual([t["recursion_limit"] for t in tasks], [20, 40, 5, 20])
+      self.assertEqual(tasks[1]["env"], {"REPO": "b"})
+      self.assertEqual(tasks[1]["config"]["user_input"], "report")
+
+  def test_shared_workdir_is_refused(self):
+    with tempfile.TemporaryDirectory() as root:
+      one = _write(f"{root}/repo/one.yml", {})
+      two = _write(f"{root}/repo/two.yml", {})
+      with self.assertRaises(ValueError):
+        load_tasks([one, two])
+      with self.assertRaises(ValueError):
+        load_tasks([f"{root}/missing.yml"])
+
+
+class TestRunBatch(unittest.TestCase):
+  def test_failed_tasks_are_reported(self):
+    # Without an API key olca stops before any model call.  Both keys it
+    # reads are set empty: dotenv does not override them from a .env file.
+    with tempfile.TemporaryDirectory() as root:
+      config = {"api_keyname": "OLCA_BATCH_TEST_MISSING_KEY", "user_input": "hi", "tracing": False}
+      tasks = load_tasks(batch_dir=root, manifest=_write(f"{root}/tasks.yml", {
+        "env": {"PYTHONPATH": SRC_DIR, "OLCA_BATCH_TEST_MISSING_KEY": "", "OPENAI_API_KEY": ""},
+        "tasks": [{"name": "one", "config": config}, {"name": "two", "config": config}]}))
+      summary = run_batch(tasks, root, workers=2)
+
+      self.assertEqual(summary["statuses"], {"error": 2})
+      self.assertEqual([t["returncode"] for t in summary["tasks"]], [1, 1])
+      with open(summary["tasks"][0]["log"]) as f:
+        self.assertIn("OLCA_BATCH_TEST_MISSING_KEY", f.read())
+      with open(summary["tasks"][0]["config"]) as f:
+        self.assertFalse(yaml.safe_load(f)["human"])
+      with open(f"{root}/results.json") as f:
+        self.assertEqual(json.load(f)["statuses"], {"error": 2})
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import json
+import tempfile
+import uuid
+
+try:
+  from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+  from langchain_core.outputs import ChatGeneration, LLMResult
+  from orpheuspypractice.olca_metrics import RunMetrics, format_summary
+  HAS_LANGCHAIN = True
+except ImportError:
+  HAS_LANGCHAIN = False
+
+
+@unittest.skipUnless(HAS_LANGCHAIN, "langchain_core is not installed")
+class TestRunMetrics(unittest.TestCase):
+  def test_records_and_summary(self):
+    with tempfile.TemporaryDirectory() as metrics_dir:
+      metrics = RunMetrics(metrics_dir, thread_id="t1")
+      steps = list(metrics.instrument(iter(["input", "agent", "tools"])))
+      self.assertEqual(steps, ["input", "agent", "tools"])
+
+      model_run, tool_run = uuid.uuid4(), uuid.uuid4()
+      metrics.on_chat_model_start({"name": "ChatOpenAI"}, [[HumanMessage(content="hi")]], run_id=model_run,
+                                  metadata={"langgraph_step": 1, "ls_model_name": "gpt-4o-mini"})
+      message = AIMessage(content="ok", usage_metadata={"input_tokens": 120, "output_tokens": 8, "total_tokens": 128})
+      metrics.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=model_run)
+      metrics.on_tool_start({"name": "terminal"}, "ls -R", run_id=tool_run, metadata={"langgraph_step": 2})
+      metrics.on_tool_end(ToolMessage(content="x" * 2048, tool_call_id="c1"), run_id=tool_run)
+      totals = metrics.close()
+
+      self.assertEqual((totals["model_calls"], totals["prompt_tokens"], totals["completion_tokens"]), (1, 120, 8))
+      self.assertEqual((totals["tool_calls"], totals["tool_output_bytes"], totals["steps"]), (1, 2048, 2))
+      with open(metrics.path) as f:
+        records = [json.loads(line) for line in f]
+      self.assertEqual([record["type"] for record in records], ["step", "step", "step", "model", "tool", "run"])
+      self.assertTrue(all(record["thread_id"] == "t1" for record in records))
+      self.assertEqual(records[4]["input"], "ls -R")
+
+      table = format_summary(records, totals["seconds"])
+      self.assertIn("gpt-4o-mini", table)
+      self.assertIn("terminal", table)
+      self.assertIn("ls -R", table)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import tempfile
+from orpheuspypractice.olca_tools import OutputBudget, budget_tools
+
+try:
+  from langchain_core.tools import tool
+  HAS_LANGCHAIN = True
+except ImportError:
+  HAS_LANGCHAIN = False
+
+LISTING = "\n".join(f"./src/file_{i}.py" for i in range(5000))
+
+
+class TestOutputBudget(unittest.TestCase):
+  def test_short_output_passes_through(self):
+    budget = OutputBudget(max_bytes=100)
+    self.assertEqual(budget.apply("terminal", "ok\n"), "ok\n")
+    # Only the configured tools are capped
+    self.assertEqual(budget.apply("human", LISTING), LISTING)
+
+  def test_head_tail_and_spill(self):
+    with tempfile.TemporaryDirectory() as olca_dir:
+      budget = OutputBudget.from_config({"max_bytes": 1000}, olca_dir)
+      result = budget.apply("terminal", LISTING)
+      self.assertLessEqual(len(result.encode()), 1000)
+      self.assertTrue(result.startswith("./src/file_0.py\n"))
+      self.assertTrue(result.endswith("./src/file_4999.py"))
+      self.assertIn("lines omitted", result)
+      spilled = os.listdir(os.path.join(olca_dir, "tool_outputs"))
+      self.assertEqual(len(spilled), 1)
+      self.assertIn(spilled[0], result)
+      with open(os.path.join(olca_dir, "tool_outputs", spilled[0])) as f:
+        self.assertEqual(f.read(), LISTING)
+
+  def test_results_stay_within_budget(self):
+    with tempfile.TemporaryDirectory() as olca_dir:
+      for max_bytes in (100, 300, 1000):
+        budget = OutputBudget.from_config({"max_bytes": max_bytes}, olca_dir)
+        self.assertLessEqual(len(budget.apply("terminal", LISTING).encode()), max_bytes)
+      # A spill path longer than the budget only leaves room for part of the marker
+      long_dir = os.path.join(olca_dir, "x" * 120)
+      budget = OutputBudget(max_bytes=100, spill_dir=long_dir)
+      self.assertEqual(len(budget.apply("terminal", LISTING).encode()), 100)
+
+  def test_summarizer_and_config(self):
+    with tempfile.TemporaryDirectory() as olca_dir:
+      asked = []
+      # A summarizer ignoring the size it was asked for
+      budget = OutputBudget(max_bytes=500, spill_dir=olca_dir,
+                            summarizer=lambda text, max_bytes: asked.append(max_bytes) or text)
+      result = budget.apply("terminal", LISTING)
+      self.assertTrue(result.startswith("[Summary of"))
+      self.assertLessEqual(len(result.encode()), 500)
+      self.assertEqual(asked[0], 500 - len(result.split("\n", 1)[0]) - 1)
+    failing = OutputBudget(max_bytes=500, summarizer=lambda text, max_bytes: 1 / 0)
+    self.assertIn("summary failed: ZeroDivisionError", failing.apply("terminal", LISTING))
+
+    self.assertIsNone(OutputBudget.from_config(False))
+    self.assertTrue(OutputBudget.from_config({"summarize": True}).summarize)
+    with self.assertRaises(ValueError):
+      OutputBudget.from_config({"max_bytes": 0})
+
+  @unittest.skipUnless(HAS_LANGCHAIN, "langchain_core is not installed")
+  def test_budget_tools(self):
+    @tool
+    def terminal(commands: str) -> str:
+      """Run commands"""
+      return LISTING
+
+    @tool
+    def other(commands: str) -> str:
+      """Other tool"""
+      return LISTING
+
+    wrapped, untouched = budget_tools([terminal, other], OutputBudget(max_bytes=800))
+    self.assertEqual((wrapped.name, wrapped.args), ("terminal", terminal.args))
+    self.assertLessEqual(len(wrapped.invoke({"commands": "ls -R"}).encode()), 800)
+    self.assertIs(untouched, other)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import tempfile
+from orpheuspypractice.render_cache import RenderCache, normalize_abc
+
+ABC = "X:1\nT:Test\nM:4/4\nL:1/4\nK:C\nC D E F | G A B c |\n"
+
+
+class TestRenderCache(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.cache = RenderCache(cache_dir=os.path.join(self.tmp.name, "cache"))
+    self.calls = []
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def _fake_render(self, abc_file, score_ext="svg"):
+    self.calls.append(abc_file)
+    stem = os.path.splitext(abc_file)[0]
+    outputs = (f"{stem}-1.{score_ext}", f"{stem}.mp3", f"{stem}.mid")
+    for path in outputs:
+      with open(path, "w") as f:
+        f.write(path)
+    return outputs
+
+  def _write_abc(self, name, content=ABC):
+    path = os.path.join(self.tmp.name, name)
+    with open(path, "w") as f:
+      f.write(content)
+    return path
+
+  def test_hit_skips_render_and_renames_artifacts(self):
+    self.cache.render(self._write_abc("first.abc"), render_func=self._fake_render)
+    second = self._write_abc("second.abc", ABC.replace("\n", "  \r\n"))
+    score, audio, midi = self.cache.render(second, render_func=self._fake_render)
+    self.assertEqual(len(self.calls), 1)
+    self.assertEqual(self.cache.hits, 1)
+    self.assertTrue(score.endswith("second-1.svg") and os.path.isfile(score))
+    self.assertTrue(audio.endswith("second.mp3") and os.path.isfile(audio))
+    self.assertTrue(midi.endswith("second.mid") and os.path.isfile(midi))
+
+  def test_options_are_part_of_key(self):
+    abc_file = self._write_abc("tune.abc")
+    self.cache.render(abc_file, score_ext="svg", render_func=self._fake_render)
+    self.cache.render(abc_file, score_ext="jpg", render_func=self._fake_render)
+    self.assertEqual(len(self.calls), 2)
+
+  def test_disabled_always_renders(self):
+    cache = RenderCache(cache_dir=self.cache.cache_dir, enabled=False)
+    abc_file = self._write_abc("tune.abc")
+    cache.render(abc_file, render_func=self._fake_render)
+    cache.render(abc_file, render_func=self._fake_render)
+    self.assertEqual(len(self.calls), 2)
+
+  def test_eviction_bounds_size(self):
+    self.cache.max_bytes = 0
+    self.cache.render(self._write_abc("tune.abc"), render_func=self._fake_render)
+    self.assertEqual(list(self.cache._entries()), [])
+
+  def test_normalize_abc(self):
+    self.assertEqual(normalize_abc("\nX:1\r\nK:C  \nC|\n\n"), "X:1\nK:C\nC|")
+    # A blank line ends a tune: runs collapse to one, but do not vanish
+    self.assertEqual(normalize_abc("X:1\nK:C\n\n\n \nC|"), "X:1\nK:C\n\nC|")
+    self.assertNotEqual(normalize_abc("X:1\nK:C\n\nC|"), normalize_abc("X:1\nK:C\nC|"))
+
+  def test_overwriting_an_output_leaves_the_entry_alone(self):
+    def render_in_place(abc_file, score_ext="svg"):
+      # Like abc2midi -o or shutil.copyfile: the existing file is rewritten
+      with open(abc_file) as f:
+        content = f.read()
+      stem = os.path.splitext(abc_file)[0]
+      outputs = (f"{stem}.{score_ext}", f"{stem}.mp3", f"{stem}.mid")
+      for path in outputs:
+        with open(path, "r+" if os.path.exists(path) else "w") as f:
+          f.truncate()
+          f.write(content)
+      return outputs
+
+    tune_b = ABC.replace("T:Test", "T:Other")
+    self.cache.render(self._write_abc("foo.abc"), render_func=render_in_place)
+    self.cache.render(self._write_abc("foo.abc", tune_b), render_func=render_in_place)
+    _, _, midi = self.cache.render(self._write_abc("bar.abc"), render_func=render_in_place)
+    self.assertEqual(self.cache.hits, 1)
+    with open(midi) as f:
+      self.assertEqual(f.read(), ABC)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+from orpheuspypractice.link2abc_integration import CostBudgetManager, OrpheusIntegrationBlock
+from orpheuspypractice.render_cache import RenderCache
+from orpheuspypractice.response_cache import ResponseCache
+
+try:
+  import jgcmlib.jgcmhelper
+  HAS_JGCMLIB = True
+except ImportError:
+  HAS_JGCMLIB = False
+
+ABC = "X:1\nT:Test\nM:4/4\nL:1/4\nK:C\nC D E F | G A B c |]\n"
+ENHANCED = "X:1\nT:Test\nM:4/4\nL:1/4\nK:C\n\"C\"C E G c | \"G\"B d g2 |]\n"
+
+
+class _Driver:
+  def __init__(self, manager):
+    self.manager = manager
+
+  def iter_results(self, musical_config, output_dir=None):
+    for prompt_id in musical_config['musical']['prompts']:
+      self.manager.inferred.append(prompt_id)
+      yield {'prompt_id': prompt_id, 'path': None, 'response': {'generated_text': ENHANCED},
+             'error': None, 'elapsed': 3.0}
+
+
+class _EndpointManager:
+  """HFEndpointManager counting boots and inferences instead of calling HuggingFace"""
+  session_metrics = {}
+
+  def __init__(self):
+    self.starts = 0
+    self.inferred = []
+
+  def request_settings(self, use_driver=True):
+    return {'repository': 'm-a-p/ChatMusician', 'parameters': {}, 'prompt_template': '{prompt}'}
+
+  def start_endpoint(self):
+    self.starts += 1
+
+  def create_inference_driver(self, concurrency=4):
+    return _Driver(self)
+
+  def begin_use(self):
+    pass
+
+  def end_use(self):
+    pass
+
+
+@unittest.skipUnless(HAS_JGCMLIB, "jgcmlib is not installed")
+class TestCachedBatch(unittest.TestCase):
+  def test_cached_batch_never_boots_the_endpoint(self):
+    with tempfile.TemporaryDirectory() as root:
+      manager = _EndpointManager()
+      block = OrpheusIntegrationBlock(
+        CostBudgetManager(f"{root}/budget.db"), RenderCache(f"{root}/renders"),
+        hf_manager=manager, response_cache=ResponseCache(f"{root}/responses")
+      )
+      items = [{'abc_content': ABC, 'creation_name': 'one'},
+               {'abc_content': ABC, 'creation_name': 'two', 'custom_prompt': 'in a minor key'}]
+
+      first = block.enhance_abc_batch(items)
+      self.assertEqual((manager.starts, manager.inferred), (1, ['one', 'two']))
+      self.assertEqual([r['cached'] for r in first], [False, False])
+      spent = block.budget_manager.current_session_cost
+      self.assertGreater(spent, 0)
+
+      second = block.enhance_abc_batch(items)
+      self.assertEqual((manager.starts, len(manager.inferred)), (1, 2))
+      self.assertEqual([(r['enhanced'], r['cached'], r['cost']) for r in second],
+                       [(True, True, 0.0), (True, True, 0.0)])
+      self.assertEqual(second[0]['enhanced_abc'], first[0]['enhanced_abc'])
+      self.assertEqual(block.budget_manager.current_session_cost, spent)
+
+
+if __name__ == '__main__':
+  unittest.main()